@@ -1,26 +1,87 @@
-import torch
 from pydantic_settings import BaseSettings
 
 
-def _default_device() -> str:
-    return "cuda" if torch.cuda.is_available() else "cpu"
-
-
 class Settings(BaseSettings):
     port: int = 9000
-    device: str = _default_device()
+    device: str = "auto"  # "cuda", "cpu" or "auto" (resolved by resolve_device, which imports torch)
     whisper_model: str = "large-v3"
     translate_model: str = "facebook/nllb-200-3.3B"
     vad_threshold: float = 0.5
     sample_rate: int = 16000
     tts_sample_rate: int = 24000
     model_cache_dir: str = "/root/.cache"
+    prepared_cache_dir: str = "/root/.cache/prepared"  # "" disables the prepared-artifact cache
     voice_presets_dir: str = "/app/voice_presets"
+    voice_pack_path: str = "/app/voice_pack.bin"  # Kokoro style tensors (scripts/build_voice_pack.py); "" = fetch per voice
     elevenlabs_api_key: str = ""
     stt_postprocess: bool = True
+    postprocess_backend: str = "torch"  # "torch" (fp16 GPU / fp32 CPU, ~16 GB) or "ct2" (CTranslate2 int8, ~4.5 GB)
+    postprocess_compute_type: str = "int8"  # ct2 backend: int8, int8_float16, int8_bfloat16
+    postprocess_model_path: str = "/app/postprocess-ct2"  # ct2 backend: converted weights (scripts/build_postprocess_model.py)
+    postprocess_max_mb: int = 0  # ct2 backend: skip post-processing if the weights are larger; 0 = no cap
     denoise_enabled: bool = False
+    scheduler_workers: int = 4
+    scheduler_realtime_workers: int = 1
+    scheduler_max_queue: int = 64
+    scheduler_max_session_queue: int = 8
+    cpu_cores: int = 0  # cores for inference; 0 = all this process may use (split across pipeline_workers)
+    torch_threads: int = 0  # torch intra-op threads (process-wide); 0 = cores per executor slot
+    stt_cpu_threads: int = 0  # CTranslate2 threads per transcription; 0 = cores per executor slot
+    thread_autotune: bool = False  # at startup, benchmark a few slot/thread splits and keep the fastest
+    thread_autotune_s: float = 10.0  # per candidate split
+    translation_memory: bool = True  # exact/fuzzy matches and recent outputs skip NLLB
+    tm_path: str = ""  # seed translations, JSON lines (scripts/build_tm.py); POST /admin/tm appends here
+    tm_min_score: float = 0.9  # trigram similarity a fuzzy match needs to be returned as is
+    tm_cache_size: int = 10000  # recent model outputs kept for exact repeats
+    tts_cache_mb: int = 64  # synthesized audio kept for repeated translations; 0 = off
+    vocabulary_max_terms: int = 200  # session.create vocabulary terms prefetched; the rest are ignored
+    vocabulary_max_chars: int = 200  # longer vocabulary entries are skipped
+    short_utterance_s: float = 2.0
+    speculative_stt: bool = False  # start STT when a short pause begins; discard it if speech resumes
+    speculative_pause_ms: int = 200  # silence that counts as a pause (the utterance ends after ~500ms)
+    speculative_translate: bool = True  # also translate the speculative transcript
+    ingest_chunk_ms: int = 500  # realtime VAD chunk, rounded up to whole 512-sample windows
+    decode_workers: int = 2  # threads decoding/resampling compressed or non-16kHz mic input
+    ws_max_pending_chunks: int = 16  # per connection: dispatched-but-unsent 500ms chunks before ingest pauses
+    broadcast_listener_queue: int = 16  # per listener: undelivered batches kept before dropping the oldest
+    pipeline_workers: int = 0  # >0: front process + N inference worker processes (mapped weights are shared)
+    worker_shm_mb: int = 16
+    pipeline_backend: str = "real"  # "stub": deterministic CPU-only processors (benchmarks, load tests)
+    stub_time_scale: float = 1.0    # multiplier on the stubs' simulated compute time
+    lazy_model_load: bool = False  # load models on first use instead of at startup
+    model_ram_budget_mb: int = 0   # 0 = unlimited; LRU-evict idle models past this
+    model_vram_budget_mb: int = 0
+    trace_file: str = ""  # per-utterance latency spans as JSON lines; "" disables
+    trace_max_mb: int = 50
+    trace_backups: int = 3
+    transcript_dir: str = ""  # per-session utterance records (JSON lines) for lesson review; "" disables
+    transcript_audio: bool = False  # also keep each utterance's TTS audio, in a .pcm file beside the records
+    transcript_max_mb: int = 20  # per file; a session's log moves on to a new part once one is this big
+    transcript_flush_ms: int = 200  # how long the writer collects records before writing them in one batch
+    transcript_queue: int = 1024  # records waiting to be written before new ones are dropped
+    capture_dir: str = ""  # record every session's incoming frames for scripts/replay_capture.py; "" disables
+    capture_max_mb: int = 200  # per session; frames past this are not recorded
+    node_max_sessions: int = 0  # sessions this node is sized for (scripts/loadgen.py); 0 = judge load by queues only
+    router_nodes: str = ""  # app/router.py: comma-separated pipeline node base URLs, e.g. http://10.0.0.5:9000
+    router_poll_ms: int = 1000  # app/router.py: how often each node's /ready is polled
+    admin_token: str = ""  # enables /admin/* and /sessions/* routes (X-Admin-Token header); "" = off
+    profile_max_s: float = 30.0
+    profile_interval_ms: float = 10.0
+    profile_max_overhead: float = 0.02  # stack sampler backs off to stay under this share of wall time
 
     model_config = {"env_prefix": "", "env_file": ".env", "env_file_encoding": "utf-8"}
 
 
 settings = Settings()
+
+
+def resolve_device() -> str:
+    """Resolve ``settings.device`` if it is "auto"; torch is imported only then."""
+    if settings.device == "auto":
+        try:
+            import torch
+        except ImportError:
+            settings.device = "cpu"
+        else:
+            settings.device = "cuda" if torch.cuda.is_available() else "cpu"
+    return settings.device
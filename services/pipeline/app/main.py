@@ -1,13 +1,23 @@
 """FastAPI + WebSocket entry point for pipeline server."""
 
+import asyncio
+import hmac
+import io
 import logging
+import time
+import wave
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket
+from fastapi import Body, Depends, FastAPI, Header, HTTPException, Query, WebSocket
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
+from . import tracing
 from .config import settings
-from .models.loader import log_gpu_memory, check_gpu_available
-from .pipeline.orchestrator import PipelineOrchestrator
+from .metrics import ACTIVE_SESSIONS, merge, render
+from .models.loader import check_gpu_available, log_gpu_memory
+from .profiling import ProfileBusy
+from .pipeline.tts import TtsProcessor
+from .transcripts import TranscriptLog
 from .ws.handler import ConnectionHandler
 
 logging.basicConfig(
@@ -16,19 +26,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-pipeline = PipelineOrchestrator()
-handler = ConnectionHandler(pipeline)
+# Built at startup (lifespan), not import: keeps `import app.main` cheap and
+# leaves torch and the model libraries unimported until they are needed
+runner = None
+handler = None
+transcripts: TranscriptLog | None = None
+# "loading" until the runner has started (models loaded), then "ready", or "failed"
+status = "loading"
+
+
+def _build_runner():
+    """The local pipeline, or the worker pool whose processes own the models."""
+    if settings.pipeline_workers > 0:
+        from .workers.pool import WorkerPool
+
+        # Models live in the worker processes; this process only owns the sockets
+        return WorkerPool(workers=settings.pipeline_workers, shm_mb=settings.worker_shm_mb)
+    from .pipeline.orchestrator import PipelineOrchestrator
+    from .pipeline.runner import LocalRunner
+    from .pipeline.scheduler import PipelineScheduler
+
+    return LocalRunner(PipelineOrchestrator(), PipelineScheduler(
+        workers=settings.scheduler_workers,
+        realtime_workers=settings.scheduler_realtime_workers,
+        max_queue=settings.scheduler_max_queue,
+        max_session_queue=settings.scheduler_max_session_queue,
+    ))
+
+
+async def _start_runner(gpu: bool):
+    """Load the models off the event loop, so /ready can answer 503 meanwhile."""
+    global status
+    try:
+        await asyncio.to_thread(runner.start)
+    except Exception as e:
+        status = "failed"
+        logger.exception("Pipeline failed to start: %s", e)
+        return
+    if gpu:
+        log_gpu_memory()
+    status = "ready"
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Load models on startup, clean up on shutdown."""
+    """Start loading models, clean up on shutdown."""
+    global runner, handler, transcripts
+    runner = _build_runner()
+    if settings.transcript_dir:
+        transcripts = TranscriptLog(
+            settings.transcript_dir, max_mb=settings.transcript_max_mb, keep_audio=settings.transcript_audio,
+            sample_rate=settings.tts_sample_rate, queue_size=settings.transcript_queue,
+            flush_ms=settings.transcript_flush_ms,
+        )
+        transcripts.start()
+    handler = ConnectionHandler(runner, transcripts)
+    # Only a local real pipeline needs torch in this process; pool workers resolve their own device
+    gpu = settings.pipeline_backend != "stub" and settings.pipeline_workers == 0
+    if gpu:
+        check_gpu_available()
     logger.info("Starting pipeline server on device=%s", settings.device)
-    check_gpu_available()
-    pipeline.load_models()
-    log_gpu_memory()
+    startup = asyncio.create_task(_start_runner(gpu))
     yield
     logger.info("Shutting down pipeline server")
+    # A load still in progress finishes first (it cannot be interrupted)
+    await startup
+    handler.close()
+    runner.shutdown()
+    tracing.close()
+    if transcripts is not None:
+        await transcripts.close()
 
 
 app = FastAPI(
@@ -41,16 +108,128 @@ app = FastAPI(
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     """Main WebSocket endpoint for audio translation pipeline."""
+    if status != "ready":
+        # 1013: try again later (the router / client picks another node or retries). Accepted
+        # first: closing during the handshake makes uvicorn answer HTTP 403 instead
+        await ws.accept()
+        await ws.close(code=1013)
+        return
     await handler.handle(ws)
 
 
 @app.get("/health")
 async def health():
-    """Health check endpoint."""
+    """Liveness: the process is up (/ready says whether it takes sessions)."""
     return {"status": "ok", "device": settings.device}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 503 while models load or when the node is saturated, with its load.
+
+    ``capacity`` is the share of the node still free (0 = full, 1 = idle):
+    the lower of the free share of the scheduler queue and, with
+    NODE_MAX_SESSIONS set, of the session slots. app/router.py places new
+    sessions by it.
+    """
+    active = int(ACTIVE_SESSIONS.value())
+    if status != "ready":
+        return JSONResponse({"status": status, "active_sessions": active}, status_code=503)
+    models, load = await asyncio.gather(runner.models(), runner.load())
+    queued = sum(load["queues"].values())
+    # No queue at all (every pool worker died) is no room
+    capacity = 1 - queued / load["max_queue"] if load["max_queue"] else 0.0
+    if settings.node_max_sessions > 0:
+        capacity = min(capacity, 1 - active / settings.node_max_sessions)
+    capacity = round(max(capacity, 0.0), 3)
+    body = {
+        "status": "ready" if capacity > 0 else "saturated",
+        "models": sorted({m["name"] for m in models if m["loaded"]}),
+        "active_sessions": active,
+        "max_sessions": settings.node_max_sessions,
+        "queues": load["queues"],
+        "capacity": capacity,
+    }
+    return JSONResponse(body, status_code=200 if capacity > 0 else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text exposition of pipeline metrics."""
+    families = merge(*await runner.metrics())
+    return PlainTextResponse(render(families), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/models")
+async def list_models():
+    """Registered models, what is resident, and their measured sizes."""
+    return {"models": await runner.models()}
+
+
+def require_admin(x_admin_token: str = Header(default="")):
+    """Admin routes exist only when ADMIN_TOKEN is set, and need it in X-Admin-Token."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404)
+    if not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="invalid admin token")
+
+
+@app.get("/rooms")
+async def list_rooms():
+    """Broadcast rooms: listener count, batches dropped for slow listeners."""
+    return {"rooms": handler.rooms.stats()}
+
+
+# A whole lesson's transcript and audio: admin only, like /admin/*
+@app.get("/sessions/{session_id}/transcript", dependencies=[Depends(require_admin)])
+async def session_transcript(session_id: str):
+    """Every utterance record of a session, in order (needs TRANSCRIPT_DIR)."""
+    body = None
+    if transcripts is not None:
+        body = await asyncio.to_thread(transcripts.read, session_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="no transcript for this session")
+    return Response(body, media_type="application/json")
+
+
+@app.get("/sessions/{session_id}/audio/{utterance_id}", dependencies=[Depends(require_admin)])
+async def session_audio(session_id: str, utterance_id: str):
+    """One utterance's TTS audio as WAV (needs TRANSCRIPT_AUDIO)."""
+    pcm = None
+    if transcripts is not None:
+        pcm = await asyncio.to_thread(transcripts.read_audio, session_id, utterance_id)
+    if pcm is None:
+        raise HTTPException(status_code=404, detail="no audio for this utterance")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(transcripts.sample_rate)
+        w.writeframes(pcm)
+    return Response(buf.getvalue(), media_type="audio/wav")
+
+
 @app.get("/voices")
 async def list_voices():
     """List available voice presets."""
-    return {"voices": pipeline.tts.list_voices()}
+    return {"voices": TtsProcessor().list_voices()}
+
+
+@app.get("/admin/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def admin_profile(seconds: float = 10.0, with_torch: bool = Query(False, alias="torch")):
+    """Sample the live server for a few seconds; returns folded stacks for a flamegraph."""
+    seconds = min(max(seconds, 0.1), settings.profile_max_s)
+    try:
+        folded = await runner.profile(seconds, with_torch)
+    except ProfileBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    filename = "profile-%d.folded" % time.time()
+    return PlainTextResponse(folded, headers={"Content-Disposition": 'attachment; filename="%s"' % filename})
+
+
+@app.post("/admin/tm", dependencies=[Depends(require_admin)])
+async def admin_add_translations(entries: list[dict] = Body(...)):
+    """Seed the translation memory: [{"source", "target", "source_lang", "target_lang"}, ...]."""
+    if status != "ready":
+        raise HTTPException(status_code=503, detail="pipeline is %s" % status)
+    return {"added": await runner.add_translations(entries)}
@@ -0,0 +1,129 @@
+"""Prepared-artifact cache: converted weights + tokenizers in ready-to-load form.
+
+The first (cold) start loads from the hub checkpoint, converts to the
+serving dtype and writes the result (``save_mapped``: config, fast
+tokenizer JSON and one torch weights file) in the background. Later (warm)
+starts load that directory with ``load_mapped``: no dtype conversion, no
+hub round-trips, and the weights stay memory-mapped, so every pipeline
+worker on the node shares one copy of them in the page cache.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_MARKER = "prepared.json"
+# Weights of a load_mapped artifact (torch zip format, which torch.load can mmap)
+_WEIGHTS = "weights.pt"
+_STARTUP_STATS = "startup.json"
+
+
+def prepared_path(root: str, model_name: str, variant: str) -> Path | None:
+    """Directory for ``model_name`` prepared as ``variant`` (e.g. "float16"), None if disabled."""
+    if not root:
+        return None
+    slug = model_name.replace("/", "--")
+    return Path(root) / f"{slug}-{variant}"
+
+
+def is_prepared(path: Path | None) -> bool:
+    return path is not None and (path / _MARKER).is_file()
+
+
+def save_prepared(path: Path, save: Callable[[str], None], meta: dict | None = None) -> bool:
+    """Run ``save(tmp_dir)``, then atomically publish the result at ``path``.
+
+    The marker file is written last, so a crash mid-save leaves nothing that
+    ``is_prepared`` would accept. Returns whether it succeeded.
+    """
+    tmp = path.with_name(path.name + ".tmp-%d" % os.getpid())
+    try:
+        t0 = time.time()
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        save(str(tmp))
+        (tmp / _MARKER).write_text(json.dumps({**(meta or {}), "created": time.time()}))
+        shutil.rmtree(path, ignore_errors=True)
+        tmp.rename(path)
+        logger.info("[CACHE] Prepared %s in %.1fs", path, time.time() - t0)
+        return True
+    except Exception as e:
+        logger.warning("[CACHE] Could not prepare %s: %s", path, e)
+        shutil.rmtree(tmp, ignore_errors=True)
+        return False
+
+
+def save_prepared_async(path: Path | None, save: Callable[[str], None], meta: dict | None = None):
+    """``save_prepared`` in a background thread (the model is already loaded and serving)."""
+    if path is None or is_prepared(path):
+        return
+    threading.Thread(target=save_prepared, args=(path, save, meta),
+                     name="prepare-" + path.name, daemon=True).start()
+
+
+def save_mapped(model, tokenizer, path: str):
+    """Write a transformers model for ``load_mapped``: config, tokenizer and one torch weights file."""
+    import torch
+
+    model.config.save_pretrained(path)
+    if getattr(model, "generation_config", None) is not None:
+        model.generation_config.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    torch.save(model.state_dict(), os.path.join(path, _WEIGHTS))
+
+
+def load_mapped(model_class, path: Path, dtype):
+    """``model_class`` (an Auto* class) with its weights memory-mapped from ``path``.
+
+    from_pretrained copies every tensor into the process's own memory, so
+    each pipeline worker would hold a full copy. Here the tensors stay views
+    of a private (copy-on-write) mapping of the file, and inference never
+    writes to them, so all processes serving the same file share its pages
+    in the page cache. The model is built without initializing its weights
+    (the untouched allocations never become resident) and then takes the
+    mapped tensors as its parameters.
+    """
+    import torch
+    from transformers import AutoConfig, GenerationConfig
+    from transformers.modeling_utils import no_init_weights
+
+    config = AutoConfig.from_pretrained(path)
+    with no_init_weights():
+        model = model_class.from_config(config, torch_dtype=dtype)
+    state = torch.load(path / _WEIGHTS, map_location="cpu", mmap=True, weights_only=True)
+    model.load_state_dict(state, assign=True)
+    model.tie_weights()
+    if (path / "generation_config.json").is_file():
+        model.generation_config = GenerationConfig.from_pretrained(path)
+    return model
+
+
+def dir_size_mb(path: Path) -> float:
+    """Total size of the files under ``path``, in MB."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1024**2
+
+
+def record_startup(root: str, total_s: float, warm: bool) -> dict:
+    """Remember the latest cold and warm startup times; returns the updated record."""
+    stats = {}
+    if not root:
+        return stats
+    stats_file = Path(root) / _STARTUP_STATS
+    try:
+        stats = json.loads(stats_file.read_text())
+    except (OSError, ValueError):
+        pass
+    stats["warm_s" if warm else "cold_s"] = round(total_s, 1)
+    try:
+        stats_file.parent.mkdir(parents=True, exist_ok=True)
+        stats_file.write_text(json.dumps(stats))
+    except OSError as e:
+        logger.debug("Could not write startup stats: %s", e)
+    return stats
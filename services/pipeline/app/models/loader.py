@@ -1,13 +1,21 @@
 """Model loading and GPU memory management."""
 
+import gc
 import logging
-import torch
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Callable
 
 logger = logging.getLogger(__name__)
 
 
 def log_gpu_memory():
     """Log current GPU memory usage."""
+    import torch
+
     if torch.cuda.is_available():
         allocated = torch.cuda.memory_allocated() / 1024**3
         reserved = torch.cuda.memory_reserved() / 1024**3
@@ -22,6 +30,8 @@ def log_gpu_memory():
 
 def check_gpu_available() -> bool:
     """Check if CUDA GPU is available."""
+    import torch
+
     available = torch.cuda.is_available()
     if available:
         device_name = torch.cuda.get_device_name(0)
@@ -29,3 +39,182 @@ def check_gpu_available() -> bool:
     else:
         logger.warning("No GPU available, falling back to CPU")
     return available
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process (Linux), 0 if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _device_bytes(device: str) -> int:
+    if device.startswith("cuda"):
+        import torch
+
+        if torch.cuda.is_available():
+            return torch.cuda.memory_allocated()
+    return _rss_bytes()
+
+
+def _free_memory(device: str):
+    gc.collect()
+    if device.startswith("cuda"):
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+@dataclass
+class _ModelEntry:
+    name: str
+    load: Callable[[], None]
+    unload: Callable[[], None]
+    device: str
+    pinned: bool = False
+    loaded: bool = False
+    size_bytes: int = 0
+    in_use: int = 0
+    last_used: float = 0.0
+    loads: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelRegistry:
+    """Lazy-loading model registry with a RAM/VRAM budget and LRU eviction.
+
+    Each model is registered with load/unload callables and the device it
+    lives on. ``use(name)`` loads on first use and pins the model while the
+    block runs; when a device goes over budget the least-recently-used idle
+    models on it are unloaded. Sizes are measured as the memory delta around
+    each load (VRAM on cuda, RSS on cpu). That delta is process-wide, so
+    with a budget set loads run one at a time: otherwise overlapping loads
+    count each other and eviction unloads models that were just loaded.
+    Without a budget they overlap and the sizes are only approximate.
+    """
+
+    def __init__(self, ram_budget_mb: int = 0, vram_budget_mb: int = 0):
+        self.budgets = {
+            "cpu": ram_budget_mb * 1024**2,
+            "cuda": vram_budget_mb * 1024**2,
+        }
+        self._entries: dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+        # Held around a load and its measurement only; loads never call back into the registry
+        self._measure_lock = threading.Lock() if any(self.budgets.values()) else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def register(self, name: str, load: Callable[[], None], unload: Callable[[], None],
+                 device: str = "cpu", pinned: bool = False):
+        self._entries[name] = _ModelEntry(name, load, unload, device, pinned)
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.loaded
+
+    def ensure_loaded(self, name: str):
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.loaded:
+                with self._lock:
+                    self.hits += 1
+                return
+            with self._lock:
+                self.misses += 1
+            # Make room up front when we know the size from a previous load
+            if entry.size_bytes:
+                self._evict(entry.device, entry.size_bytes, keep=name)
+
+            t0 = time.time()
+            with self._measure_lock or nullcontext():
+                before = _device_bytes(entry.device)
+                entry.load()
+                entry.size_bytes = max(_device_bytes(entry.device) - before, entry.size_bytes, 0)
+            entry.loaded = True
+            entry.loads += 1
+            entry.last_used = time.time()
+            logger.info("[MODELS] Loaded %s on %s: %.0f MB in %.1fs",
+                        name, entry.device, entry.size_bytes / 1024**2, time.time() - t0)
+        self._evict(entry.device, 0, keep=name)
+
+    @contextmanager
+    def use(self, name: str):
+        """Load ``name`` if needed and keep it from being evicted inside the block."""
+        entry = self._entries[name]
+        with self._lock:
+            entry.in_use += 1
+        try:
+            self.ensure_loaded(name)
+            entry.last_used = time.time()
+            yield
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+
+    def unload(self, name: str):
+        entry = self._entries[name]
+        with entry.lock:
+            if not entry.loaded:
+                return
+            entry.unload()
+            entry.loaded = False
+        _free_memory(entry.device)
+        logger.info("[MODELS] Unloaded %s (%.0f MB)", name, entry.size_bytes / 1024**2)
+
+    def resident_bytes(self, device: str) -> int:
+        kind = "cuda" if device.startswith("cuda") else "cpu"
+        return sum(
+            e.size_bytes for e in self._entries.values()
+            if e.loaded and ("cuda" if e.device.startswith("cuda") else "cpu") == kind
+        )
+
+    def _evict(self, device: str, needed: int, keep: str):
+        kind = "cuda" if device.startswith("cuda") else "cpu"
+        budget = self.budgets.get(kind, 0)
+        if not budget:
+            return
+        while self.resident_bytes(device) + needed > budget:
+            with self._lock:
+                candidates = [
+                    e for e in self._entries.values()
+                    if e.loaded and not e.pinned and e.in_use == 0 and e.name != keep
+                    and ("cuda" if e.device.startswith("cuda") else "cpu") == kind
+                ]
+            if not candidates:
+                logger.warning("[MODELS] %s over budget (%.0f / %.0f MB) but nothing is evictable",
+                               kind, (self.resident_bytes(device) + needed) / 1024**2, budget / 1024**2)
+                return
+            victim = min(candidates, key=lambda e: e.last_used)
+            with victim.lock:
+                # Re-check under the entry lock: a user may have grabbed it meanwhile
+                with self._lock:
+                    busy = victim.in_use > 0
+                if busy or not victim.loaded:
+                    continue
+                victim.unload()
+                victim.loaded = False
+                self.evictions += 1
+            _free_memory(victim.device)
+            logger.info("[MODELS] Evicted %s (%.0f MB, idle %.0fs)",
+                        victim.name, victim.size_bytes / 1024**2, time.time() - victim.last_used)
+
+    def report(self) -> list[dict]:
+        """What is registered, what is resident, and how big it is."""
+        now = time.time()
+        return [
+            {
+                "name": e.name,
+                "device": e.device,
+                "loaded": e.loaded,
+                "size_mb": round(e.size_bytes / 1024**2, 1),
+                "in_use": e.in_use,
+                "loads": e.loads,
+                "idle_s": round(now - e.last_used, 1) if e.last_used else None,
+            }
+            for e in self._entries.values()
+        ]
@@ -47,6 +47,10 @@ class DenoiseProcessor:
         except Exception as e:
             logger.warning("DeepFilterNet not available: %s", e)
 
+    def unload(self):
+        self.model = None
+        self.df_state = None
+
     def process(self, audio: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
         """Apply noise reduction to audio.
 
@@ -2,191 +2,459 @@
 
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+
 import numpy as np
 
-from ..config import settings
+from ..config import resolve_device, settings
+from ..metrics import AUDIO_SECONDS, REAL_TIME_FACTOR, STAGE_LATENCY, UTTERANCES, metrics
+from ..models.artifacts import record_startup
+from ..models.loader import ModelRegistry
 from .denoise import DenoiseProcessor
-from .vad import VadProcessor
+from .vad import VAD_WINDOW_SIZE, VadProcessor
 from .stt import SttProcessor
 from .translate import TranslateProcessor
-from .tts import TtsProcessor
-from .postprocess import SttPostProcessor
+from .tts import TtsCache, TtsProcessor, float_to_pcm16
+from .postprocess import QuantizedPostProcessor, SttPostProcessor
+from .scheduler import Priority
+from .translation_memory import TranslationMemory, append_entries
+from . import threads
 
 logger = logging.getLogger(__name__)
 
 
 class PipelineOrchestrator:
-    def __init__(self):
-        self.denoise = DenoiseProcessor()
-        self.vad = VadProcessor(threshold=settings.vad_threshold)
-        self.stt = SttProcessor(api_key=settings.elevenlabs_api_key, model_size=settings.whisper_model, device=settings.device)
-        self.translate = TranslateProcessor(model_name=settings.translate_model, device=settings.device)
-        self.tts = TtsProcessor(device=settings.device, voice_presets_dir=settings.voice_presets_dir)
-        self.postprocess = SttPostProcessor(device=settings.device)
-        self._stt_label = "Scribe v2" if settings.elevenlabs_api_key else "Whisper"
+    def __init__(self, backend: str | None = None):
+        self.backend = backend or settings.pipeline_backend
+        # Before anything imports torch/CTranslate2: their pools are sized on import
+        self.threads = threads.plan_threads()
+        threads.configure_env(self.threads)
+        if self.backend == "stub":
+            # Stubs never touch torch: "auto" means CPU without probing for CUDA
+            self.device = "cpu" if settings.device == "auto" else settings.device
+            self._init_stubs()
+        else:
+            self.device = resolve_device()
+            self.denoise = DenoiseProcessor()
+            self.vad = VadProcessor(threshold=settings.vad_threshold)
+            self.stt = SttProcessor(
+                api_key=settings.elevenlabs_api_key, model_size=settings.whisper_model, device=self.device,
+                cpu_threads=self.threads.stt_threads, num_workers=self.threads.stt_workers,
+            )
+            self.translate = TranslateProcessor(
+                model_name=settings.translate_model, device=self.device,
+                prepared_dir=settings.prepared_cache_dir,
+            )
+            self.tts = TtsProcessor(device=self.device, voice_presets_dir=settings.voice_presets_dir,
+                                    voice_pack_path=settings.voice_pack_path)
+            if settings.postprocess_backend == "ct2":
+                self.postprocess = QuantizedPostProcessor(
+                    settings.postprocess_model_path, device=self.device,
+                    compute_type=settings.postprocess_compute_type, max_mb=settings.postprocess_max_mb,
+                    cpu_threads=self.threads.stt_threads,
+                )
+            else:
+                self.postprocess = SttPostProcessor(device=self.device, prepared_dir=settings.prepared_cache_dir)
+            self._stt_label = "Scribe v2" if settings.elevenlabs_api_key else "Whisper"
+            # Only use post-processor for local Whisper (Scribe v2 has built-in post-processing)
+            self._use_postprocess = settings.stt_postprocess and not settings.elevenlabs_api_key
+
+        # Known sentences skip NLLB (seeded in load_models)
+        self.memory = None
+        if settings.translation_memory:
+            self.memory = TranslationMemory(min_score=settings.tm_min_score, cache_size=settings.tm_cache_size)
+        # Repeated translations (and prefetched lesson vocabulary) skip Kokoro
+        self.tts_cache = TtsCache(settings.tts_cache_mb * 1024 * 1024) if settings.tts_cache_mb > 0 else None
+
+        if settings.speculative_stt:
+            # A pause has to be shorter than the silence that ends the utterance
+            self.vad.pause_frames = min(max(round(settings.speculative_pause_ms / 1000 * settings.sample_rate
+                                                  / VAD_WINDOW_SIZE), 1), self.vad._silence_threshold - 1)
+
+        self.models = ModelRegistry(
+            ram_budget_mb=settings.model_ram_budget_mb,
+            vram_budget_mb=settings.model_vram_budget_mb,
+        )
+        self.models.register("denoise", self.denoise.load, self.denoise.unload, device="cpu")
+        self.models.register("vad", self.vad.load, self.vad.unload, device="cpu", pinned=True)
+        self.models.register("stt", self.stt.load, self.stt.unload, device=self.device)
+        self.models.register("translate", self.translate.load, self.translate.unload, device=self.device)
+        self.models.register("tts", self.tts.load, self.tts.unload, device=self.device)
+        # Non-default Kokoro languages: G2P pipelines on top of the shared "tts" model
+        for code in self.tts.language_codes():
+            if code != "a":
+                self.models.register(
+                    "tts:" + code,
+                    partial(self.tts.load_language, code), partial(self.tts.unload_language, code),
+                    device=self.device,
+                )
+        if self._use_postprocess:
+            self.models.register("postprocess", self.postprocess.load, self.postprocess.unload, device=self.device)
+
+        metrics.callback("pipeline_model_cache_hits_total", "Model lookups that found the model resident.",
+                         lambda: self.models.hits, kind="counter")
+        metrics.callback("pipeline_model_cache_misses_total", "Model lookups that had to load the model.",
+                         lambda: self.models.misses, kind="counter")
+        metrics.callback("pipeline_model_evictions_total", "Models unloaded to stay within the memory budget.",
+                         lambda: self.models.evictions, kind="counter")
+        metrics.callback("pipeline_model_resident_bytes", "Measured size of each resident model.",
+                         lambda: {(("model", m["name"]),): m["size_mb"] * 1024**2
+                                  for m in self.models.report() if m["loaded"]})
+        if self.memory is not None:
+            metrics.callback("pipeline_tm_entries", "Seeded translation memory entries.", lambda: len(self.memory))
+        if self.tts_cache is not None:
+            metrics.callback("pipeline_tts_cache_bytes", "Synthesized audio held in the TTS cache.",
+                             lambda: self.tts_cache.nbytes)
+        metrics.callback("pipeline_thread_budget", "CPU thread budget: executor slots and threads per stage.",
+                         lambda: {(("item", name),): value for name, value in (
+                             ("cores", self.threads.cores), ("slots", self.threads.slots),
+                             ("torch_threads", self.threads.torch_threads),
+                             ("stt_threads", self.threads.stt_threads), ("stt_workers", self.threads.stt_workers),
+                         )})
+
+    def _init_stubs(self):
+        """Deterministic CPU-only processors for benchmarks and load tests."""
+        from .stubs import (
+            StubDenoiseProcessor, StubVadProcessor, StubSttProcessor,
+            StubTranslateProcessor, StubTtsProcessor, StubPostProcessor,
+        )
+
+        scale = settings.stub_time_scale
+        self.denoise = StubDenoiseProcessor(time_scale=scale)
+        self.vad = StubVadProcessor(threshold=settings.vad_threshold, time_scale=scale)
+        self.stt = StubSttProcessor(time_scale=scale)
+        self.translate = StubTranslateProcessor(time_scale=scale)
+        self.tts = StubTtsProcessor(time_scale=scale, device="cpu")
+        self.postprocess = StubPostProcessor(time_scale=scale)
+        self._stt_label = "Stub   "
+        self._use_postprocess = settings.stt_postprocess
 
     def load_models(self):
-        """Load all models at startup."""
+        """Load models at startup, independent ones concurrently (only VAD when lazy).
+
+        Under a memory budget the registry runs the loads one at a time.
+        """
         logger.info("Loading pipeline models...")
+        threads.apply_torch(self.threads)
 
-        t0 = time.time()
-        self.denoise.load()
-        logger.info("[LOAD] Denoise: %.1fs", time.time() - t0)
+        names = ["denoise", "vad", "stt", "translate", "tts"]
+        if self._use_postprocess:
+            names.append("postprocess")
+        if settings.lazy_model_load:
+            names = ["vad"]
 
-        t0 = time.time()
-        self.vad.load()
-        logger.info("[LOAD] VAD: %.1fs", time.time() - t0)
+        timings = {}
 
-        t0 = time.time()
-        self.stt.load()
-        logger.info("[LOAD] STT (%s): %.1fs", self._stt_label, time.time() - t0)
+        def _load(name: str):
+            t0 = time.time()
+            self.models.ensure_loaded(name)
+            timings[name] = time.time() - t0
+            logger.info("[LOAD] %s: %.1fs", name, timings[name])
+
+        t_start = time.time()
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="load") as pool:
+            for future in [pool.submit(_load, name) for name in names]:
+                future.result()
+        self._log_startup(timings, time.time() - t_start)
+
+        if self.memory is not None and settings.tm_path:
+            self.memory.load(settings.tm_path)
+
+        if settings.thread_autotune and not settings.lazy_model_load:
+            self.threads = threads.autotune(self, self.threads, settings.thread_autotune_s)
+            threads.apply_torch(self.threads)
+            self.apply_stt_threads(self.threads)
+
+    def apply_stt_threads(self, plan: "threads.ThreadPlan"):
+        """Give CTranslate2 the plan's split (reloads local Whisper if it changed)."""
+        with self.models.use("stt"):
+            self.stt.set_threads(plan.stt_threads, plan.stt_workers)
+
+    def _log_startup(self, timings: dict[str, float], total_s: float):
+        """Startup summary: per-phase time, prepared-cache state, cold vs warm totals."""
+        processors = {
+            "denoise": self.denoise, "vad": self.vad, "stt": self.stt,
+            "translate": self.translate, "tts": self.tts, "postprocess": self.postprocess,
+        }
+        cache_hits = {
+            name: getattr(processors[name], "prepared_hit", None) for name in timings
+        }
+        warm = all(hit is not False for hit in cache_hits.values())
+        stats = record_startup(settings.prepared_cache_dir, total_s, warm)
+
+        lines = ["═══ STARTUP ═══"]
+        for name, seconds in sorted(timings.items(), key=lambda kv: -kv[1]):
+            hit = cache_hits[name]
+            state = "" if hit is None else ("  (warm)" if hit else "  (cold)")
+            lines.append("  %-12s: %6.1fs%s" % (name, seconds, state))
+        lines.extend([
+            "  ─────────────────────────",
+            "  TOTAL       : %6.1fs wall (%.1fs sequential) — %s cache"
+            % (total_s, sum(timings.values()), "warm" if warm else "cold"),
+        ])
+        if stats:
+            lines.append("  Last cold start: %s, last warm start: %s" % (
+                "%.1fs" % stats["cold_s"] if "cold_s" in stats else "n/a",
+                "%.1fs" % stats["warm_s"] if "warm_s" in stats else "n/a",
+            ))
+        logger.info("\n".join(lines))
+
+    def _transcribe(self, audio: np.ndarray, language: str) -> str:
+        with self.models.use("stt"), STAGE_LATENCY.time(stage="stt"):
+            return self.stt.transcribe(audio, language=language)
+
+    def _translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        if self.memory is not None:
+            remembered = self.memory.lookup(text, source_lang, target_lang)
+            if remembered is not None:
+                return remembered
+        with self.models.use("translate"), STAGE_LATENCY.time(stage="translate"):
+            translation = self.translate.translate(text, source_lang, target_lang)
+        if self.memory is not None and translation and source_lang != target_lang:
+            self.memory.remember(text, translation, source_lang, target_lang)
+        return translation
+
+    def add_translations(self, entries: list[dict], persist: bool = True) -> int:
+        """Seed the translation memory at runtime (and append to settings.tm_path when ``persist``)."""
+        if self.memory is None:
+            return 0
+        added = self.memory.add_many(entries)
+        if persist and settings.tm_path and added:
+            append_entries(settings.tm_path, entries)
+        return added
+
+    def _synthesize(self, text: str, voice: str, language: str) -> bytes:
+        if self.tts_cache is not None:
+            cached = self.tts_cache.get(text, voice, language)
+            if cached is not None:
+                return cached
+        lang_code = self.tts.lang_code_for(language)
+        with self.models.use("tts"):
+            if lang_code == "a":
+                with STAGE_LATENCY.time(stage="tts"):
+                    pcm = self.tts.synthesize(text, voice=voice, language=language)
+            else:
+                with self.models.use("tts:" + lang_code), STAGE_LATENCY.time(stage="tts"):
+                    pcm = self.tts.synthesize(text, voice=voice, language=language)
+        if self.tts_cache is not None:
+            self.tts_cache.put(text, voice, language, pcm)
+        return pcm
+
+    def prefetch(self, text: str, source_lang: str, target_lang: str, voice: str) -> str:
+        """Translate and synthesize a lesson term ahead of time, so both are cached when it is said."""
+        translation = self._translate(text, source_lang, target_lang)
+        if translation.strip():
+            self._synthesize(translation, voice, target_lang)
+        return translation
+
+    def _postprocess(self, text: str, audio_duration: float) -> str:
+        with self.models.use("postprocess"), STAGE_LATENCY.time(stage="postprocess"):
+            return self.postprocess.process(text, audio_duration=audio_duration)
+
+    @staticmethod
+    def _pcm_to_float(pcm_bytes: bytes) -> np.ndarray:
+        """Convert PCM 16-bit bytes to float32 numpy array."""
+        audio = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32)
+        audio /= 32768.0
+        return audio
+
+    @staticmethod
+    def _float_to_pcm(audio: np.ndarray) -> bytes:
+        """Convert float32 numpy array to PCM 16-bit bytes."""
+        return float_to_pcm16(audio)
+
+    def utterance_priority(self, num_samples: int) -> Priority:
+        """Short utterances jump ahead of long ones in the scheduler."""
+        if num_samples / settings.sample_rate <= settings.short_utterance_s:
+            return Priority.INTERACTIVE
+        return Priority.BULK
+
+    def detect_speech(self, audio_bytes: bytes, session) -> dict:
+        """Run VAD on a streaming chunk (cheap, scheduled at REALTIME priority)."""
+        audio = self._pcm_to_float(audio_bytes)
 
         t0 = time.time()
-        self.translate.load()
-        logger.info("[LOAD] Translate (NLLB-200): %.1fs", time.time() - t0)
+        vad_result = self.vad.process(audio, settings.sample_rate, session.vad)
+        vad_result["vad_ms"] = (time.time() - t0) * 1000
+        STAGE_LATENCY.observe(vad_result["vad_ms"] / 1000, stage="vad")
+        AUDIO_SECONDS.inc(len(audio) / settings.sample_rate, mode="realtime")
+        return vad_result
+
+    def speculate(self, speech_bytes: bytes, session, discarded: Callable[[], bool]) -> dict:
+        """STT (and translation) of the utterance so far, started when a pause begins.
+
+        ``discarded`` says whether speech has resumed since: it is checked
+        before each stage, so thrown-away work stops at the next stage
+        boundary. ``work_ms`` is the compute actually spent.
+        """
+        spec = {"transcript": None, "translation": None, "stt_ms": 0.0, "translate_ms": 0.0, "work_ms": 0.0}
+        if discarded():
+            spec["done_at"] = time.time()
+            return spec
 
         t0 = time.time()
-        self.tts.load()
-        logger.info("[LOAD] TTS: %.1fs", time.time() - t0)
+        speech_audio = np.frombuffer(speech_bytes, dtype=np.float32)
+        spec["transcript"] = self._transcribe(speech_audio, session.source_lang)
+        spec["stt_ms"] = (time.time() - t0) * 1000
 
-        # Only load post-processor for local Whisper (Scribe v2 has built-in post-processing)
-        self._use_postprocess = settings.stt_postprocess and not settings.elevenlabs_api_key
-        if self._use_postprocess:
+        if settings.speculative_translate and spec["transcript"].strip() and not discarded():
             t0 = time.time()
-            self.postprocess.load()
-            logger.info("[LOAD] STT PostProcess (Qwen): %.1fs", time.time() - t0)
+            spec["translation"] = self._translate(spec["transcript"], session.source_lang, session.target_lang)
+            spec["translate_ms"] = (time.time() - t0) * 1000
 
-        logger.info("All pipeline models loaded")
-
-    def _pcm_to_float(self, pcm_bytes: bytes) -> np.ndarray:
-        """Convert PCM 16-bit bytes to float32 numpy array."""
-        audio = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32)
-        audio /= 32768.0
-        return audio
+        spec["work_ms"] = spec["stt_ms"] + spec["translate_ms"]
+        spec["done_at"] = time.time()
+        return spec
 
-    def _float_to_pcm(self, audio: np.ndarray) -> bytes:
-        """Convert float32 numpy array to PCM 16-bit bytes."""
-        audio = np.clip(audio * 32768.0, -32768, 32767).astype(np.int16)
-        return audio.tobytes()
+    def process_utterance(self, speech_bytes: bytes, session, vad_ms: float = 0, utterance_id: str = "",
+                          speculative: dict | None = None) -> dict:
+        """Run STT → translate → TTS on a complete utterance detected by VAD.
 
-    def process_realtime(self, audio_bytes: bytes, session) -> dict | None:
-        """Process audio chunk in real-time mode."""
+        ``speculative`` is a finished ``speculate`` result for this utterance:
+        the stages it already ran are taken from it instead of being rerun.
+        """
         total_start = time.time()
-        audio = self._pcm_to_float(audio_bytes)
+        utterance_id = utterance_id or session.next_utterance_id()
+        result = {"utterance_id": utterance_id}
+        speculative = speculative or {}
+
+        # VAD buffer stores float32 bytes directly (not PCM int16)
+        speech_audio = np.frombuffer(speech_bytes, dtype=np.float32)
+        speech_dur = len(speech_audio) / settings.sample_rate
+
+        # Step 2: STT
+        if speculative.get("transcript") is not None:
+            transcript, stt_ms = speculative["transcript"], speculative["stt_ms"]
+        else:
+            t0 = time.time()
+            transcript = self._transcribe(speech_audio, session.source_lang)
+            stt_ms = (time.time() - t0) * 1000
+
+        if not transcript.strip():
+            result["timings"] = {"vad_ms": vad_ms, "stt_ms": stt_ms}
+            return result
+
+        result["transcript"] = transcript
+
+        # Step 3: Translate
+        if speculative.get("translation") is not None:
+            translation, translate_ms = speculative["translation"], speculative["translate_ms"]
+        else:
+            t0 = time.time()
+            translation = self._translate(transcript, session.source_lang, session.target_lang)
+            translate_ms = (time.time() - t0) * 1000
+        result["translation"] = translation
 
-        # Step 1: VAD
+        # Step 4: TTS
         t0 = time.time()
-        vad_result = self.vad.process(audio, settings.sample_rate)
-        vad_ms = (time.time() - t0) * 1000
+        tts_audio = self._synthesize(translation, session.voice, session.target_lang)
+        tts_ms = (time.time() - t0) * 1000
+        result["audio"] = tts_audio
+
+        total_ms = vad_ms + (time.time() - total_start) * 1000
+        result["timings"] = {
+            "vad_ms": vad_ms, "stt_ms": stt_ms, "translate_ms": translate_ms, "tts_ms": tts_ms,
+        }
+        UTTERANCES.inc(mode="realtime")
+        if speech_dur > 0:
+            REAL_TIME_FACTOR.observe(total_ms / 1000 / speech_dur, mode="realtime")
+        logger.info(
+            "═══ REALTIME PIPELINE %s%s ═══\n"
+            "  Speech duration : %.1fs\n"
+            "  ① VAD           : %7.0fms\n"
+            "  ② STT (%s) : %7.0fms\n"
+            "  ③ Translate     : %7.0fms\n"
+            "  ④ TTS           : %7.0fms\n"
+            "  ─────────────────────────\n"
+            "  TOTAL           : %7.0fms (%.1fs)\n"
+            "  \"%s\" → \"%s\"",
+            utterance_id, " (speculative)" if speculative else "", speech_dur,
+            vad_ms, self._stt_label, stt_ms, translate_ms, tts_ms,
+            total_ms, total_ms / 1000,
+            transcript[:60], translation[:60],
+        )
+        return result
+
+    def process_realtime(self, audio_bytes: bytes, session) -> dict | None:
+        """Process audio chunk in real-time mode (VAD, then the utterance if one ended)."""
+        vad_result = self.detect_speech(audio_bytes, session)
 
         result = {
             "speech_start": vad_result["speech_start"],
             "speech_end": vad_result["speech_end"],
         }
 
-        stt_ms = 0
-        translate_ms = 0
-        tts_ms = 0
-
         # Only run full pipeline when speech segment is complete
         if vad_result["speech_end"] and vad_result["speech_audio"]:
-            # VAD buffer stores float32 bytes directly (not PCM int16)
-            speech_audio = np.frombuffer(vad_result["speech_audio"], dtype=np.float32)
-            speech_dur = len(speech_audio) / settings.sample_rate
-
-            # Step 2: STT
-            t0 = time.time()
-            transcript = self.stt.transcribe(speech_audio, language=session.source_lang)
-            stt_ms = (time.time() - t0) * 1000
-
-            if transcript.strip():
-                result["transcript"] = transcript
-
-                # Step 3: Translate
-                t0 = time.time()
-                translation = self.translate.translate(transcript, session.source_lang, session.target_lang)
-                translate_ms = (time.time() - t0) * 1000
-                result["translation"] = translation
-
-                # Step 4: TTS
-                t0 = time.time()
-                tts_audio = self.tts.synthesize(translation, voice=session.voice, language=session.target_lang)
-                tts_ms = (time.time() - t0) * 1000
-                result["audio"] = tts_audio
-
-                total_ms = (time.time() - total_start) * 1000
-                logger.info(
-                    "═══ REALTIME PIPELINE ═══\n"
-                    "  Speech duration : %.1fs\n"
-                    "  ① VAD           : %7.0fms\n"
-                    "  ② STT (%s) : %7.0fms\n"
-                    "  ③ Translate     : %7.0fms\n"
-                    "  ④ TTS           : %7.0fms\n"
-                    "  ─────────────────────────\n"
-                    "  TOTAL           : %7.0fms (%.1fs)\n"
-                    "  \"%s\" → \"%s\"",
-                    speech_dur,
-                    vad_ms, self._stt_label, stt_ms, translate_ms, tts_ms,
-                    total_ms, total_ms / 1000,
-                    transcript[:60], translation[:60],
-                )
-                return result
+            result.update(self.process_utterance(vad_result["speech_audio"], session, vad_result["vad_ms"]))
 
         if not result.get("speech_start") and not result.get("speech_end"):
             return None
 
         return result
 
-    def process_segment(self, audio_bytes: bytes, session) -> dict:
+    def process_segment(self, audio_bytes: bytes, session, utterance_id: str = "") -> dict:
         """Process a complete audio segment (push-to-talk mode)."""
         total_start = time.time()
         audio = self._pcm_to_float(audio_bytes)
         audio_dur = len(audio) / settings.sample_rate
+        AUDIO_SECONDS.inc(audio_dur, mode="ptt")
+        UTTERANCES.inc(mode="ptt")
 
-        result = {}
+        utterance_id = utterance_id or session.next_utterance_id()
+        result = {"utterance_id": utterance_id}
 
         # Step 1: STT
         t0 = time.time()
-        transcript = self.stt.transcribe(audio, language=session.source_lang)
+        transcript = self._transcribe(audio, session.source_lang)
         stt_ms = (time.time() - t0) * 1000
 
         # Step 1.5: PostProcess STT (only for local Whisper)
         postprocess_ms = 0
         if transcript.strip() and self._use_postprocess:
             t0 = time.time()
-            transcript = self.postprocess.process(transcript, audio_duration=audio_dur)
+            transcript = self._postprocess(transcript, audio_dur)
             postprocess_ms = (time.time() - t0) * 1000
 
         if not transcript.strip():
             total_ms = (time.time() - total_start) * 1000
             logger.info(
-                "═══ PTT PIPELINE (empty) ═══\n"
+                "═══ PTT PIPELINE %s (empty) ═══\n"
                 "  Audio duration  : %.1fs\n"
                 "  ① STT (%s) : %7.0fms → (empty)\n"
                 "  TOTAL           : %7.0fms",
-                audio_dur, self._stt_label, stt_ms, total_ms,
+                utterance_id, audio_dur, self._stt_label, stt_ms, total_ms,
             )
+            result["timings"] = {"stt_ms": stt_ms, "postprocess_ms": postprocess_ms}
             return result
 
         result["transcript"] = transcript
 
         # Step 2: Translate
         t0 = time.time()
-        translation = self.translate.translate(transcript, session.source_lang, session.target_lang)
+        translation = self._translate(transcript, session.source_lang, session.target_lang)
         translate_ms = (time.time() - t0) * 1000
         result["translation"] = translation
 
         # Step 3: TTS
         t0 = time.time()
-        tts_audio = self.tts.synthesize(translation, voice=session.voice, language=session.target_lang)
+        tts_audio = self._synthesize(translation, session.voice, session.target_lang)
         tts_ms = (time.time() - t0) * 1000
         result["audio"] = tts_audio
 
         total_ms = (time.time() - total_start) * 1000
+        result["timings"] = {
+            "stt_ms": stt_ms, "postprocess_ms": postprocess_ms,
+            "translate_ms": translate_ms, "tts_ms": tts_ms,
+        }
+        if audio_dur > 0:
+            REAL_TIME_FACTOR.observe(total_ms / 1000 / audio_dur, mode="ptt")
 
         # Build log lines
         log_lines = [
-            "═══ PTT PIPELINE ═══",
+            "═══ PTT PIPELINE %s ═══" % utterance_id,
             "  Audio duration  : %.1fs" % audio_dur,
             "  ① STT (%s) : %7.0fms" % (self._stt_label, stt_ms),
         ]
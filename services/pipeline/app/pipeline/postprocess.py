@@ -1,9 +1,21 @@
-"""STT post-processing using local LLM to fix hallucinations."""
+"""STT post-processing using local LLM to fix hallucinations.
+
+Two backends with the same ``process()`` contract:
+  SttPostProcessor        transformers/torch, fp16 on GPU, fp32 on CPU (~16 GB)
+  QuantizedPostProcessor  CTranslate2 int8 weights (~4.5 GB), for CPU nodes
+"""
 
 import logging
+from pathlib import Path
+
+from ..models.artifacts import dir_size_mb, is_prepared, load_mapped, prepared_path, save_mapped, save_prepared_async
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "Qwen/Qwen3-4B-Instruct-2507"
+MAX_NEW_TOKENS = 128
+REPETITION_PENALTY = 1.3
+
 _SYSTEM_PROMPT = (
     "คุณเป็นระบบแก้ไขข้อความภาษาไทยจาก Speech-to-Text (Whisper)\n"
     "Whisper มักฟังเสียงไทยผิดเพราะพยัญชนะที่ออกเสียงคล้ายกัน\n\n"
@@ -25,9 +37,27 @@ _SYSTEM_PROMPT = (
 )
 
 
+def _messages(text: str, audio_duration: float) -> list[dict]:
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": "เสียงยาว %.1f วินาที\nข้อความ: %s" % (audio_duration, text)},
+    ]
+
+
+def _accept(text: str, result: str) -> str:
+    """The LLM's correction, or the original if it came back empty or runaway."""
+    if not result or len(result) > len(text) * 3:
+        return text
+    if result != text:
+        logger.info("STT postprocess: '%s' -> '%s'", text[:60], result[:60])
+    return result
+
+
 class SttPostProcessor:
-    def __init__(self, device: str = "cuda"):
+    def __init__(self, device: str = "cuda", prepared_dir: str = ""):
         self.device = device
+        self.prepared_dir = prepared_dir
+        self.prepared_hit = None
         self.model = None
         self.tokenizer = None
 
@@ -37,20 +67,39 @@ class SttPostProcessor:
             from transformers import AutoModelForCausalLM, AutoTokenizer
             import torch
 
-            model_name = "Qwen/Qwen3-4B-Instruct-2507"
-            logger.info("Loading STT post-processor: %s", model_name)
-
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-            ).to(self.device)
+            model_name = MODEL_NAME
+            dtype = torch.float16 if self.device == "cuda" else torch.float32
+            prepared = prepared_path(self.prepared_dir, model_name, "%s-mapped" % str(dtype).removeprefix("torch."))
+            self.prepared_hit = is_prepared(prepared)
+            logger.info("Loading STT post-processor: %s", prepared if self.prepared_hit else model_name)
+
+            if self.prepared_hit:
+                self.tokenizer = AutoTokenizer.from_pretrained(str(prepared))
+                # Mapped weights: the pipeline workers on this node share one copy
+                self.model = load_mapped(AutoModelForCausalLM, prepared, dtype).to(self.device)
+            else:
+                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    model_name,
+                    torch_dtype=dtype,
+                    # Stream weights from the mmapped checkpoint instead of a temp copy
+                    low_cpu_mem_usage=True,
+                ).to(self.device)
             self.model.eval()
 
             logger.info("STT post-processor loaded on %s", self.device)
+
+            if not self.prepared_hit:
+                model, tokenizer = self.model, self.tokenizer
+                save_prepared_async(prepared, lambda path: save_mapped(model, tokenizer, path),
+                                    {"model": model_name, "dtype": str(dtype)})
         except Exception as e:
             logger.warning("STT post-processor not available: %s", e)
 
+    def unload(self):
+        self.model = None
+        self.tokenizer = None
+
     def process(self, text: str, audio_duration: float = 0) -> str:
         """Clean up STT output using local LLM."""
         if not text.strip() or self.model is None:
@@ -59,23 +108,18 @@ class SttPostProcessor:
         try:
             import torch
 
-            messages = [
-                {"role": "system", "content": _SYSTEM_PROMPT},
-                {"role": "user", "content": "เสียงยาว %.1f วินาที\nข้อความ: %s" % (audio_duration, text)},
-            ]
-
             input_text = self.tokenizer.apply_chat_template(
-                messages, tokenize=False, add_generation_prompt=True
+                _messages(text, audio_duration), tokenize=False, add_generation_prompt=True
             )
             inputs = self.tokenizer(input_text, return_tensors="pt").to(self.device)
 
             with torch.no_grad():
                 outputs = self.model.generate(
                     **inputs,
-                    max_new_tokens=128,
+                    max_new_tokens=MAX_NEW_TOKENS,
                     temperature=0.1,
                     do_sample=False,
-                    repetition_penalty=1.3,
+                    repetition_penalty=REPETITION_PENALTY,
                 )
 
             # Decode only the new tokens
@@ -83,13 +127,112 @@ class SttPostProcessor:
             result = self.tokenizer.decode(new_tokens, skip_special_tokens=True).strip()
 
             # If LLM returns empty or garbage, keep original
-            if not result or len(result) > len(text) * 3:
-                return text
+            return _accept(text, result)
+        except Exception as e:
+            logger.warning("STT postprocess failed: %s", e)
+            return text
+
 
-            if result != text:
-                logger.info("STT postprocess: '%s' -> '%s'", text[:60], result[:60])
+class QuantizedPostProcessor:
+    """The same post-processor as a CTranslate2 int8 Generator.
+
+    The weights are converted offline by scripts/build_postprocess_model.py
+    (at image build time, see the Dockerfile): the conversion loads the hub
+    checkpoint at full precision, which a serving node should not have to
+    hold. Loading only memory-maps the converted directory, and fails if it
+    is missing. The system prompt is the same for every call, so it is
+    passed as a static prompt: CTranslate2 caches its KV state and each call
+    only runs the short user turn. ``max_mb`` caps the size of the converted
+    weights; a model over the cap is not loaded and transcripts pass through
+    unchanged.
+    """
+
+    def __init__(self, model_path: str, device: str = "cpu", compute_type: str = "int8",
+                 max_mb: int = 0, cpu_threads: int = 0):
+        self.model_path = Path(model_path)
+        self.device = device
+        self.compute_type = compute_type
+        self.max_mb = max_mb
+        self.cpu_threads = cpu_threads
+        self.prepared_hit = None
+        self.model = None
+        self.tokenizer = None
+        self._static_prompt: list[str] | None = None
+        self._static_text = ""
+
+    def load(self):
+        """Load the converted int8 model (FileNotFoundError if it was never built)."""
+        if not is_prepared(self.model_path):
+            raise FileNotFoundError(
+                "No CTranslate2 post-processor at %s: build it with "
+                "`python scripts/build_postprocess_model.py --output %s`, "
+                "or set POSTPROCESS_BACKEND=torch" % (self.model_path, self.model_path))
+        # Always built ahead of time: a warm load
+        self.prepared_hit = True
+        try:
+            import ctranslate2
+            from transformers import AutoTokenizer
+
+            size_mb = dir_size_mb(self.model_path)
+            if self.max_mb and size_mb > self.max_mb:
+                logger.warning("STT post-processor not loaded: %.0f MB of weights is over the %d MB cap",
+                               size_mb, self.max_mb)
+                return
+
+            self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_path))
+            self.model = ctranslate2.Generator(
+                str(self.model_path), device=self.device, compute_type=self.compute_type,
+                intra_threads=self.cpu_threads, inter_threads=1,
+            )
+            self._prepare_static_prompt()
+            logger.info("STT post-processor loaded on %s (CTranslate2 %s, %.0f MB)",
+                        self.device, self.compute_type, size_mb)
+        except Exception as e:
+            logger.warning("STT post-processor not available: %s", e)
+            self.model = None
+
+    def _prepare_static_prompt(self):
+        """Tokens of the system turn, if the chat template renders it as a prefix of every prompt."""
+        system_only = self.tokenizer.apply_chat_template(_messages("", 0)[:1], tokenize=False)
+        full = self.tokenizer.apply_chat_template(_messages("x", 0), tokenize=False, add_generation_prompt=True)
+        if full.startswith(system_only):
+            self._static_text = system_only
+            self._static_prompt = self._tokens(system_only)
+
+    def _tokens(self, text: str) -> list[str]:
+        return self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def unload(self):
+        self.model = None
+        self.tokenizer = None
+        self._static_prompt = None
+
+    def process(self, text: str, audio_duration: float = 0) -> str:
+        """Clean up STT output using local LLM."""
+        if not text.strip() or self.model is None:
+            return text
+
+        try:
+            input_text = self.tokenizer.apply_chat_template(
+                _messages(text, audio_duration), tokenize=False, add_generation_prompt=True
+            )
+            if self._static_prompt is not None:
+                prompt = self._tokens(input_text[len(self._static_text):])
+            else:
+                prompt = self._tokens(input_text)
+
+            results = self.model.generate_batch(
+                [prompt],
+                static_prompt=self._static_prompt,
+                max_length=MAX_NEW_TOKENS,
+                sampling_topk=1,
+                repetition_penalty=REPETITION_PENALTY,
+                include_prompt_in_result=False,
+                end_token=["<|im_end|>", "<|endoftext|>"],
+            )
+            result = self.tokenizer.decode(results[0].sequences_ids[0], skip_special_tokens=True).strip()
 
-            return result
+            return _accept(text, result)
         except Exception as e:
             logger.warning("STT postprocess failed: %s", e)
             return text
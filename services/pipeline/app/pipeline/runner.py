@@ -0,0 +1,229 @@
+"""In-process pipeline runner: orchestrator calls scheduled by priority."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .. import profiling
+from ..config import settings
+from ..metrics import metrics
+from .scheduler import OverloadedError, PipelineScheduler, Priority
+
+logger = logging.getLogger(__name__)
+
+SPECULATIONS = metrics.counter(
+    "pipeline_speculation_total", "Speculative STT runs started at a pause, by outcome (hit, discarded, failed).")
+SPECULATION_WASTED_SECONDS = metrics.counter(
+    "pipeline_speculation_wasted_seconds_total", "Compute spent on speculative STT/translation that was thrown away.")
+SPECULATION_SAVED = metrics.histogram(
+    "pipeline_speculation_saved_seconds", "End-to-end latency saved per utterance by speculative STT.")
+VOCABULARY_PREFETCHED = metrics.counter(
+    "pipeline_vocabulary_prefetched_total", "Lesson terms translated and synthesized ahead of time, by outcome.")
+
+
+@dataclass
+class _Speculation:
+    """STT (and translation) started when a pause began, awaiting the VAD's verdict."""
+    task: asyncio.Task
+    discarded: bool = False
+
+    def discard(self):
+        """Speech resumed: whatever the task computes is thrown away."""
+        self.discarded = True
+        SPECULATIONS.inc(outcome="discarded")
+        self.task.add_done_callback(_count_wasted)
+
+
+def _count_wasted(task: asyncio.Task):
+    if task.cancelled() or task.exception() is not None:
+        return
+    SPECULATION_WASTED_SECONDS.inc(task.result()[0]["work_ms"] / 1000)
+
+
+class LocalRunner:
+    """Runs the orchestrator in this process through a PipelineScheduler.
+
+    ``ConnectionHandler`` only talks to this interface, so the multi-process
+    ``WorkerPool`` can be swapped in without touching the handler.
+    """
+
+    def __init__(self, pipeline, scheduler: PipelineScheduler):
+        self.pipeline = pipeline
+        self.scheduler = scheduler
+        metrics.callback("pipeline_queue_depth", "Jobs waiting in the scheduler, by priority.",
+                         lambda: {(("priority", p.name.lower()),): scheduler.queue_depth(p) for p in Priority})
+        metrics.callback("pipeline_rejected_total", "Jobs refused by admission control.",
+                         lambda: scheduler.rejected, kind="counter")
+
+    def start(self):
+        self.pipeline.load_models()
+        # Executor slots from the thread budget (autotune may have changed them)
+        plan = self.pipeline.threads
+        self.scheduler.resize(plan.slots, plan.realtime_slots)
+        self.scheduler.start()
+
+    def shutdown(self):
+        self.scheduler.shutdown()
+
+    def close_session(self, session_id: str):
+        self.scheduler.cancel_session(session_id)
+
+    async def models(self) -> list[dict]:
+        return self.pipeline.models.report()
+
+    async def add_translations(self, entries: list[dict]) -> int:
+        """Seed the translation memory (and its file)."""
+        return await asyncio.to_thread(self.pipeline.add_translations, entries)
+
+    async def load(self) -> dict:
+        """Jobs waiting per priority, and how many the scheduler admits in total."""
+        return {
+            "queues": {p.name.lower(): self.scheduler.queue_depth(p) for p in Priority},
+            "max_queue": self.scheduler.max_queue,
+        }
+
+    async def metrics(self) -> list[tuple[dict, list]]:
+        """Metric families to expose, each with the extra labels to tag them with."""
+        return [({}, metrics.collect())]
+
+    async def profile(self, seconds: float, with_torch: bool = False) -> str:
+        """Folded stacks of this process over ``seconds`` (see app/profiling.py)."""
+        return await asyncio.to_thread(
+            profiling.capture, seconds, with_torch,
+            settings.profile_interval_ms / 1000, settings.profile_max_overhead,
+        )
+
+    async def _run(self, priority: Priority, session_id: str, fn: Callable, *args) -> tuple[Any, float, float]:
+        """``scheduler.run`` that also returns (queue wait ms, worker → loop handoff ms)."""
+        marks = {}
+
+        def _call():
+            marks["start"] = time.time()
+            try:
+                return fn(*args)
+            finally:
+                marks["end"] = time.time()
+
+        t_submit = time.time()
+        result = await self.scheduler.run(priority, session_id, _call)
+        return result, (marks["start"] - t_submit) * 1000, (time.time() - marks["end"]) * 1000
+
+    async def realtime(self, audio_data: bytes, session, on_vad_done: Callable[[], None] | None = None) -> dict | None:
+        """VAD at REALTIME priority, then the utterance (if one ended) by length."""
+        try:
+            vad_result, vad_queue_ms, handoff_ms = await self._run(
+                Priority.REALTIME, session.session_id,
+                self.pipeline.detect_speech, audio_data, session,
+            )
+        finally:
+            if on_vad_done is not None:
+                on_vad_done()
+
+        result = {
+            "speech_start": vad_result["speech_start"],
+            "speech_end": vad_result["speech_end"],
+        }
+
+        # Settle the session's speculation before the first await: the next chunk's VAD may run then
+        pending = None
+        if session.speculation is not None and (vad_result["speech_resumed"] or vad_result["speech_end"]):
+            pending, session.speculation = session.speculation, None
+            if vad_result["speech_resumed"]:
+                # Transcribed a prefix of what turned out to be a longer utterance
+                pending.discard()
+                pending = None
+        if vad_result["pause_audio"]:
+            self._speculate(vad_result["pause_audio"], session)
+
+        # Only run full pipeline when speech segment is complete
+        speech_audio = vad_result["speech_audio"]
+        if vad_result["speech_end"] and speech_audio:
+            t_end = time.time()
+            speculative = await self._take_speculation(pending)
+            # float32 samples → 4 bytes each
+            priority = self.pipeline.utterance_priority(len(speech_audio) // 4)
+            utterance, queue_ms, utterance_handoff_ms = await self._run(
+                priority, session.session_id,
+                self.pipeline.process_utterance, speech_audio, session, vad_result["vad_ms"], "", speculative,
+            )
+            result.update(utterance)
+            result["timings"].update(
+                vad_queue_ms=vad_queue_ms, queue_ms=queue_ms,
+                handoff_ms=handoff_ms + utterance_handoff_ms,
+            )
+            if speculative is not None:
+                # The speculative stages ran while the VAD waited out the silence;
+                # only the part still running when the utterance ended was on the critical path
+                saved_ms = max(speculative["work_ms"] - max(speculative["done_at"] - t_end, 0) * 1000, 0)
+                result["timings"]["speculation_saved_ms"] = saved_ms
+                SPECULATION_SAVED.observe(saved_ms / 1000)
+
+        if not result["speech_start"] and not result["speech_end"]:
+            return None
+        return result
+
+    def _speculate(self, speech_audio: bytes, session):
+        """Start STT on the utterance so far, at the priority the finished utterance would get."""
+        if session.speculation is not None:
+            session.speculation.discard()
+        priority = self.pipeline.utterance_priority(len(speech_audio) // 4)
+        speculation = None
+
+        def _discarded() -> bool:
+            return speculation.discarded
+
+        speculation = session.speculation = _Speculation(asyncio.create_task(self._run(
+            priority, session.session_id, self.pipeline.speculate, speech_audio, session, _discarded,
+        )))
+
+    async def _take_speculation(self, speculation: _Speculation | None) -> dict | None:
+        """The speculation's result for the utterance that just ended (None if none or it failed)."""
+        if speculation is None:
+            return None
+        try:
+            speculative, _, _ = await speculation.task
+        except Exception as e:
+            SPECULATIONS.inc(outcome="failed")
+            logger.warning("Speculative STT failed, transcribing the utterance instead: %s", e)
+            return None
+        SPECULATIONS.inc(outcome="hit")
+        return speculative
+
+    async def prefetch(self, session, terms: list[str]) -> int:
+        """Translate and synthesize lesson terms into the caches at BULK priority; returns how many were done.
+
+        One job per term, awaited in turn: the session holds a single queue
+        slot and realtime work goes ahead between terms. Stops early if the
+        scheduler refuses a job (the node is busy; the terms are only a head start).
+        """
+        source_lang, target_lang, voice = session.source_lang, session.target_lang, session.voice
+        done = 0
+        for i, term in enumerate(terms):
+            try:
+                await self._run(Priority.BULK, session.session_id,
+                                self.pipeline.prefetch, term, source_lang, target_lang, voice)
+            except OverloadedError as e:
+                VOCABULARY_PREFETCHED.inc(len(terms) - i, outcome="skipped")
+                logger.info("Vocabulary prefetch for %s stopped after %d/%d terms: %s",
+                            session.session_id, done, len(terms), e)
+                break
+            except Exception as e:
+                VOCABULARY_PREFETCHED.inc(outcome="failed")
+                logger.warning("Vocabulary prefetch of %r failed: %s", term, e)
+                continue
+            VOCABULARY_PREFETCHED.inc(outcome="done")
+            done += 1
+        return done
+
+    async def segment(self, audio_data: bytes, session) -> dict:
+        """Push-to-talk segment, prioritized by length."""
+        # PCM int16 (bytes or an int16 view) → 2 bytes per sample
+        priority = self.pipeline.utterance_priority(memoryview(audio_data).nbytes // 2)
+        result, queue_ms, handoff_ms = await self._run(
+            priority, session.session_id,
+            self.pipeline.process_segment, audio_data, session,
+        )
+        result["timings"].update(queue_ms=queue_ms, handoff_ms=handoff_ms)
+        return result
@@ -0,0 +1,225 @@
+"""Priority scheduler with per-session fairness and admission control.
+
+Replaces the default executor: cheap latency-critical work (VAD, short
+utterances) always goes ahead of heavy work, sessions are served round-robin
+within a priority, and work beyond the configured queue limits is refused
+with ``OverloadedError`` instead of waiting without bound.
+"""
+
+import asyncio
+import enum
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    REALTIME = 0     # VAD on streaming chunks
+    INTERACTIVE = 1  # short utterances
+    BULK = 2         # long utterances, PTT segments, background work
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a job is refused because the queues are full."""
+
+
+@dataclass
+class _Job:
+    fn: Callable
+    args: tuple
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+    priority: Priority
+    session_id: str
+
+
+@dataclass
+class _Lane:
+    """Per-priority queue: session_id → FIFO of jobs, served round-robin."""
+    sessions: "OrderedDict[str, deque[_Job]]" = field(default_factory=OrderedDict)
+    size: int = 0
+
+
+class PipelineScheduler:
+    def __init__(
+        self,
+        workers: int = 4,
+        realtime_workers: int = 1,
+        max_queue: int = 64,
+        max_session_queue: int = 8,
+    ):
+        self._threads: list[threading.Thread] = []
+        self.resize(workers, realtime_workers)
+        self.max_queue = max_queue
+        self.max_session_queue = max_session_queue
+        self._lanes = {p: _Lane() for p in Priority}
+        self._cond = threading.Condition()
+        self._running = False
+        self.rejected = 0
+
+    def resize(self, workers: int, realtime_workers: int):
+        """Set the number of worker threads; only before ``start``."""
+        if self._threads:
+            raise RuntimeError("scheduler already started")
+        self.workers = max(workers, 1)
+        self.realtime_workers = max(min(realtime_workers, self.workers - 1), 0)
+
+    def start(self):
+        """Start worker threads. The first ``realtime_workers`` only take REALTIME jobs."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.workers):
+            max_priority = Priority.REALTIME if i < self.realtime_workers else Priority.BULK
+            t = threading.Thread(
+                target=self._worker, args=(max_priority,),
+                name=f"pipeline-{max_priority.name.lower()}-{i}", daemon=True,
+            )
+            t.start()
+            self._threads.append(t)
+        logger.info(
+            "Scheduler started: %d workers (%d reserved for realtime), max_queue=%d, max_session_queue=%d",
+            self.workers, self.realtime_workers, self.max_queue, self.max_session_queue,
+        )
+
+    def shutdown(self):
+        """Stop workers; queued jobs are failed with OverloadedError."""
+        with self._cond:
+            self._running = False
+            pending = []
+            for lane in self._lanes.values():
+                for jobs in lane.sessions.values():
+                    pending.extend(jobs)
+                lane.sessions.clear()
+                lane.size = 0
+            self._cond.notify_all()
+        for job in pending:
+            self._resolve(job, error=OverloadedError("scheduler shut down"))
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads.clear()
+
+    def queue_depth(self, priority: Priority | None = None) -> int:
+        if priority is not None:
+            return self._lanes[priority].size
+        return sum(lane.size for lane in self._lanes.values())
+
+    def session_depth(self, session_id: str) -> int:
+        with self._cond:
+            return sum(len(lane.sessions.get(session_id, ())) for lane in self._lanes.values())
+
+    def cancel_session(self, session_id: str) -> int:
+        """Drop a closed session's queued (not yet started) jobs.
+
+        Must be called from the event loop thread that submitted them.
+        """
+        with self._cond:
+            dropped = []
+            for lane in self._lanes.values():
+                jobs = lane.sessions.pop(session_id, None)
+                if jobs:
+                    lane.size -= len(jobs)
+                    dropped.extend(jobs)
+        for job in dropped:
+            job.future.cancel()
+        return len(dropped)
+
+    async def run(self, priority: Priority, session_id: str, fn: Callable, *args) -> Any:
+        """Queue ``fn(*args)`` and await its result.
+
+        Raises OverloadedError immediately if the global or per-session queue
+        limit is reached.
+        """
+        loop = asyncio.get_running_loop()
+        job = _Job(fn, args, loop.create_future(), loop, Priority(priority), session_id)
+        with self._cond:
+            if not self._running:
+                raise OverloadedError("scheduler not running")
+            if self.queue_depth() >= self.max_queue:
+                self.rejected += 1
+                raise OverloadedError("pipeline queue full (%d jobs)" % self.max_queue)
+            depth = sum(len(lane.sessions.get(session_id, ())) for lane in self._lanes.values())
+            if depth >= self.max_session_queue:
+                self.rejected += 1
+                raise OverloadedError("session queue full (%d jobs)" % self.max_session_queue)
+            lane = self._lanes[job.priority]
+            lane.sessions.setdefault(session_id, deque()).append(job)
+            lane.size += 1
+            # Wake everyone: a realtime-only worker cannot take a BULK job
+            self._cond.notify_all()
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # Caller gave up (e.g. a prefetch replaced by a newer one): free its slot now
+            self._discard(job)
+            raise
+
+    def _discard(self, job: _Job):
+        """Remove a job that has not started from its lane."""
+        with self._cond:
+            lane = self._lanes[job.priority]
+            jobs = lane.sessions.get(job.session_id)
+            if not jobs:
+                return
+            for i, queued in enumerate(jobs):
+                if queued is job:
+                    del jobs[i]
+                    lane.size -= 1
+                    if not jobs:
+                        del lane.sessions[job.session_id]
+                    return
+
+    def _next_job(self, max_priority: Priority) -> _Job | None:
+        """Pop the next job: highest priority first, round-robin across sessions."""
+        for priority in Priority:
+            if priority > max_priority:
+                break
+            lane = self._lanes[priority]
+            if not lane.sessions:
+                continue
+            session_id, jobs = next(iter(lane.sessions.items()))
+            job = jobs.popleft()
+            lane.size -= 1
+            # Rotate this session to the back so other sessions get a turn
+            del lane.sessions[session_id]
+            if jobs:
+                lane.sessions[session_id] = jobs
+            return job
+        return None
+
+    def _worker(self, max_priority: Priority):
+        while True:
+            with self._cond:
+                job = self._next_job(max_priority)
+                while job is None:
+                    if not self._running:
+                        return
+                    self._cond.wait()
+                    job = self._next_job(max_priority)
+            if job.future.cancelled():
+                continue  # cancelled after the pop, before it started
+            try:
+                result = job.fn(*job.args)
+            except BaseException as e:
+                self._resolve(job, error=e)
+            else:
+                self._resolve(job, result=result)
+
+    @staticmethod
+    def _resolve(job: _Job, result: Any = None, error: BaseException | None = None):
+        def _set():
+            if job.future.done():
+                return
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+        try:
+            job.loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            pass  # event loop already closed
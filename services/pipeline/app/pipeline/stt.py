@@ -3,23 +3,30 @@
 import io
 import logging
 import numpy as np
-import soundfile as sf
 
 logger = logging.getLogger(__name__)
 
 
 class SttProcessor:
-    def __init__(self, api_key: str = "", device: str = "cuda", model_size: str = "large-v3"):
+    def __init__(self, api_key: str = "", device: str = "cuda", model_size: str = "large-v3",
+                 cpu_threads: int = 0, num_workers: int = 1):
         self.api_key = api_key
         self.device = device
         self.model_size = model_size
+        # CTranslate2: threads per transcription (0 = its default) and concurrent transcriptions
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
         self.client = None
         self.model = None  # local whisper fallback
+        self.prepared_hit = None
 
     def load(self):
         """Load ElevenLabs client or fall back to local Whisper."""
+        if self.client is not None:
+            return
         if self.api_key:
             from elevenlabs.client import ElevenLabs
+            import soundfile as sf
             self.client = ElevenLabs(api_key=self.api_key)
             # Test connection with a tiny silent audio
             try:
@@ -48,12 +55,42 @@ class SttProcessor:
         """Load local faster-whisper as fallback."""
         from faster_whisper import WhisperModel
         compute_type = "float16" if self.device == "cuda" else "int8"
-        self.model = WhisperModel(
-            self.model_size,
-            device=self.device,
-            compute_type=compute_type,
-        )
-        logger.info("STT: faster-whisper %s loaded on %s", self.model_size, self.device)
+        # The hub snapshot is already converted CTranslate2 — on a warm cache skip
+        # the hub round-trips, and only download when it is really missing
+        try:
+            self.model = WhisperModel(
+                self.model_size,
+                device=self.device,
+                compute_type=compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers,
+                local_files_only=True,
+            )
+            self.prepared_hit = True
+        except Exception:
+            self.model = WhisperModel(
+                self.model_size,
+                device=self.device,
+                compute_type=compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers,
+            )
+            self.prepared_hit = False
+        logger.info("STT: faster-whisper %s loaded on %s (%d threads x %d workers)",
+                    self.model_size, self.device, self.cpu_threads, self.num_workers)
+
+    def unload(self):
+        """Drop the local Whisper model (the API client is kept)."""
+        self.model = None
+
+    def set_threads(self, cpu_threads: int, num_workers: int):
+        """Change the CTranslate2 thread split; a loaded local model is reloaded with it."""
+        if (cpu_threads, num_workers) == (self.cpu_threads, self.num_workers):
+            return
+        self.cpu_threads, self.num_workers = cpu_threads, num_workers
+        if self.model is not None:
+            self.model = None
+            self._load_whisper()
 
     def transcribe(self, audio: np.ndarray, language: str = "th", sample_rate: int = 16000) -> str:
         duration = len(audio) / sample_rate
@@ -77,6 +114,8 @@ class SttProcessor:
     def _transcribe_elevenlabs(self, audio: np.ndarray, language: str, sample_rate: int, duration: float) -> str:
         """Transcribe using ElevenLabs Scribe v2 API."""
         try:
+            import soundfile as sf
+
             # Convert numpy to WAV in memory
             buf = io.BytesIO()
             sf.write(buf, audio, sample_rate, format='WAV', subtype='PCM_16')
@@ -166,19 +205,27 @@ class SttProcessor:
 
         words = words[:200]
 
+        # A phrase of n words said 3 times in a row is a run of 2n positions
+        # where each word equals the one n words later; the first such run,
+        # for the smallest n, is the first repetition.
         for n in range(1, 7):
             if len(words) < n * 3:
                 continue
-            for i in range(len(words) - n):
-                phrase = words[i:i + n]
-                repeats = 1
-                j = i + n
-                while j + n <= len(words) and words[j:j + n] == phrase:
-                    repeats += 1
-                    j += n
-                if repeats >= 3:
+            run = 0
+            for k in range(len(words) - n):
+                if words[k] != words[k + n]:
+                    run = 0
+                    continue
+                run += 1
+                if run == 2 * n:
+                    i = k - run + 1
+                    repeats = 3
+                    j = i + 3 * n
+                    while j + n <= len(words) and words[j:j + n] == words[i:i + n]:
+                        repeats += 1
+                        j += n
                     logger.warning("STT: repetition detected '%s' x%d, keeping first occurrence",
-                                   " ".join(phrase), repeats)
+                                   " ".join(words[i:i + n]), repeats)
                     return " ".join(words[:i + n])
 
         return " ".join(words)
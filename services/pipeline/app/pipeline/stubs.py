@@ -0,0 +1,164 @@
+"""Deterministic CPU-only stand-ins for every pipeline processor.
+
+Selected with ``PIPELINE_BACKEND=stub``. Outputs depend only on the input,
+and the compute time each stage would take is simulated with a sleep of a
+fixed cost model scaled by ``STUB_TIME_SCALE`` (0 = no delay). That makes
+benchmark and load-test results reproducible on a laptop with no GPU, no
+model downloads and no network.
+"""
+
+import hashlib
+import logging
+import time
+
+import numpy as np
+
+from .tts import TtsProcessor
+from .vad import VadProcessor
+
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "วันนี้ เรา จะ เรียน เรื่อง ดวงจันทร์ ดาวเคราะห์ น้ำ ต้นไม้ สัตว์ "
+    "ครู นักเรียน หนังสือ คำถาม ตอบ ทดลอง สังเกต วิทยาศาสตร์ ธรรมชาติ"
+).split()
+
+
+def _simulate(seconds: float, scale: float):
+    if scale > 0 and seconds > 0:
+        time.sleep(seconds * scale)
+
+
+def _digest(data: bytes | str) -> int:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class StubDenoiseProcessor:
+    def __init__(self, time_scale: float = 1.0):
+        self.time_scale = time_scale
+        self.model = None
+
+    def load(self):
+        self.model = "stub"
+
+    def unload(self):
+        self.model = None
+
+    def process(self, audio: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
+        _simulate(0.002 + 0.01 * len(audio) / sample_rate, self.time_scale)
+        return audio
+
+
+class StubVadProcessor(VadProcessor):
+    """Energy-threshold VAD driving the real VadProcessor state machine."""
+
+    def __init__(self, threshold: float = 0.5, time_scale: float = 1.0):
+        super().__init__(threshold=threshold)
+        self.time_scale = time_scale
+
+    def load(self):
+        logger.info("Stub VAD loaded (energy threshold)")
+
+    def _window_confidence(self, chunk: np.ndarray, sample_rate: int) -> float:
+        _simulate(0.0001, self.time_scale)
+        rms = float(np.sqrt(np.mean(chunk * chunk)))
+        # rms 0.02 (quiet speech) maps to the default 0.5 threshold
+        return min(rms / 0.04, 1.0)
+
+
+class StubSttProcessor:
+    def __init__(self, time_scale: float = 1.0):
+        self.time_scale = time_scale
+        self.model = None
+        self.client = None
+        self.prepared_hit = None
+        self.cpu_threads = 0
+        self.num_workers = 1
+
+    def load(self):
+        self.model = "stub"
+
+    def unload(self):
+        self.model = None
+
+    def set_threads(self, cpu_threads: int, num_workers: int):
+        self.cpu_threads, self.num_workers = cpu_threads, num_workers
+
+    def transcribe(self, audio: np.ndarray, language: str = "th", sample_rate: int = 16000) -> str:
+        duration = len(audio) / sample_rate
+        if duration < 0.3:
+            return ""
+        # Whisper-like cost: fixed decoder overhead + encoder time per audio second
+        _simulate(0.08 + 0.05 * duration, self.time_scale)
+        seed = _digest(np.round(audio[::160], 2).tobytes())
+        n_words = max(1, int(duration * 2.5))
+        return " ".join(_WORDS[(seed >> (i % 48)) % len(_WORDS)] for i in range(n_words))
+
+
+class StubTranslateProcessor:
+    def __init__(self, time_scale: float = 1.0):
+        self.time_scale = time_scale
+        self.model = None
+        self.prepared_hit = None
+
+    def load(self):
+        self.model = "stub"
+
+    def unload(self):
+        self.model = None
+
+    def translate(self, text: str, source_lang: str = "th", target_lang: str = "en") -> str:
+        if not text.strip():
+            return ""
+        if source_lang == target_lang:
+            return text
+        # Beam search cost grows with output length
+        _simulate(0.03 + 0.002 * len(text), self.time_scale)
+        return " ".join("w%04x" % (_digest(word) & 0xFFFF) for word in text.split())
+
+
+class StubTtsProcessor(TtsProcessor):
+    """Kokoro-shaped TTS that renders a deterministic tone per character."""
+
+    def __init__(self, time_scale: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.time_scale = time_scale
+
+    def load(self):
+        self._loaded = True
+        logger.info("Stub TTS loaded")
+
+    def load_language(self, lang_code: str):
+        self._kokoro_pipelines[lang_code] = "stub"
+
+    def synthesize(self, text: str, voice: str = "adult_female", language: str = "en") -> bytes:
+        if not text.strip():
+            return b""
+        seconds = 0.06 * len(text)
+        _simulate(0.02 + 0.1 * seconds, self.time_scale)
+        t = np.arange(int(self.sample_rate * seconds), dtype=np.float32) / self.sample_rate
+        freq = 180.0 + (_digest(text) % 200)
+        audio = 0.2 * np.sin(2 * np.pi * freq * t)
+        return (audio * 32767).astype(np.int16).tobytes()
+
+
+class StubPostProcessor:
+    def __init__(self, time_scale: float = 1.0):
+        self.time_scale = time_scale
+        self.model = None
+        self.prepared_hit = None
+
+    def load(self):
+        self.model = "stub"
+
+    def unload(self):
+        self.model = None
+
+    def process(self, text: str, audio_duration: float = 0) -> str:
+        if not text.strip():
+            return text
+        # LLM decode: roughly one token per character
+        _simulate(0.05 + 0.004 * len(text), self.time_scale)
+        return text
@@ -0,0 +1,237 @@
+"""CPU thread budget: how many cores each stage and executor slot may use.
+
+Every library picks its own thread count by default: torch (VAD, translate,
+post-process, Kokoro, DeepFilterNet) sizes its intra-op pool to all cores,
+and CTranslate2 (faster-whisper) does the same. With several scheduler
+workers running stages at once, a 32-core node ends up with hundreds of
+spinning threads. The plan here splits the process's cores evenly across
+the BULK/INTERACTIVE executor slots. A stage running in a slot then gets
+that slot's cores, whatever the library. The realtime slots (VAD) get one
+core each.
+
+torch.set_num_threads is process-wide, so all torch stages share one
+per-op thread count. CTranslate2 takes ``cpu_threads`` (threads per
+transcription) and ``num_workers`` (concurrent transcriptions) when the
+model is constructed.
+
+``autotune`` benchmarks a few slot/thread splits on the loaded models and
+keeps the fastest. The result is cached next to the prepared artifacts.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_AUTOTUNE_CACHE = "threads.json"
+# Thread-pool sizes read once, when the libraries load
+_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+@dataclass(frozen=True)
+class ThreadPlan:
+    cores: int           # cores this process may use
+    slots: int           # scheduler workers (executor slots), realtime ones included
+    realtime_slots: int  # slots that only run VAD
+    torch_threads: int   # torch intra-op threads per op (process-wide)
+    stt_threads: int     # CTranslate2 cpu_threads per transcription
+    stt_workers: int     # CTranslate2 num_workers: transcriptions that can run at once
+
+    @property
+    def bulk_slots(self) -> int:
+        return self.slots - self.realtime_slots
+
+    def summary(self) -> str:
+        return "%d cores: %d slots (%d realtime), torch %d threads, whisper %d threads x %d workers" % (
+            self.cores, self.slots, self.realtime_slots, self.torch_threads, self.stt_threads, self.stt_workers)
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects taskset/cgroup CPU affinity)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def plan_threads(slots: int | None = None, cores: int | None = None) -> ThreadPlan:
+    """The thread plan from Settings; ``slots``/``cores`` override them (autotune)."""
+    if cores is None:
+        cores = settings.cpu_cores or available_cores()
+        if settings.pipeline_workers > 0 and not settings.cpu_cores:
+            # Worker processes share the node
+            cores = max(cores // settings.pipeline_workers, 1)
+    slots = max(slots or settings.scheduler_workers, 1)
+    realtime = max(min(settings.scheduler_realtime_workers, slots - 1), 0)
+    bulk = slots - realtime
+    per_slot = max((cores - realtime) // bulk, 1)
+    return ThreadPlan(
+        cores=cores,
+        slots=slots,
+        realtime_slots=realtime,
+        torch_threads=settings.torch_threads or per_slot,
+        stt_threads=settings.stt_cpu_threads or per_slot,
+        stt_workers=bulk,
+    )
+
+
+def configure_env(plan: ThreadPlan):
+    """Size OpenMP/MKL pools before torch or CTranslate2 is first imported (explicit env wins)."""
+    for name in _ENV_VARS:
+        os.environ.setdefault(name, str(plan.torch_threads))
+
+
+def apply_torch(plan: ThreadPlan):
+    """Set torch's process-wide thread counts.
+
+    If torch is not imported yet, the OMP_NUM_THREADS set by configure_env
+    sizes its pool when it is.
+    """
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    torch.set_num_threads(plan.torch_threads)
+    try:
+        # Concurrency comes from the executor slots, not torch's inter-op pool
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # only settable once, before any inter-op work
+    logger.info("[THREADS] %s", plan.summary())
+
+
+def _cache_key(pipeline, base: ThreadPlan) -> str:
+    return "%s|%s|%s|%s|%d cores|%d realtime" % (pipeline.backend, pipeline.device, settings.whisper_model,
+                                                 settings.translate_model, base.cores, base.realtime_slots)
+
+
+def _load_cached(pipeline, base: ThreadPlan) -> ThreadPlan | None:
+    if not settings.prepared_cache_dir:
+        return None
+    try:
+        cached = json.loads((Path(settings.prepared_cache_dir) / _AUTOTUNE_CACHE).read_text())
+        return ThreadPlan(**cached[_cache_key(pipeline, base)])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_cached(pipeline, base: ThreadPlan, plan: ThreadPlan):
+    if not settings.prepared_cache_dir:
+        return
+    path = Path(settings.prepared_cache_dir) / _AUTOTUNE_CACHE
+    try:
+        cached = json.loads(path.read_text())
+    except (OSError, ValueError):
+        cached = {}
+    cached[_cache_key(pipeline, base)] = asdict(plan)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(cached, indent=2))
+    except OSError as e:
+        logger.debug("Could not write thread autotune cache: %s", e)
+
+
+def candidate_plans(base: ThreadPlan) -> list[ThreadPlan]:
+    """The configured plan plus 1, 2, 4, ... bulk slots, up to one per core."""
+    slots = {base.slots}
+    bulk = 1
+    while bulk <= base.cores - base.realtime_slots:
+        slots.add(bulk + base.realtime_slots)
+        bulk *= 2
+    return [plan_threads(slots=s, cores=base.cores) for s in sorted(slots)]
+
+
+def _benchmark_audio(pipeline) -> np.ndarray:
+    """A few seconds of speech for the benchmark: TTS output, resampled to 16kHz."""
+    from ..ws.codec import StreamResampler
+
+    text = "Today we will learn about the moon and the planets in the solar system."
+    with pipeline.models.use("tts"):
+        pcm = pipeline.tts.synthesize(text, voice="adult_female", language="en")
+    audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    audio = StreamResampler(pipeline.tts.sample_rate, settings.sample_rate).process(audio)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+@contextmanager
+def _uncached(pipeline):
+    """Detach the translation memory and the TTS cache for the benchmark.
+
+    Every round replays the same clip, so after the first one every
+    translation and its audio would be cache hits and the models would
+    never run.
+    """
+    memory, tts_cache = pipeline.memory, pipeline.tts_cache
+    pipeline.memory = pipeline.tts_cache = None
+    try:
+        yield
+    finally:
+        pipeline.memory, pipeline.tts_cache = memory, tts_cache
+
+
+def _measure(pipeline, plan: ThreadPlan, pcm: bytes, seconds: float) -> tuple[float, float]:
+    """Utterances/s and mean latency (ms) with every bulk slot busy for ``seconds``."""
+    from ..ws.session import Session
+
+    apply_torch(plan)
+    pipeline.apply_stt_threads(plan)
+    pipeline.process_segment(pcm, Session(source_lang="en", target_lang="th"))  # warm-up
+
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def _slot():
+        session = Session(source_lang="en", target_lang="th")
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            pipeline.process_segment(pcm, session)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    t_start = time.perf_counter()
+    threads = [threading.Thread(target=_slot, name="autotune-%d" % i) for i in range(plan.bulk_slots)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t_start
+    return len(latencies) / elapsed, sum(latencies) / max(len(latencies), 1) * 1000
+
+
+def autotune(pipeline, base: ThreadPlan, seconds: float = 10.0) -> ThreadPlan:
+    """Pick the candidate plan with the highest utterance throughput on the loaded models.
+
+    Each candidate runs for ``seconds`` with all of its bulk slots busy. A
+    plan with more slots has to beat the best so far by 5%, because more
+    slots also means each utterance takes longer.
+    """
+    cached = _load_cached(pipeline, base)
+    if cached is not None:
+        logger.info("[THREADS] Autotune: using cached plan")
+        return cached
+
+    pcm = _benchmark_audio(pipeline).tobytes()
+    best, best_rate = base, 0.0
+    lines = ["═══ THREAD AUTOTUNE ═══"]
+    for plan in candidate_plans(base):
+        with _uncached(pipeline):
+            rate, latency_ms = _measure(pipeline, plan, pcm, seconds)
+        lines.append("  %2d slots x %2d threads: %6.2f utt/s, %6.0fms/utt" % (
+            plan.bulk_slots, plan.torch_threads, rate, latency_ms))
+        if rate > best_rate * (1.05 if plan.slots > best.slots else 1.0):
+            best, best_rate = plan, rate
+    lines.append("  → %s" % best.summary())
+    logger.info("\n".join(lines))
+    _save_cached(pipeline, base, best)
+    return best
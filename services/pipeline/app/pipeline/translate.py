@@ -2,6 +2,8 @@
 
 import logging
 
+from ..models.artifacts import is_prepared, load_mapped, prepared_path, save_mapped, save_prepared_async
+
 logger = logging.getLogger(__name__)
 
 # NLLB-200 uses BCP-47 style language codes
@@ -24,24 +26,49 @@ _LANG_TO_NLLB = {
 
 
 class TranslateProcessor:
-    def __init__(self, model_name: str = "facebook/nllb-200-distilled-600M", device: str = "cuda"):
+    def __init__(self, model_name: str = "facebook/nllb-200-distilled-600M", device: str = "cuda",
+                 prepared_dir: str = ""):
         self.model_name = model_name
         self.device = device
+        self.prepared_dir = prepared_dir
+        self.prepared_hit = None
         self.model = None
         self.tokenizer = None
 
     def load(self):
-        """Load NLLB-200 model."""
+        """Load NLLB-200 model (from the prepared-artifact cache when warm)."""
         from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
         import torch
 
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(
-            self.model_name,
-            torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-        ).to(self.device)
+        dtype = torch.float16 if self.device == "cuda" else torch.float32
+        prepared = prepared_path(self.prepared_dir, self.model_name, "%s-mapped" % str(dtype).removeprefix("torch."))
+        self.prepared_hit = is_prepared(prepared)
+
+        if self.prepared_hit:
+            self.tokenizer = AutoTokenizer.from_pretrained(str(prepared))
+            # Mapped weights: the pipeline workers on this node share one copy
+            self.model = load_mapped(AutoModelForSeq2SeqLM, prepared, dtype).to(self.device)
+        else:
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(
+                self.model_name,
+                torch_dtype=dtype,
+                # No temporary full copy while converting; the result is private
+                # to this process until the next (warm) start maps the prepared file
+                low_cpu_mem_usage=True,
+            ).to(self.device)
         self.model.eval()
-        logger.info("NLLB-200 %s loaded on %s", self.model_name, self.device)
+        logger.info("NLLB-200 %s loaded on %s (%s)", self.model_name, self.device,
+                    "prepared cache, mapped" if self.prepared_hit else "hub checkpoint")
+
+        if not self.prepared_hit:
+            model, tokenizer = self.model, self.tokenizer
+            save_prepared_async(prepared, lambda path: save_mapped(model, tokenizer, path),
+                                {"model": self.model_name, "dtype": str(dtype)})
+
+    def unload(self):
+        self.model = None
+        self.tokenizer = None
 
     def translate(self, text: str, source_lang: str = "th", target_lang: str = "en") -> str:
         """Translate between any supported language pair."""
@@ -0,0 +1,224 @@
+"""Translation memory in front of NLLB: known sentences skip the model.
+
+Three sources, checked in this order for each (source, target) language pair:
+
+  exact   seeded translations (lesson material, verified corrections) of the
+          same sentence after normalization (case, spacing, end punctuation)
+  cache   the model's own recent outputs (LRU), same normalization
+  fuzzy   the closest seeded sentence by character-trigram Dice similarity,
+          if it reaches ``min_score`` and has the same digits (so "exercise 3"
+          never comes back as "exercise 4")
+
+Character n-grams (spaces ignored) suit Thai, which has no spaces between words. The index
+maps each trigram to the seeded entries containing it. A lookup adds up the
+query's posting lists with one numpy bincount, then scores every entry that
+shares a trigram at once. Model outputs only go to the exact-match cache,
+never the fuzzy index, so one machine translation is not reused for
+different sentences.
+
+Seed file (``settings.tm_path``): JSON lines of
+{"source", "target", "source_lang", "target_lang"}. scripts/build_tm.py
+builds one from lesson pairs and past transcript logs. POST /admin/tm adds
+entries at runtime and appends them to the file.
+"""
+
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from ..metrics import STAGE_LATENCY, metrics
+
+logger = logging.getLogger(__name__)
+
+TM_LOOKUPS = metrics.counter(
+    "pipeline_tm_lookups_total", "Translation memory lookups, by result (exact, cache, fuzzy, miss).")
+
+NGRAM = 3
+_EDGE_PUNCT = " .,!?;:…\"'“”‘’()[]。、？！"
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize(text: str) -> str:
+    """What two sentences must share to count as the same: case, spacing and end punctuation aside."""
+    return " ".join(text.casefold().split()).strip(_EDGE_PUNCT)
+
+
+_FIELDS = ("source", "target", "source_lang", "target_lang")
+
+
+def _valid(entry) -> bool:
+    return isinstance(entry, dict) and all(isinstance(entry.get(field), str) for field in _FIELDS)
+
+
+def _grams(norm: str) -> set[str]:
+    # Without spaces: Thai transcripts put them between phrases inconsistently
+    padded = " %s " % norm.replace(" ", "")
+    return {padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1))}
+
+
+class _Index:
+    """Seeded entries of one language pair: exact lookup plus the trigram index."""
+
+    def __init__(self):
+        self.sources: list[str] = []
+        self.targets: list[str] = []
+        self.digits: list[tuple[str, ...]] = []
+        self.exact: dict[str, int] = {}
+        self.postings: dict[str, list[int]] = {}
+        self._sizes: list[int] = []
+        # numpy copies of the lists above, rebuilt lazily after adds
+        self._arrays: dict[str, np.ndarray] = {}
+        self._size_array = np.zeros(0, dtype=np.float32)
+
+    def add(self, norm: str, target: str):
+        entry = self.exact.get(norm)
+        if entry is not None:
+            self.targets[entry] = target
+            return
+        entry = len(self.sources)
+        self.sources.append(norm)
+        self.targets.append(target)
+        self.digits.append(tuple(_DIGITS.findall(norm)))
+        self.exact[norm] = entry
+        grams = _grams(norm)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(entry)
+        self._sizes.append(len(grams))
+
+    def _posting(self, gram: str) -> np.ndarray | None:
+        entries = self.postings.get(gram)
+        if entries is None:
+            return None
+        array = self._arrays.get(gram)
+        if array is None or len(array) != len(entries):
+            array = self._arrays[gram] = np.asarray(entries, dtype=np.int32)
+        return array
+
+    def candidates(self, grams: set[str]) -> tuple[list[np.ndarray], np.ndarray]:
+        """Posting arrays of ``grams`` and the size of every entry, as of now.
+
+        Adds replace these arrays rather than change them, so the caller can
+        score them after releasing the memory's lock.
+        """
+        lists = [p for p in (self._posting(g) for g in grams) if p is not None]
+        if len(self._size_array) != len(self._sizes):
+            self._size_array = np.asarray(self._sizes, dtype=np.float32)
+        return lists, self._size_array
+
+    @staticmethod
+    def search(grams: set[str], lists: list[np.ndarray], sizes: np.ndarray) -> tuple[float, int]:
+        """(Dice similarity, entry) of the closest entry; (0, -1) if none shares a trigram."""
+        if not lists:
+            return 0.0, -1
+        shared = np.bincount(np.concatenate(lists), minlength=len(sizes))
+        scores = 2 * shared / (len(grams) + sizes)
+        best = int(np.argmax(scores))
+        return float(scores[best]), best
+
+
+class TranslationMemory:
+    def __init__(self, min_score: float = 0.9, cache_size: int = 10000):
+        self.min_score = min_score
+        self.cache_size = cache_size
+        self._indexes: dict[tuple[str, str], _Index] = {}
+        self._cache: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(index.sources) for index in self._indexes.values())
+
+    def add(self, source: str, target: str, source_lang: str, target_lang: str):
+        """Seed one verified translation (exact and fuzzy matches)."""
+        norm = normalize(source)
+        if not norm or not target.strip():
+            return
+        with self._lock:
+            self._indexes.setdefault((source_lang, target_lang), _Index()).add(norm, target)
+
+    def add_many(self, entries: list[dict]) -> int:
+        """Seed {"source", "target", "source_lang", "target_lang"} dicts; returns how many were valid."""
+        added = 0
+        for entry in entries:
+            if _valid(entry):
+                self.add(*(entry[field] for field in _FIELDS))
+                added += 1
+        return added
+
+    def load(self, path: str | Path) -> int:
+        """Seed from a JSON-lines file (missing file = nothing to seed)."""
+        path = Path(path)
+        if not path.exists():
+            return 0
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        added = self.add_many(entries)
+        logger.info("[TM] %d entries from %s", added, path)
+        return added
+
+    def remember(self, source: str, target: str, source_lang: str, target_lang: str):
+        """Cache a model output for exact repeats (never used for fuzzy matches)."""
+        if self.cache_size <= 0:
+            return
+        key = (source_lang, target_lang, normalize(source))
+        with self._lock:
+            self._cache[key] = target
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def lookup(self, text: str, source_lang: str, target_lang: str) -> str | None:
+        """The remembered translation of ``text``, or None if the model has to translate it."""
+        norm = normalize(text)
+        with STAGE_LATENCY.time(stage="tm"):
+            with self._lock:
+                index = self._indexes.get((source_lang, target_lang))
+                if index is not None and norm in index.exact:
+                    TM_LOOKUPS.inc(result="exact")
+                    return index.targets[index.exact[norm]]
+
+                key = (source_lang, target_lang, norm)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    TM_LOOKUPS.inc(result="cache")
+                    return cached
+
+                if index is None or not norm:
+                    TM_LOOKUPS.inc(result="miss")
+                    return None
+                grams = _grams(norm)
+                lists, sizes = index.candidates(grams)
+
+            # The scan takes milliseconds on a large memory: other sessions'
+            # lookups and remembers go on meanwhile
+            score, entry = index.search(grams, lists, sizes)
+            if score >= self.min_score:
+                with self._lock:
+                    # Entries are only appended, so ``entry`` still names the same sentence
+                    if index.digits[entry] == tuple(_DIGITS.findall(norm)):
+                        TM_LOOKUPS.inc(result="fuzzy")
+                        logger.debug("[TM] %.2f: %s ≈ %s", score, norm, index.sources[entry])
+                        return index.targets[entry]
+
+        TM_LOOKUPS.inc(result="miss")
+        return None
+
+
+def append_entries(path: str | Path, entries: list[dict]):
+    """Append the valid seed entries to a JSON-lines file (kept across restarts)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            if _valid(entry):
+                f.write(json.dumps({field: entry[field] for field in _FIELDS}, ensure_ascii=False) + "\n")
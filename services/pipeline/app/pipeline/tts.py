@@ -1,10 +1,20 @@
 """TTS — Kokoro only (natural built-in voices, no fallback)."""
 
 import logging
+import os
+import threading
+from collections import OrderedDict
+
 import numpy as np
 
+from ..metrics import metrics
+from .voicepack import VoicePack
+
 logger = logging.getLogger(__name__)
 
+TTS_CACHE_LOOKUPS = metrics.counter(
+    "pipeline_tts_cache_lookups_total", "Synthesized-audio cache lookups, by result (hit, miss).")
+
 # Kokoro language codes
 _KOKORO_LANG_CODES = {
     "en": "a",   # American English
@@ -36,25 +46,130 @@ _KOKORO_VOICES = {
 }
 
 
+def float_to_pcm16(audio: np.ndarray, scratch: bool = False) -> bytes:
+    """float32 [-1, 1] → PCM 16-bit bytes. ``scratch``: ``audio`` may be overwritten (saves a copy)."""
+    audio = np.multiply(audio, 32768.0, out=audio if scratch else None, dtype=np.float32)
+    np.clip(audio, -32768, 32767, out=audio)
+    return audio.astype(np.int16).tobytes()
+
+
+class TtsCache:
+    """Recently synthesized PCM by (text, voice, language), least recently used dropped past ``max_bytes``."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict[tuple[str, str, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str, voice: str, language: str) -> bytes | None:
+        key = (text.strip(), voice, language)
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+        TTS_CACHE_LOOKUPS.inc(result="miss" if pcm is None else "hit")
+        return pcm
+
+    def put(self, text: str, voice: str, language: str, pcm: bytes):
+        if not pcm or len(pcm) > self.max_bytes:
+            return
+        key = (text.strip(), voice, language)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._entries[key] = pcm
+            self.nbytes += len(pcm)
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+
 class TtsProcessor:
-    def __init__(self, device: str = "cuda", voice_presets_dir: str = "/app/voice_presets"):
+    def __init__(self, device: str = "cuda", voice_presets_dir: str = "/app/voice_presets", voice_pack_path: str = ""):
         self.device = device
         self.sample_rate = 24000
         self._loaded = False
-        self._kokoro_pipeline = None
-        self._kokoro_lang = None
+        self._kokoro_model = None
+        # One G2P pipeline per Kokoro language code, all sharing the one model
+        self._kokoro_pipelines = {}
+        # CPU style tensors over the memory-mapped voice pack (scripts/build_voice_pack.py)
+        self.voice_pack_path = voice_pack_path
+        self._voice_pack: VoicePack | None = None
+        self._voice_tensors = {}
 
     def load(self):
         """Load Kokoro TTS."""
-        from kokoro import KPipeline
+        from kokoro import KModel
 
         logger.info("Loading Kokoro TTS...")
-        self._kokoro_pipeline = KPipeline(lang_code='a', trf=False)
-        self._kokoro_lang = 'a'
+        self._kokoro_model = KModel().to(self.device).eval()
         self._loaded = True
+        self.load_language('a')
         self.sample_rate = 24000
+        self._load_voice_pack()
         logger.info("Kokoro TTS loaded (48 built-in voices, 24kHz)")
 
+    def _load_voice_pack(self):
+        if not self.voice_pack_path or not os.path.isfile(self.voice_pack_path):
+            if self.voice_pack_path:
+                logger.info("No voice pack at %s: voices are fetched on first use", self.voice_pack_path)
+            return
+        try:
+            self._voice_pack = VoicePack(self.voice_pack_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Voice pack %s unusable (%s): voices are fetched on first use", self.voice_pack_path, e)
+            return
+        missing = sorted({v for voices in _KOKORO_VOICES.values() for v in voices.values()} - set(self._voice_pack.names))
+        logger.info("Voice pack: %d voices mapped from %s (%.1f MB)%s", len(self._voice_pack),
+                    self.voice_pack_path, self._voice_pack.nbytes / 1024**2,
+                    ", missing: " + ", ".join(missing) if missing else "")
+
+    def _voice(self, kokoro_voice: str):
+        """The voice argument for KPipeline: a style tensor from the pack, or the name to fetch."""
+        tensor = self._voice_tensors.get(kokoro_voice)
+        if tensor is not None:
+            return tensor
+        if self._voice_pack is None or kokoro_voice not in self._voice_pack:
+            return kokoro_voice
+        import torch
+
+        # Always the CPU tensor over the mapped pages: KPipeline only accepts a
+        # torch.FloatTensor (CPU) as is, and moves the style vector it picks to
+        # the model's device itself
+        tensor = torch.from_numpy(self._voice_pack.get(kokoro_voice))
+        self._voice_tensors[kokoro_voice] = tensor
+        return tensor
+
+    def unload(self):
+        self._loaded = False
+        self._kokoro_pipelines.clear()
+        self._kokoro_model = None
+        self._voice_tensors.clear()
+        self._voice_pack = None
+
+    @staticmethod
+    def language_codes() -> list[str]:
+        return sorted(set(_KOKORO_LANG_CODES.values()))
+
+    @staticmethod
+    def lang_code_for(language: str) -> str:
+        return _KOKORO_LANG_CODES.get(language, "a")
+
+    def load_language(self, lang_code: str):
+        """Create the G2P pipeline for a Kokoro language code (shares the loaded model)."""
+        if lang_code in self._kokoro_pipelines:
+            return
+        from kokoro import KPipeline
+        self._kokoro_pipelines[lang_code] = KPipeline(lang_code=lang_code, model=self._kokoro_model, trf=False)
+
+    def unload_language(self, lang_code: str):
+        self._kokoro_pipelines.pop(lang_code, None)
+
     def synthesize(self, text: str, voice: str = "adult_female", language: str = "en") -> bytes:
         """Synthesize text to speech. Returns PCM 16-bit mono audio bytes."""
         if not text.strip():
@@ -64,20 +179,19 @@ class TtsProcessor:
             logger.warning("[TTS] Not loaded → silence")
             return self._silence(text)
 
-        lang_code = _KOKORO_LANG_CODES.get(language, "a")
+        lang_code = self.lang_code_for(language)
         lang_voices = _KOKORO_VOICES.get(language, _KOKORO_VOICES["en"])
         kokoro_voice = lang_voices.get(voice, list(lang_voices.values())[0])
 
-        # Re-create pipeline if language changed
-        if self._kokoro_lang != lang_code:
-            from kokoro import KPipeline
-            self._kokoro_pipeline = KPipeline(lang_code=lang_code, trf=False)
-            self._kokoro_lang = lang_code
+        pipeline = self._kokoro_pipelines.get(lang_code)
+        if pipeline is None:
+            self.load_language(lang_code)
+            pipeline = self._kokoro_pipelines[lang_code]
 
         logger.info("[TTS] Kokoro [voice=%s, lang=%s]: %s", kokoro_voice, lang_code, text[:80])
 
         audio_chunks = []
-        for _, _, audio in self._kokoro_pipeline(text, voice=kokoro_voice, speed=1.0):
+        for _, _, audio in pipeline(text, voice=self._voice(kokoro_voice), speed=1.0):
             if audio is not None:
                 audio_chunks.append(audio)
 
@@ -85,9 +199,9 @@ class TtsProcessor:
             logger.warning("[TTS] Kokoro produced no audio")
             return self._silence(text)
 
-        audio = np.concatenate(audio_chunks)
-        audio = np.clip(audio * 32768.0, -32768, 32767).astype(np.int16)
-        pcm = audio.tobytes()
+        # The concatenated copy is ours to scale in place
+        audio = np.concatenate(audio_chunks, dtype=np.float32)
+        pcm = float_to_pcm16(audio, scratch=True)
 
         logger.info("[TTS] Kokoro → %.1fs (%d bytes)", len(audio) / self.sample_rate, len(pcm))
         return pcm
@@ -1,27 +1,51 @@
 """Silero VAD - runs on CPU (~30ms)."""
 
 import logging
+import threading
+from dataclasses import dataclass, field
+
 import numpy as np
-import torch
 
 logger = logging.getLogger(__name__)
 
 # Silero VAD requires exactly 512 samples per call at 16kHz
 VAD_WINDOW_SIZE = 512
 
+# Recurrent state Silero keeps on the module between calls (v5 and v4 names)
+_MODEL_STATE_ATTRS = ("_state", "_context", "_last_sr", "_last_batch_size", "_h", "_c")
+
+
+@dataclass
+class VadState:
+    """One audio stream's VAD state (each session has its own)."""
+    speech_active: bool = False
+    silence_frames: int = 0
+    speech_buffer: bytearray = field(default_factory=bytearray)
+    # Samples short of a full window, prepended to the next call
+    leftover: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+    # Saved Silero recurrent state while another stream is using the model
+    model_state: dict = field(default_factory=dict)
+
 
 class VadProcessor:
     def __init__(self, threshold: float = 0.5):
         self.threshold = threshold
         self.model = None
-        self._speech_active = False
-        self._silence_frames = 0
-        self._speech_buffer = bytearray()
+        # Used when process() is called without a per-stream state
+        self._default_state = VadState()
+        # The model is shared: one stream at a time, with its recurrent state swapped in
+        self._model_lock = threading.Lock()
+        self._model_owner: VadState | None = None
         # Require ~500ms of silence before ending speech (~16 frames of 512 samples)
         self._silence_threshold = 16
+        # Report a pause (for speculative STT) after this many silent frames; 0 = off
+        self.pause_frames = 0
 
     def load(self):
         """Load Silero VAD model from torch hub."""
+        import torch
+
+        self._from_numpy = torch.from_numpy
         self.model, _ = torch.hub.load(
             repo_or_dir="snakers4/silero-vad",
             model="silero_vad",
@@ -31,12 +55,43 @@ class VadProcessor:
         self.model.train(False)
         logger.info("Silero VAD loaded on CPU")
 
-    def process(self, audio: np.ndarray, sample_rate: int = 16000) -> dict:
+    def unload(self):
+        self.model = None
+        self._model_owner = None
+
+    def _window_confidence(self, chunk: np.ndarray, sample_rate: int) -> float:
+        """Speech probability for one VAD_WINDOW_SIZE window."""
+        tensor = self._from_numpy(chunk).float()
+        return self.model(tensor, sample_rate).item()
+
+    def _switch_stream(self, state: VadState):
+        """Give the model ``state``'s recurrent state, saving the previous stream's."""
+        owner = self._model_owner
+        if owner is state or self.model is None:
+            return
+        if owner is not None:
+            owner.model_state = {
+                name: getattr(self.model, name) for name in _MODEL_STATE_ATTRS if hasattr(self.model, name)
+            }
+        try:
+            if state.model_state:
+                for name, value in state.model_state.items():
+                    setattr(self.model, name, value)
+            else:
+                self.model.reset_states()
+        except Exception:
+            # Cannot restore: a fresh state is better than another stream's
+            self.model.reset_states()
+        self._model_owner = state
+
+    def process(self, audio: np.ndarray, sample_rate: int = 16000, state: VadState | None = None) -> dict:
         """Detect speech boundaries by processing audio in 512-sample windows.
 
         Args:
             audio: float32 numpy array, shape (samples,)
             sample_rate: input sample rate
+            state: the stream's VadState; samples past the last full window
+                are kept in it for the next call
 
         Returns:
             dict with keys:
@@ -44,52 +99,71 @@ class VadProcessor:
                 - speech_start: bool (transition to speech)
                 - speech_end: bool (transition to silence)
                 - speech_audio: bytes or None (complete utterance when speech_end)
+                - pause_audio: bytes or None (the utterance so far, when a pause of
+                  ``pause_frames`` began and has not ended or resumed in this call)
+                - speech_resumed: bool (speech came back after a reported pause)
         """
         result = {
             "has_speech": False,
             "speech_start": False,
             "speech_end": False,
             "speech_audio": None,
+            "pause_audio": None,
+            "speech_resumed": False,
         }
 
+        state = state if state is not None else self._default_state
+        if len(state.leftover):
+            audio = np.concatenate((state.leftover, audio))
+
         # Process audio in VAD_WINDOW_SIZE chunks
         num_samples = len(audio)
         offset = 0
 
-        while offset + VAD_WINDOW_SIZE <= num_samples:
-            chunk = audio[offset:offset + VAD_WINDOW_SIZE]
-            offset += VAD_WINDOW_SIZE
-
-            tensor = torch.from_numpy(chunk).float()
-            confidence = self.model(tensor, sample_rate).item()
-            is_speech = confidence > self.threshold
-
-            if is_speech:
-                result["has_speech"] = True
-                self._silence_frames = 0
-                if not self._speech_active:
-                    self._speech_active = True
-                    self._speech_buffer.clear()
-                    result["speech_start"] = True
-                # Accumulate speech audio (store the full audio, not just this chunk)
-                self._speech_buffer.extend(chunk.tobytes())
-            else:
-                if self._speech_active:
-                    # Still accumulate during short silence gaps
-                    self._speech_buffer.extend(chunk.tobytes())
-                    self._silence_frames += 1
-                    if self._silence_frames >= self._silence_threshold:
-                        self._speech_active = False
-                        result["speech_end"] = True
-                        result["speech_audio"] = bytes(self._speech_buffer)
-                        self._speech_buffer.clear()
+        with self._model_lock:
+            self._switch_stream(state)
+            while offset + VAD_WINDOW_SIZE <= num_samples:
+                chunk = audio[offset:offset + VAD_WINDOW_SIZE]
+                offset += VAD_WINDOW_SIZE
+
+                is_speech = self._window_confidence(chunk, sample_rate) > self.threshold
 
+                if is_speech:
+                    result["has_speech"] = True
+                    if self.pause_frames and state.silence_frames >= self.pause_frames:
+                        result["speech_resumed"] = True
+                        result["pause_audio"] = None
+                    state.silence_frames = 0
+                    if not state.speech_active:
+                        state.speech_active = True
+                        state.speech_buffer.clear()
+                        result["speech_start"] = True
+                    # Accumulate speech audio (store the full audio, not just this chunk)
+                    state.speech_buffer.extend(chunk.tobytes())
+                else:
+                    if state.speech_active:
+                        # Still accumulate during short silence gaps
+                        state.speech_buffer.extend(chunk.tobytes())
+                        state.silence_frames += 1
+                        if state.silence_frames >= self._silence_threshold:
+                            state.speech_active = False
+                            result["speech_end"] = True
+                            result["speech_audio"] = bytes(state.speech_buffer)
+                            result["pause_audio"] = None
+                            state.speech_buffer.clear()
+                        elif state.silence_frames == self.pause_frames:
+                            result["pause_audio"] = bytes(state.speech_buffer)
+
+        state.leftover = audio[offset:].copy()
         return result
 
-    def reset(self):
-        """Reset VAD state for new session."""
-        self._speech_active = False
-        self._silence_frames = 0
-        self._speech_buffer.clear()
-        if self.model is not None:
-            self.model.reset_states()
+    def reset(self, state: VadState | None = None):
+        """Reset a stream's VAD state (the default stream's if none given)."""
+        state = state if state is not None else self._default_state
+        state.speech_active = False
+        state.silence_frames = 0
+        state.speech_buffer.clear()
+        state.leftover = np.zeros(0, dtype=np.float32)
+        state.model_state = {}
+        if self._model_owner is state:
+            self._model_owner = None
@@ -0,0 +1,91 @@
+"""Kokoro voice pack: every configured voice's style tensor in one memory-mapped file.
+
+Layout (little-endian):
+  b"KVP1" | uint32 header length | JSON header | padding | float32 tensors
+
+The header maps each voice name to its offset and shape. Tensors start on
+64-byte boundaries, so the views into the mapping are aligned. The file is
+mapped copy-on-write ("c"): its pages come from the page cache and are
+shared by every process that maps it, and nothing writes back to it.
+
+Built by scripts/build_voice_pack.py.
+"""
+
+import json
+import logging
+import struct
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KVP1"
+_HEAD = struct.Struct("<4sI")
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_voice_pack(path: str | Path, voices: dict[str, np.ndarray], meta: dict | None = None):
+    """Write ``voices`` (name → float32 array) to ``path`` (atomically, via a temp file)."""
+    path = Path(path)
+    index = {}
+    offset = 0
+    arrays = {}
+    for name, tensor in sorted(voices.items()):
+        arr = np.ascontiguousarray(tensor, dtype=np.float32)
+        index[name] = {"offset": offset, "shape": list(arr.shape)}
+        arrays[name] = arr
+        offset = _aligned(offset + arr.nbytes)
+    header = json.dumps({**(meta or {}), "dtype": "float32", "voices": index}).encode("utf-8")
+    data_start = _aligned(_HEAD.size + len(header))
+
+    tmp = path.with_name(path.name + ".tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(_HEAD.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(data_start + index[name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(data_start + offset)
+    tmp.replace(path)
+
+
+class VoicePack:
+    """Read-only view of a voice pack file; ``get`` returns arrays backed by the mapping."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._map = np.memmap(self.path, dtype=np.uint8, mode="c")
+        magic, header_len = _HEAD.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("%s is not a voice pack" % self.path)
+        header = json.loads(bytes(self._map[_HEAD.size:_HEAD.size + header_len]))
+        data_start = _aligned(_HEAD.size + header_len)
+        self.meta = {k: v for k, v in header.items() if k != "voices"}
+        self._voices: dict[str, np.ndarray] = {}
+        for name, entry in header["voices"].items():
+            start = data_start + entry["offset"]
+            count = int(np.prod(entry["shape"]))
+            self._voices[name] = self._map[start:start + count * 4].view(np.float32).reshape(entry["shape"])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._voices
+
+    def __len__(self) -> int:
+        return len(self._voices)
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self._voices)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._map)
+
+    def get(self, name: str) -> np.ndarray:
+        return self._voices[name]
@@ -0,0 +1,135 @@
+"""On-demand profiling of a live node: Python stack sampling plus the torch profiler.
+
+The output is the folded stack format (``root;caller;callee value`` per
+line) read by flamegraph.pl, inferno and speedscope. Values are
+microseconds of wall time, so the Python samples and the torch operator
+stacks (under a ``torch`` root) can go in the same flamegraph.
+
+Sampling runs in its own thread and only reads ``sys._current_frames()``.
+If one sample costs more than ``max_overhead`` of the sampling interval,
+the interval is stretched to match. Only one profile runs per process at a
+time.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_busy = threading.Lock()
+
+
+class ProfileBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return "%s (%s:%d)" % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+class StackSampler:
+    def __init__(self, interval_s: float = 0.01, max_overhead: float = 0.02):
+        self.interval_s = interval_s
+        self.max_overhead = max_overhead
+        self.samples = 0
+        self.busy_s = 0.0
+
+    def run(self, seconds: float) -> Counter:
+        """Sample every other thread for ``seconds``; returns folded stack → microseconds."""
+        stacks: Counter = Counter()
+        me = threading.get_ident()
+        interval = self.interval_s
+        deadline = time.perf_counter() + seconds
+        last = time.perf_counter()
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= deadline:
+                break
+            # Weight each sample by the wall time it stands for
+            weight_us = int((t0 - last) * 1e6)
+            last = t0
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, "thread-%d" % ident))
+                stacks[";".join(reversed(labels))] += weight_us
+            cost = time.perf_counter() - t0
+            self.samples += 1
+            self.busy_s += cost
+            interval = max(self.interval_s, cost / self.max_overhead)
+            time.sleep(min(interval, max(deadline - time.perf_counter(), 0)))
+        return stacks
+
+
+def _start_torch_profiler():
+    try:
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+    except ImportError:
+        logger.warning("[PROFILE] torch not available, Python samples only")
+        return None
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    prof = profile(activities=activities, with_stack=True, record_shapes=False)
+    prof.__enter__()
+    return prof
+
+
+def _torch_folded(prof) -> list[str]:
+    fd, path = tempfile.mkstemp(suffix=".folded")
+    os.close(fd)
+    try:
+        prof.export_stacks(path, "self_cpu_time_total")
+        with open(path, encoding="utf-8") as f:
+            return ["torch;" + line.rstrip("\n") for line in f if line.strip()]
+    finally:
+        os.unlink(path)
+
+
+def capture(seconds: float, with_torch: bool = False, interval_s: float = 0.01, max_overhead: float = 0.02) -> str:
+    """Profile this process for ``seconds`` (blocking) and return folded stacks.
+
+    Raises ProfileBusy if a profile is already running.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfileBusy("a profile is already running")
+    try:
+        logger.info("[PROFILE] Sampling for %.1fs (torch=%s)", seconds, with_torch)
+        prof = _start_torch_profiler() if with_torch else None
+        sampler = StackSampler(interval_s, max_overhead)
+        try:
+            stacks = sampler.run(seconds)
+        finally:
+            if prof is not None:
+                prof.__exit__(None, None, None)
+
+        lines = ["%s %d" % (stack, us) for stack, us in stacks.most_common() if us > 0]
+        if prof is not None:
+            try:
+                lines.extend(_torch_folded(prof))
+            except Exception as e:
+                logger.warning("[PROFILE] Could not export torch stacks: %s", e)
+        logger.info(
+            "[PROFILE] Done: %d samples, sampler busy %.1f%% of %.1fs",
+            sampler.samples, sampler.busy_s / seconds * 100 if seconds else 0, seconds,
+        )
+        return "\n".join(lines) + "\n"
+    finally:
+        _busy.release()
+
+
+def prefix(folded: str, root: str) -> str:
+    """Put every stack of ``folded`` under an extra ``root`` frame."""
+    return "".join(root + ";" + line + "\n" for line in folded.splitlines() if line)
@@ -0,0 +1,261 @@
+"""Session router: puts each new /ws session on the least-loaded pipeline node.
+
+    ROUTER_NODES=http://10.0.0.5:9000,http://10.0.0.6:9000 uvicorn app.router:app --port 8000
+
+Every ``router_poll_ms`` the router reads each node's /ready (app/main.py).
+A new WebSocket goes to the ready node with the highest capacity score. The
+router then proxies the socket both ways, frames unchanged, for the
+session's lifetime. Nodes are re-scored at every poll. In between, each
+session placed on a node lowers that node's score by its share of one
+session, so a burst of connections does not all land on one node. If a node
+refuses the connection, the next best one is tried. A node that is not
+ready accepts the socket and closes it with 1013 right away. Until a node
+has sent its first frame, the router keeps what the client sent. On such a
+close it replays those frames on the next node, so the client never sees
+the refusal. Only when no node takes the session does the client get 1013.
+Once a node has the session, its close code and reason reach the client.
+
+A session stays on its node (VAD and broadcast state live there). Run it
+with several local stub nodes: scripts/local_cluster.py.
+"""
+
+import asyncio
+import json
+import logging
+import urllib.error
+import urllib.request
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import websockets
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from .config import settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Score taken off a node per session placed since its last poll, when it does not report max_sessions
+_DEFAULT_SESSION_COST = 0.05
+
+
+@dataclass
+class Node:
+    url: str
+    ready: bool = False
+    status: str = "unknown"
+    capacity: float = 0.0
+    active_sessions: int = 0
+    max_sessions: int = 0
+    # Sessions this router is proxying to the node right now
+    routed: int = 0
+
+    @property
+    def ws_url(self) -> str:
+        return self.url.replace("http", "ws", 1).rstrip("/") + "/ws"
+
+    @property
+    def session_cost(self) -> float:
+        return 1 / self.max_sessions if self.max_sessions else _DEFAULT_SESSION_COST
+
+    def place(self):
+        """Count a session on this node (its score drops until the next poll says otherwise)."""
+        self.routed += 1
+        self.capacity -= self.session_cost
+
+    def unplace(self):
+        self.routed -= 1
+        self.capacity += self.session_cost
+
+    def report(self) -> dict:
+        return {"url": self.url, "status": self.status, "capacity": round(self.capacity, 3),
+                "active_sessions": self.active_sessions, "routed": self.routed}
+
+
+def _fetch_ready(url: str) -> tuple[int, dict]:
+    """(HTTP status, body) of a node's /ready; (0, {}) if it cannot be reached."""
+    try:
+        with urllib.request.urlopen(url.rstrip("/") + "/ready", timeout=2) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        try:
+            return e.code, json.loads(e.read())
+        except ValueError:
+            return e.code, {}
+    except (OSError, ValueError):
+        return 0, {}
+
+
+class NodeTable:
+    def __init__(self, urls: list[str]):
+        self.nodes = [Node(url) for url in urls]
+
+    async def poll(self):
+        reports = await asyncio.gather(*(asyncio.to_thread(_fetch_ready, n.url) for n in self.nodes))
+        for node, (code, body) in zip(self.nodes, reports):
+            node.ready = code == 200
+            node.status = body.get("status", "unreachable" if code == 0 else str(code))
+            node.capacity = float(body.get("capacity", 0.0)) if node.ready else 0.0
+            node.active_sessions = int(body.get("active_sessions", 0))
+            node.max_sessions = int(body.get("max_sessions", 0))
+
+    async def poll_forever(self, interval_s: float):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.warning("Node poll failed: %s", e)
+            await asyncio.sleep(interval_s)
+
+    def candidates(self) -> list[Node]:
+        """Ready nodes with room, best first."""
+        nodes = [n for n in self.nodes if n.ready and n.capacity > 0]
+        return sorted(nodes, key=lambda n: (-n.capacity, n.routed))
+
+
+nodes = NodeTable([url.strip() for url in settings.router_nodes.split(",") if url.strip()])
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    if not nodes.nodes:
+        logger.warning("ROUTER_NODES is empty: every session will be refused")
+    await nodes.poll()
+    poller = asyncio.create_task(nodes.poll_forever(settings.router_poll_ms / 1000))
+    logger.info("Routing /ws over %d nodes", len(nodes.nodes))
+    yield
+    poller.cancel()
+
+
+app = FastAPI(title="Classroom Translator Session Router", lifespan=_lifespan)
+
+
+# Client frames kept for a replay on another node, at most, before the node has answered
+_MAX_REPLAY_FRAMES = 64
+
+
+@dataclass
+class _Relay:
+    """One session's proxying state across the nodes it is tried on."""
+
+    # Client frames not yet answered by a node, replayed if that node refuses the session
+    sent: list
+    # The session stays where it is: the node answered, or too much was sent to replay
+    committed: bool = False
+    client_gone: bool = False
+
+    def commit(self):
+        self.committed = True
+        self.sent.clear()
+
+
+async def _client_to_node(ws: WebSocket, upstream, relay: _Relay):
+    while True:
+        raw = await ws.receive()
+        if raw.get("type") == "websocket.disconnect":
+            relay.client_gone = True
+            return
+        frame = raw["bytes"] if raw.get("bytes") is not None else raw.get("text")
+        if frame is None:
+            continue
+        if not relay.committed:
+            if len(relay.sent) < _MAX_REPLAY_FRAMES:
+                relay.sent.append(frame)
+            else:
+                relay.commit()
+        await upstream.send(frame)
+
+
+async def _node_to_client(ws: WebSocket, upstream, relay: _Relay):
+    async for message in upstream:
+        relay.commit()
+        if isinstance(message, bytes):
+            await ws.send_bytes(message)
+        else:
+            await ws.send_text(message)
+
+
+async def _connect(node: Node):
+    """A socket to ``node``, or None if it refused the handshake or is down (skipped until the next poll)."""
+    # Placed before connecting, so sessions arriving meanwhile see the node's lower score
+    node.place()
+    try:
+        return await websockets.connect(node.ws_url, max_size=None)
+    except (OSError, websockets.InvalidHandshake, asyncio.TimeoutError) as e:
+        logger.info("Node %s refused a session: %s", node.url, e)
+        node.unplace()
+        node.ready = False
+        return None
+
+
+async def _relay_to(ws: WebSocket, upstream, relay: _Relay):
+    """Replay what the client sent so far, then relay both ways until either side closes."""
+    tasks = [asyncio.create_task(_node_to_client(ws, upstream, relay))]
+    try:
+        for frame in list(relay.sent):
+            await upstream.send(frame)
+        # Only now read the client again, so its next frames follow the replayed ones
+        tasks.append(asyncio.create_task(_client_to_node(ws, upstream, relay)))
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    except websockets.ConnectionClosed:
+        pass  # the node closed during the replay: the caller tells a refusal apart
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Either side closing ends both directions; their errors are expected then
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await upstream.close()
+
+
+def _client_close(upstream) -> tuple[int, str]:
+    """The close code and reason to pass on to the client for how ``upstream`` closed."""
+    code = upstream.close_code
+    # 1005 / 1006 (no close frame: the node died or dropped the connection) can't be sent
+    if code is None or code in (1005, 1006, 1015):
+        return 1011, "pipeline node lost"
+    return code, upstream.close_reason or ""
+
+
+@app.websocket("/ws")
+async def ws_proxy(ws: WebSocket):
+    """Relay the client to the best node until either side closes, moving on while nodes refuse it."""
+    await ws.accept()
+    relay = _Relay(sent=[])
+    code, reason = 1013, ""  # try again later: no node took the session
+    try:
+        for node in nodes.candidates():
+            upstream = await _connect(node)
+            if upstream is None:
+                continue
+            try:
+                await _relay_to(ws, upstream, relay)
+            finally:
+                node.routed -= 1
+            refused = upstream.close_code == 1013
+            if not refused or relay.committed or relay.client_gone:
+                # The session ran here: the client gets the node's own close (a node
+                # going away mid-session with 1013 still tells it to retry)
+                code, reason = _client_close(upstream)
+                break
+            logger.info("Node %s refused a session (1013), trying the next one", node.url)
+            node.ready = False
+    finally:
+        try:
+            await ws.close(code=code, reason=reason)
+        except (RuntimeError, WebSocketDisconnect):
+            pass  # already closed by the client
+
+
+@app.get("/health")
+async def health():
+    """Liveness of the router itself."""
+    return {"status": "ok"}
+
+
+@app.get("/nodes")
+async def list_nodes():
+    """Each node's last /ready report and the sessions routed to it."""
+    return {"nodes": [n.report() for n in nodes.nodes]}
@@ -0,0 +1,122 @@
+"""Per-utterance latency accounting and the rotating trace file.
+
+A ``Trace`` follows one dispatched unit of audio (a realtime chunk or a
+push-to-talk segment) from capture on the client to the last frame sent
+back, as named spans in milliseconds:
+
+  network_ms      client capture → server receipt (needs client timestamps;
+                  includes any clock offset between client and server)
+  buffer_ms       waiting in the session buffer until the chunk is dispatched
+  vad_queue_ms    realtime chunk waiting for a scheduler worker
+  vad_ms          VAD compute
+  queue_ms        utterance waiting for a scheduler worker
+  stt_ms, postprocess_ms, translate_ms, tts_ms   compute per stage
+  ipc_ms          front process ↔ inference worker (multi-process mode)
+  handoff_ms      worker thread → event loop
+  order_wait_ms   result ready → its turn in the ordered sender
+  send_ms         writing the result frames to the socket
+
+Finished traces are appended as JSON lines to ``settings.trace_file`` by a
+background thread, rotating by size.
+"""
+
+import json
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_trace_log = logging.getLogger("pipeline.trace")
+_trace_log.propagate = False
+_listener: QueueListener | None = None
+
+
+class Trace:
+    def __init__(
+        self,
+        session_id: str,
+        mode: str,
+        captured_at: float | None = None,
+        received_at: float | None = None,
+    ):
+        self.session_id = session_id
+        self.mode = mode
+        self.utterance_id = ""
+        self.dispatched_at = time.time()
+        # Client capture and server receipt of the newest audio frame (epoch seconds)
+        self.captured_at = captured_at
+        self.received_at = received_at
+        self.spans: dict[str, float] = {}
+        if captured_at is not None and received_at is not None:
+            self.spans["network_ms"] = (received_at - captured_at) * 1000
+        if received_at is not None:
+            self.spans["buffer_ms"] = max(self.dispatched_at - received_at, 0) * 1000
+
+    def add(self, name: str, ms: float):
+        self.spans[name] = self.spans.get(name, 0) + ms
+
+    def merge(self, timings: dict):
+        for name, ms in timings.items():
+            self.add(name, ms)
+
+    def since(self, name: str, t0: float) -> float:
+        """Record ``now - t0`` as span ``name``; returns now."""
+        now = time.time()
+        self.add(name, (now - t0) * 1000)
+        return now
+
+    def breakdown(self) -> dict:
+        """Rounded spans plus the total so far, as sent to the client."""
+        origin = self.captured_at or self.received_at or self.dispatched_at
+        out = {name: round(ms, 1) for name, ms in self.spans.items()}
+        out["total_ms"] = round((time.time() - origin) * 1000, 1)
+        return out
+
+    def finish(self):
+        """Append this trace to the trace file (no-op when tracing is off)."""
+        if not settings.trace_file:
+            return
+        _ensure_writer()
+        _trace_log.info(json.dumps({
+            "ts": round(self.dispatched_at, 3),
+            "session_id": self.session_id,
+            "utterance_id": self.utterance_id,
+            "mode": self.mode,
+            "spans": self.breakdown(),
+        }))
+
+
+def _ensure_writer():
+    global _listener
+    if _listener is not None:
+        return
+    handler = RotatingFileHandler(
+        settings.trace_file,
+        maxBytes=settings.trace_max_mb * 1024 * 1024,
+        backupCount=settings.trace_backups,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    records = queue.SimpleQueue()
+    _trace_log.addHandler(QueueHandler(records))
+    _trace_log.setLevel(logging.INFO)
+    _listener = QueueListener(records, handler)
+    _listener.start()
+    logger.info("Writing latency traces to %s", settings.trace_file)
+
+
+def close():
+    """Flush and close the trace file."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for h in _listener.handlers:
+        h.close()
+    for h in list(_trace_log.handlers):
+        _trace_log.removeHandler(h)
+    _listener = None
@@ -0,0 +1,181 @@
+"""Per-session lesson transcript: one JSON record per utterance, written off the hot path.
+
+Layout under ``settings.transcript_dir``, per session:
+
+  <session_id>.000.jsonl   utterance records, one JSON object per line
+  <session_id>.000.pcm     TTS audio of those utterances (transcript_audio only)
+  <session_id>.001.jsonl   next part, once the previous one passed transcript_max_mb
+  ...
+
+A record holds the utterance's timings, transcript and translation; with
+audio kept, ``audio`` says where its TTS audio is in the part's .pcm file
+(int16 mono at ``sample_rate``). Files are only ever appended to.
+
+``TranscriptLog.append`` only queues the record (dropping it if the queue is
+full), so the event loop never waits on the disk. A task on the loop
+collects what was queued over ``transcript_flush_ms`` and writes the batch
+in a thread. Reading a session back concatenates its parts' lines into a
+JSON array without parsing them.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from pathlib import Path
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_RECORDS = metrics.counter(
+    "pipeline_transcript_records_total", "Utterance records written to the transcript log.")
+TRANSCRIPT_DROPPED = metrics.counter(
+    "pipeline_transcript_dropped_total", "Utterance records dropped because the transcript writer fell behind.")
+
+# Session ids are uuid4 strings; anything else never names a file
+_SESSION_ID = re.compile(r"[0-9a-f-]{8,64}")
+_MAX_BATCH = 512
+
+
+class TranscriptLog:
+    def __init__(self, directory: str, max_mb: int = 20, keep_audio: bool = False,
+                 sample_rate: int = 24000, queue_size: int = 1024, flush_ms: int = 200):
+        self.directory = Path(directory)
+        self.max_bytes = max(max_mb, 1) * 1024 * 1024
+        self.keep_audio = keep_audio
+        self.sample_rate = sample_rate
+        self._flush_s = flush_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self._task: asyncio.Task | None = None
+        # Session → part being appended to (touched by the writer thread only)
+        self._parts: dict[str, int] = {}
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Writing lesson transcripts to %s", self.directory)
+
+    async def close(self):
+        """Write everything queued so far, then stop."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def append(self, record: dict, audio: bytes = b""):
+        """Queue one utterance record (and its TTS audio) for the writer; never blocks."""
+        try:
+            self._queue.put_nowait((record, audio if self.keep_audio else b""))
+        except asyncio.QueueFull:
+            TRANSCRIPT_DROPPED.inc()
+
+    def end_session(self, session_id: str):
+        """The session is over: the writer can forget its part number."""
+        try:
+            self._queue.put_nowait((session_id, b""))
+        except asyncio.QueueFull:
+            pass
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            # Let a batch build up, then take everything queued
+            await asyncio.sleep(self._flush_s)
+            while len(batch) < _MAX_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+                # close() waits for the rest of the queue too
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not None:
+                        batch.append(item)
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                logger.exception("Transcript write failed (%d records lost): %s", len(batch), e)
+
+    def _path(self, session_id: str, part: int, suffix: str) -> Path:
+        return self.directory / ("%s.%03d.%s" % (session_id, part, suffix))
+
+    def _current_part(self, session_id: str) -> int:
+        part = self._parts.get(session_id)
+        if part is None:
+            # First write since startup: continue after any existing parts
+            parts = sorted(self.directory.glob("%s.*.jsonl" % session_id))
+            part = int(parts[-1].name.split(".")[1]) if parts else 0
+            self._parts[session_id] = part
+        return part
+
+    def _write(self, batch: list[tuple]):
+        """Append a batch (writer thread): each session's records in one write per file."""
+        by_session: dict[str, list[tuple[dict, bytes]]] = {}
+        ended = []
+        for record, audio in batch:
+            if isinstance(record, str):
+                ended.append(record)
+            else:
+                by_session.setdefault(record["session_id"], []).append((record, audio))
+
+        for session_id, items in by_session.items():
+            if not _SESSION_ID.fullmatch(session_id):
+                continue
+            part = self._current_part(session_id)
+            lines = []
+            pcm_path = self._path(session_id, part, "pcm")
+            pcm_size = pcm_path.stat().st_size if pcm_path.exists() else 0
+            audio_chunks = []
+            for record, audio in items:
+                if audio:
+                    record["audio"] = {"part": part, "offset": pcm_size, "bytes": len(audio),
+                                       "sample_rate": self.sample_rate}
+                    pcm_size += len(audio)
+                    audio_chunks.append(audio)
+                lines.append(json.dumps(record, ensure_ascii=False))
+
+            if audio_chunks:
+                with open(pcm_path, "ab") as f:
+                    f.write(b"".join(audio_chunks))
+            jsonl_path = self._path(session_id, part, "jsonl")
+            with open(jsonl_path, "ab") as f:
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+                size = f.tell()
+            TRANSCRIPT_RECORDS.inc(len(lines))
+
+            if size >= self.max_bytes or pcm_size >= self.max_bytes:
+                self._parts[session_id] = part + 1
+
+        for session_id in ended:
+            self._parts.pop(session_id, None)
+
+    def _parts_of(self, session_id: str) -> list[Path]:
+        if not _SESSION_ID.fullmatch(session_id):
+            return []
+        return sorted(self.directory.glob("%s.*.jsonl" % session_id))
+
+    def read(self, session_id: str) -> bytes | None:
+        """The session's records as a JSON array (None if there are none)."""
+        parts = self._parts_of(session_id)
+        if not parts:
+            return None
+        lines = [line for path in parts for line in path.read_bytes().splitlines() if line]
+        return b"[" + b",".join(lines) + b"]"
+
+    def read_audio(self, session_id: str, utterance_id: str) -> bytes | None:
+        """An utterance's TTS audio as int16 PCM (None if it was not kept)."""
+        for path in reversed(self._parts_of(session_id)):
+            for line in path.read_bytes().splitlines():
+                if utterance_id.encode() not in line:
+                    continue
+                record = json.loads(line)
+                audio = record.get("audio")
+                if record.get("utterance_id") != utterance_id or not audio:
+                    continue
+                with open(self._path(session_id, audio["part"], "pcm"), "rb") as f:
+                    f.seek(audio["offset"])
+                    return f.read(audio["bytes"])
+        return None
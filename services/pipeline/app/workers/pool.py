@@ -0,0 +1,326 @@
+"""Front-process side of multi-process mode: shards sessions across inference workers.
+
+The front process owns every WebSocket and no models. Each worker process
+loads its own PipelineOrchestrator. On a warm prepared cache NLLB and the
+torch post-processor map one weights file (app/models/artifacts.py
+``load_mapped``), and TTS maps the voice pack, so their pages are shared
+by all workers. CTranslate2 models (faster-whisper, the int8
+post-processor) are read from one directory but have no mapped load path,
+so each worker holds its own copy of those. Sessions stick to the worker
+they were first assigned to (VAD state lives there). Audio travels through
+a pair of shared-memory rings per worker, only offsets go through the
+queues.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .. import profiling
+from ..config import settings
+from ..metrics import metrics
+from ..pipeline.scheduler import OverloadedError
+from ..pipeline.translation_memory import append_entries
+from .shm import ShmRing
+from .worker import worker_main
+
+logger = logging.getLogger(__name__)
+
+# Session settings mirrored into the worker's copy of the session
+_SESSION_FIELDS = ("source_lang", "target_lang", "voice", "denoise")
+
+
+@dataclass
+class _Pending:
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+    in_offset: int
+    submitted_at: float = 0.0
+    on_vad_done: Callable[[], None] | None = None
+    input_released: bool = False
+
+
+class _Worker:
+    def __init__(self, index: int, ctx, shm_bytes: int):
+        self.index = index
+        self.in_ring = ShmRing(size=shm_bytes)
+        self.out_ring = ShmRing(size=shm_bytes)
+        self.requests = ctx.Queue()
+        self.responses = ctx.Queue()
+        self.process = ctx.Process(
+            target=worker_main,
+            args=(index, self.requests, self.responses, self.in_ring.name, self.out_ring.name),
+            name=f"pipeline-worker-{index}",
+            daemon=True,
+        )
+        self.pending: dict[int, _Pending] = {}
+        self.lock = threading.Lock()
+        self.sessions = 0
+        # Cleared (under ``lock``) when the process dies; no job is queued on it after that
+        self.alive = True
+
+
+class WorkerPool:
+    def __init__(self, workers: int = 2, shm_mb: int = 16):
+        self.num_workers = workers
+        self.shm_bytes = shm_mb * 1024 * 1024
+        self._workers: list[_Worker] = []
+        self._affinity: dict[str, _Worker] = {}
+        self._job_ids = itertools.count()
+        self._readers: list[threading.Thread] = []
+        self._running = False
+
+    def start(self):
+        """Spawn workers and block until every one has loaded its models."""
+        ctx = mp.get_context("spawn")
+        self._workers = [_Worker(i, ctx, self.shm_bytes) for i in range(self.num_workers)]
+        for w in self._workers:
+            w.process.start()
+        for w in self._workers:
+            msg = w.responses.get()
+            if msg[0] != "ready":
+                raise RuntimeError("worker %d failed to start: %r" % (w.index, msg))
+        self._running = True
+        for w in self._workers:
+            t = threading.Thread(target=self._read_responses, args=(w,), name=f"pool-reader-{w.index}", daemon=True)
+            t.start()
+            self._readers.append(t)
+        logger.info("Worker pool ready: %d inference processes", self.num_workers)
+
+    def shutdown(self):
+        self._running = False
+        for w in self._workers:
+            w.requests.put(("stop",))
+        for w in self._workers:
+            w.process.join(timeout=10)
+            if w.process.is_alive():
+                w.process.terminate()
+        for t in self._readers:
+            t.join(timeout=2)
+        for w in self._workers:
+            self._fail_pending(w, OverloadedError("worker pool shut down"))
+            w.in_ring.close()
+            w.out_ring.close()
+            w.requests.close()
+            w.responses.close()
+        # Drop the queues so their semaphores are released before interpreter exit
+        self._workers = []
+        self._affinity.clear()
+
+    def _live(self) -> list[_Worker]:
+        return [w for w in self._workers if w.alive]
+
+    def _assign(self, session_id: str) -> _Worker:
+        """Sticky assignment: a new session goes to the worker with the fewest sessions.
+
+        A session whose worker died moves to a live one (its VAD state starts over).
+        """
+        worker = self._affinity.get(session_id)
+        if worker is None or not worker.alive:
+            live = self._live()
+            if not live:
+                raise OverloadedError("no pipeline worker alive")
+            if worker is not None:
+                worker.sessions -= 1
+            worker = min(live, key=lambda w: (w.sessions, len(w.pending)))
+            worker.sessions += 1
+            self._affinity[session_id] = worker
+        return worker
+
+    def close_session(self, session_id: str):
+        worker = self._affinity.pop(session_id, None)
+        if worker is not None:
+            worker.sessions -= 1
+            if worker.alive:
+                worker.requests.put(("close", session_id))
+
+    async def models(self) -> list[dict]:
+        """Model registry reports from every worker, tagged with the worker index."""
+        return [
+            {"worker": w.index, **entry}
+            for w, report in await self._each("status")
+            for entry in report["models"]
+        ]
+
+    async def add_translations(self, entries: list[dict]) -> int:
+        """Seed every worker's translation memory; the file is appended to once, here."""
+        if settings.tm_path:
+            await asyncio.to_thread(append_entries, settings.tm_path, entries)
+        return min((report["added"] for _, report in await self._each("tm_add", entries)), default=0)
+
+    async def load(self) -> dict:
+        """Queue depths summed over the live workers (each has its own scheduler)."""
+        reports = [report for _, report in await self._each("load")]
+        queues: dict[str, int] = {}
+        for report in reports:
+            for name, depth in report["queues"].items():
+                queues[name] = queues.get(name, 0) + depth
+        return {"queues": queues, "max_queue": sum(report["max_queue"] for report in reports)}
+
+    async def metrics(self) -> list[tuple[dict, list]]:
+        """This process's metrics plus every live worker's, labelled by origin."""
+        return [({"worker": "front"}, metrics.collect())] + [
+            ({"worker": str(w.index)}, report["families"])
+            for w, report in await self._each("metrics")
+        ]
+
+    async def profile(self, seconds: float, with_torch: bool = False) -> str:
+        """Folded stacks of the front process and every worker, each under its own root."""
+        front = asyncio.to_thread(
+            profiling.capture, seconds, False,
+            settings.profile_interval_ms / 1000, settings.profile_max_overhead,
+        )
+        folded, answered = await asyncio.gather(front, self._each("profile", seconds, with_torch))
+        return profiling.prefix(folded, "front") + "".join(
+            profiling.prefix(report["folded"], "worker-%d" % w.index)
+            for w, report in answered
+        )
+
+    async def _each(self, kind: str, *args) -> list[tuple[_Worker, dict]]:
+        """Send ``kind`` to every live worker; (worker, report) of each that answered.
+
+        A worker that dies meanwhile is left out rather than failing the lot.
+        """
+        live = self._live()
+        reports = await asyncio.gather(*(self._control(w, kind, *args) for w in live), return_exceptions=True)
+        answered = []
+        for w, report in zip(live, reports):
+            if isinstance(report, BaseException):
+                if w.alive:
+                    raise report
+                continue
+            answered.append((w, report))
+        return answered
+
+    async def _control(self, worker: _Worker, kind: str, *args) -> dict:
+        loop = asyncio.get_running_loop()
+        job_id = next(self._job_ids)
+        pending = _Pending(loop.create_future(), loop, in_offset=-1, input_released=True)
+        self._add_pending(worker, job_id, pending)
+        worker.requests.put((kind, job_id) + args)
+        return await pending.future
+
+    async def prefetch(self, session, terms: list[str]) -> int:
+        """Prefetch lesson terms on the session's worker, whose caches will serve it."""
+        if not self._running:
+            raise OverloadedError("worker pool not running")
+        worker = self._assign(session.session_id)
+        fields = {key: getattr(session, key) for key in _SESSION_FIELDS}
+        report = await self._control(worker, "prefetch", session.session_id, fields, terms)
+        return report["prefetched"]
+
+    async def realtime(self, audio_data: bytes, session, on_vad_done: Callable[[], None] | None = None) -> dict | None:
+        return await self._submit("realtime", audio_data, session, on_vad_done)
+
+    async def segment(self, audio_data: bytes, session) -> dict:
+        return await self._submit("segment", audio_data, session)
+
+    async def _submit(self, kind: str, audio_data: bytes, session, on_vad_done=None):
+        if not self._running:
+            raise OverloadedError("worker pool not running")
+        worker = self._assign(session.session_id)
+        try:
+            # Byte view, so int16 arrays from the ingest buffer are copied as-is
+            offset, length = worker.in_ring.write(memoryview(audio_data).cast("B"))
+        except BufferError as e:
+            raise OverloadedError(str(e)) from e
+
+        loop = asyncio.get_running_loop()
+        job_id = next(self._job_ids)
+        pending = _Pending(loop.create_future(), loop, offset, time.time(), on_vad_done)
+        try:
+            self._add_pending(worker, job_id, pending)
+        except OverloadedError:
+            worker.in_ring.release(offset)
+            raise
+        fields = {key: getattr(session, key) for key in _SESSION_FIELDS}
+        worker.requests.put((kind, job_id, session.session_id, fields, offset, length))
+        return await pending.future
+
+    def _read_responses(self, worker: _Worker):
+        while self._running:
+            try:
+                msg = worker.responses.get(timeout=1.0)
+            except queue.Empty:
+                if self._running and not worker.process.is_alive():
+                    logger.error("Worker %d died (exit code %s)", worker.index, worker.process.exitcode)
+                    with worker.lock:
+                        worker.alive = False
+                    self._fail_pending(worker, RuntimeError("pipeline worker %d died" % worker.index))
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            kind, job_id = msg[0], msg[1]
+            with worker.lock:
+                pending = worker.pending.get(job_id)
+                if pending is not None and kind != "vad_done":
+                    del worker.pending[job_id]
+            if pending is None:
+                continue
+
+            # The worker has copied the input once it reports anything about the job
+            if not pending.input_released:
+                worker.in_ring.release(pending.in_offset)
+                pending.input_released = True
+
+            if kind == "vad_done":
+                if pending.on_vad_done is not None:
+                    pending.loop.call_soon_threadsafe(pending.on_vad_done)
+            elif kind == "error":
+                _, _, code, message = msg
+                if code == "overloaded":
+                    error = OverloadedError(message)
+                elif code == "busy":
+                    error = profiling.ProfileBusy(message)
+                else:
+                    error = RuntimeError(message)
+                self._settle(pending, error=error)
+            else:
+                result = msg[2]
+                audio = result.get("audio") if result else None
+                if isinstance(audio, tuple):
+                    _, offset, length = audio
+                    result["audio"] = worker.out_ring.read(offset, length)
+                    worker.requests.put(("release", offset))
+                timings = result.get("timings") if result else None
+                if timings and "worker_ms" in timings:
+                    elapsed_ms = (time.time() - pending.submitted_at) * 1000
+                    timings["ipc_ms"] = max(elapsed_ms - timings.pop("worker_ms"), 0)
+                self._settle(pending, result=result)
+
+    @staticmethod
+    def _add_pending(worker: _Worker, job_id: int, pending: _Pending):
+        """Track a job on ``worker``; refused at once if it died (nothing would answer)."""
+        with worker.lock:
+            if not worker.alive:
+                raise OverloadedError("pipeline worker %d died" % worker.index)
+            worker.pending[job_id] = pending
+
+    def _fail_pending(self, worker: _Worker, error: BaseException):
+        with worker.lock:
+            pending = list(worker.pending.values())
+            worker.pending.clear()
+        for p in pending:
+            self._settle(p, error=error)
+
+    @staticmethod
+    def _settle(pending: _Pending, result=None, error: BaseException | None = None):
+        def _set():
+            if pending.future.done():
+                return
+            if error is not None:
+                pending.future.set_exception(error)
+            else:
+                pending.future.set_result(result)
+        try:
+            pending.loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            pass  # event loop already closed
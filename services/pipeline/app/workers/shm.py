@@ -0,0 +1,62 @@
+"""Shared-memory ring for passing audio between processes without pickling."""
+
+import threading
+from multiprocessing import shared_memory
+
+
+class ShmRing:
+    """Region allocator over one SharedMemory block.
+
+    The writer copies a payload into a free region and sends only
+    ``(offset, length)`` through the control queue; the reader copies it out
+    and the region is released once the reader is done with it.
+    """
+
+    def __init__(self, size: int = 0, name: str | None = None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+        else:
+            # Spawned workers share the creator's resource tracker, so attaching
+            # only re-registers a block it already tracks; the creator unlinks it.
+            self.shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self.size = self.shm.size
+        self._head = 0
+        self._in_use: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _overlaps(self, start: int, end: int) -> bool:
+        return any(start < off + n and off < end for off, n in self._in_use.items())
+
+    def write(self, data: bytes | memoryview) -> tuple[int, int]:
+        """Copy ``data`` into a free region. Raises BufferError when full."""
+        length = len(data)
+        if length == 0:
+            return 0, 0
+        with self._lock:
+            start = self._head
+            if start + length > self.size:
+                start = 0
+            if start + length > self.size or self._overlaps(start, start + length):
+                raise BufferError("shared audio buffer full (%d bytes in flight)" % sum(self._in_use.values()))
+            self._in_use[start] = length
+            self._head = start + length
+        self.shm.buf[start:start + length] = data
+        return start, length
+
+    def read(self, offset: int, length: int) -> bytes:
+        return bytes(self.shm.buf[offset:offset + length])
+
+    def release(self, offset: int):
+        with self._lock:
+            self._in_use.pop(offset, None)
+
+    def close(self):
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
@@ -0,0 +1,164 @@
+"""Inference worker process: owns one PipelineOrchestrator, serves jobs from the front process."""
+
+import asyncio
+import logging
+import threading
+import time
+
+from ..config import settings
+from ..profiling import ProfileBusy
+from ..metrics import metrics
+from ..pipeline.orchestrator import PipelineOrchestrator
+from ..pipeline.runner import LocalRunner
+from ..pipeline.scheduler import OverloadedError, PipelineScheduler
+from ..ws.session import Session
+from .shm import ShmRing
+
+logger = logging.getLogger(__name__)
+
+
+def worker_main(index: int, requests, responses, in_shm_name: str, out_shm_name: str):
+    """Process entry point (spawned by WorkerPool)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] worker-" + str(index) + " %(name)s: %(message)s",
+    )
+    in_ring = ShmRing(name=in_shm_name)
+    out_ring = ShmRing(name=out_shm_name)
+    try:
+        asyncio.run(_serve(index, requests, responses, in_ring, out_ring))
+    finally:
+        in_ring.close()
+        out_ring.close()
+
+
+async def _serve(index: int, requests, responses, in_ring: ShmRing, out_ring: ShmRing):
+    loop = asyncio.get_running_loop()
+    runner = LocalRunner(
+        PipelineOrchestrator(),
+        PipelineScheduler(
+            workers=settings.scheduler_workers,
+            realtime_workers=settings.scheduler_realtime_workers,
+            max_queue=settings.scheduler_max_queue,
+            max_session_queue=settings.scheduler_max_session_queue,
+        ),
+    )
+    await asyncio.to_thread(runner.start)
+    sessions: dict[str, Session] = {}
+    # Vocabulary prefetches by session, cancelled when it closes
+    prefetches: dict[str, asyncio.Task] = {}
+    stopped = asyncio.Event()
+
+    async def _handle(kind: str, job_id: int, session_id: str, fields: dict, offset: int, length: int):
+        t_start = time.time()
+        session = sessions.get(session_id)
+        if session is None:
+            session = sessions[session_id] = Session(session_id=session_id)
+        for key, value in fields.items():
+            setattr(session, key, value)
+        audio = in_ring.read(offset, length)
+
+        try:
+            if kind == "realtime":
+                result = await runner.realtime(
+                    audio, session, on_vad_done=lambda: responses.put(("vad_done", job_id)),
+                )
+            else:
+                result = await runner.segment(audio, session)
+        except OverloadedError as e:
+            responses.put(("error", job_id, "overloaded", str(e)))
+            return
+        except Exception as e:
+            logger.exception("Worker job failed (%s): %s", kind, e)
+            responses.put(("error", job_id, "pipeline_error", str(e)))
+            return
+
+        if result and "timings" in result:
+            # Lets the front process tell queue transit apart from time spent here
+            result["timings"]["worker_ms"] = (time.time() - t_start) * 1000
+        if result and result.get("audio"):
+            try:
+                result["audio"] = ("shm",) + out_ring.write(result["audio"])
+            except BufferError:
+                pass  # ring full — this one result goes through the queue pickled
+        responses.put(("result", job_id, result))
+
+    def _reader():
+        while True:
+            msg = requests.get()
+            kind = msg[0]
+            if kind == "stop":
+                loop.call_soon_threadsafe(stopped.set)
+                return
+            if kind == "release":
+                out_ring.release(msg[1])
+            elif kind == "status":
+                asyncio.run_coroutine_threadsafe(_status(msg[1]), loop)
+            elif kind == "tm_add":
+                asyncio.run_coroutine_threadsafe(_tm_add(*msg[1:]), loop)
+            elif kind == "load":
+                asyncio.run_coroutine_threadsafe(_load(msg[1]), loop)
+            elif kind == "prefetch":
+                loop.call_soon_threadsafe(_start_prefetch, *msg[1:])
+            elif kind == "profile":
+                asyncio.run_coroutine_threadsafe(_profile(*msg[1:]), loop)
+            elif kind == "metrics":
+                responses.put(("result", msg[1], {"families": metrics.collect()}))
+            elif kind == "close":
+                loop.call_soon_threadsafe(_close, msg[1])
+            else:
+                asyncio.run_coroutine_threadsafe(_handle(*msg), loop)
+
+    async def _status(job_id: int):
+        responses.put(("result", job_id, {"models": await runner.models()}))
+
+    async def _load(job_id: int):
+        responses.put(("result", job_id, await runner.load()))
+
+    async def _tm_add(job_id: int, entries: list[dict]):
+        # Off the reader thread: indexing a large batch would hold up every job behind it
+        added = await asyncio.to_thread(runner.pipeline.add_translations, entries, persist=False)
+        responses.put(("result", job_id, {"added": added}))
+
+    def _start_prefetch(job_id: int, session_id: str, fields: dict, terms: list[str]):
+        session = sessions.get(session_id)
+        if session is None:
+            session = sessions[session_id] = Session(session_id=session_id)
+        for key, value in fields.items():
+            setattr(session, key, value)
+        previous = prefetches.pop(session_id, None)
+        if previous is not None:
+            previous.cancel()
+        prefetches[session_id] = asyncio.create_task(_prefetch(job_id, session, terms))
+
+    async def _prefetch(job_id: int, session: Session, terms: list[str]):
+        try:
+            responses.put(("result", job_id, {"prefetched": await runner.prefetch(session, terms)}))
+        except asyncio.CancelledError:
+            # Session closed (or a newer vocabulary replaced this one)
+            responses.put(("error", job_id, "cancelled", "prefetch cancelled"))
+        finally:
+            if prefetches.get(session.session_id) is asyncio.current_task():
+                del prefetches[session.session_id]
+
+    async def _profile(job_id: int, seconds: float, with_torch: bool):
+        try:
+            responses.put(("result", job_id, {"folded": await runner.profile(seconds, with_torch)}))
+        except ProfileBusy as e:
+            responses.put(("error", job_id, "busy", str(e)))
+        except Exception as e:
+            responses.put(("error", job_id, "profile_error", str(e)))
+
+    def _close(session_id: str):
+        sessions.pop(session_id, None)
+        task = prefetches.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        runner.close_session(session_id)
+
+    threading.Thread(target=_reader, name="worker-requests", daemon=True).start()
+    responses.put(("ready", index))
+    logger.info("Worker %d ready", index)
+
+    await stopped.wait()
+    runner.shutdown()
@@ -0,0 +1,139 @@
+"""Broadcast rooms: one publisher session's results fanned out to many listeners.
+
+The publisher is a normal session (its audio runs through the pipeline
+once); every batch of events it is sent is also published to its room.
+Each listener has its own bounded queue and sender task. When a listener
+falls behind, its oldest undelivered batches are dropped, so a slow
+device never holds up the publisher or the other listeners.
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+from ..metrics import metrics
+from .protocol import serialize_frame, serialize_message, AudioDone, RoomUpdate
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_DROPPED = metrics.counter(
+    "pipeline_broadcast_dropped_total", "Broadcast batches dropped because a listener fell behind.")
+
+
+class Broadcast:
+    """One published batch of events (+ TTS audio), serialized at most once per protocol."""
+
+    __slots__ = ("events", "audio", "_frames")
+
+    def __init__(self, events: list, audio: bytes = b""):
+        self.events = events
+        self.audio = audio
+        self._frames: dict[str, list[str | bytes]] = {}
+
+    def frames(self, protocol: str) -> list[str | bytes]:
+        """WebSocket messages for ``protocol``: text for JSON events, bytes for audio/frames."""
+        frames = self._frames.get(protocol)
+        if frames is None:
+            if protocol == "binary":
+                frames = [serialize_frame(self.events, self.audio)]
+            else:
+                frames = []
+                for msg in self.events:
+                    if self.audio and isinstance(msg, AudioDone):
+                        frames.append(self.audio)
+                    frames.append(serialize_message(msg))
+            self._frames[protocol] = frames
+        return frames
+
+
+class Subscriber:
+    def __init__(self, room_id: str, session_id: str, limit: int):
+        self.room_id = room_id
+        self.session_id = session_id
+        self._queue: deque[Broadcast] = deque(maxlen=max(limit, 1))
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, item: Broadcast):
+        if len(self._queue) == self._queue.maxlen:
+            # deque(maxlen) evicts the oldest on append
+            self.dropped += 1
+            BROADCAST_DROPPED.inc()
+        self._queue.append(item)
+        self._event.set()
+
+    async def get(self) -> Broadcast:
+        while not self._queue:
+            self._event.clear()
+            await self._event.wait()
+        return self._queue.popleft()
+
+
+class Room:
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.publisher: str | None = None  # publisher session_id
+        self.listeners: dict[str, Subscriber] = {}
+
+    def publish(self, item: Broadcast):
+        for sub in self.listeners.values():
+            sub.push(item)
+
+    def status(self) -> Broadcast:
+        return Broadcast([RoomUpdate(
+            room_id=self.room_id, publisher=self.publisher is not None, listeners=len(self.listeners),
+        )])
+
+
+class RoomRegistry:
+    """All broadcast rooms on this node (event-loop thread only)."""
+
+    def __init__(self):
+        self._rooms: dict[str, Room] = {}
+        metrics.callback("pipeline_broadcast_listeners", "Listener sessions subscribed to broadcast rooms.",
+                         lambda: sum(len(r.listeners) for r in self._rooms.values()))
+        metrics.callback("pipeline_broadcast_rooms", "Broadcast rooms with a publisher or listeners.",
+                         lambda: len(self._rooms))
+
+    def get(self, room_id: str) -> Room | None:
+        return self._rooms.get(room_id)
+
+    def claim(self, room_id: str, session_id: str) -> Room | None:
+        """Make ``session_id`` the room's publisher; None if another session already is."""
+        room = self._rooms.setdefault(room_id, Room(room_id))
+        if room.publisher not in (None, session_id):
+            return None
+        room.publisher = session_id
+        room.publish(room.status())
+        logger.info("Room %s: publisher %s (%d listeners)", room_id, session_id, len(room.listeners))
+        return room
+
+    def subscribe(self, room_id: str, session_id: str, limit: int) -> tuple[Room, Subscriber]:
+        room = self._rooms.setdefault(room_id, Room(room_id))
+        sub = room.listeners[session_id] = Subscriber(room_id, session_id, limit)
+        sub.push(room.status())
+        return room, sub
+
+    def leave(self, room_id: str, session_id: str):
+        room = self._rooms.get(room_id)
+        if room is None:
+            return
+        if room.publisher == session_id:
+            room.publisher = None
+            room.publish(room.status())
+            logger.info("Room %s: publisher left", room_id)
+        sub = room.listeners.pop(session_id, None)
+        if sub is not None and sub.dropped:
+            logger.info("Room %s: listener %s left, %d batches dropped", room_id, session_id, sub.dropped)
+        if room.publisher is None and not room.listeners:
+            del self._rooms[room_id]
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "room_id": r.room_id,
+                "listeners": len(r.listeners),
+                "dropped": sum(s.dropped for s in r.listeners.values()),
+            }
+            for r in self._rooms.values()
+        ]
@@ -0,0 +1,95 @@
+"""Traffic capture: a session's incoming WebSocket frames, with arrival times, in one file.
+
+Layout (little-endian), one file per session, append-only:
+  b"WSC1" | uint32 header length | JSON header (session_id, started_at)
+  then per frame: uint8 kind | float64 seconds since connect | uint32 length | payload
+
+``kind`` is KIND_BINARY (audio, exactly as received: client timestamp
+prefix and compressed codecs included) or KIND_TEXT (a UTF-8 control
+message). scripts/replay_capture.py plays captures back into /ws or
+straight into the orchestrator.
+
+The handler calls ``CaptureWriter.add`` on the event loop, which only
+appends to a buffer. Full buffers go to ``flush``, which the handler runs
+on a single writer thread, so one session's writes stay in order.
+"""
+
+import json
+import logging
+import struct
+import time
+from pathlib import Path
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WSC1"
+_HEAD = struct.Struct("<4sI")
+_RECORD = struct.Struct("<BdI")
+KIND_BINARY = 0
+KIND_TEXT = 1
+_FLUSH_BYTES = 256 * 1024
+
+
+class CaptureWriter:
+    def __init__(self, directory: str, session_id: str, max_mb: int = 200):
+        self.path = Path(directory) / ("%s.wsc" % session_id)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.started = time.monotonic()
+        self.size = 0
+        self.full = False
+        header = json.dumps({"session_id": session_id, "started_at": round(time.time(), 3)}).encode("utf-8")
+        self._buffer = bytearray(_HEAD.pack(MAGIC, len(header)) + header)
+
+    def add(self, kind: int, payload: bytes | str) -> bytes | None:
+        """Record one frame; returns a buffer to ``flush`` once enough has built up."""
+        if self.full:
+            return None
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        if self.size + len(self._buffer) + _RECORD.size + len(payload) > self.max_bytes:
+            self.full = True
+            logger.warning("Capture %s reached %d MB, not recording the rest", self.path.name,
+                           self.max_bytes // (1024 * 1024))
+            return self.take()
+        self._buffer += _RECORD.pack(kind, time.monotonic() - self.started, len(payload))
+        self._buffer += payload
+        if len(self._buffer) >= _FLUSH_BYTES:
+            return self.take()
+        return None
+
+    def take(self) -> bytes | None:
+        """Whatever is buffered (None if nothing), for ``flush``."""
+        if not self._buffer:
+            return None
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self.size += len(data)
+        return data
+
+    def flush(self, data: bytes):
+        """Append ``data`` to the file (writer thread)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+
+def read_capture(path: str | Path) -> tuple[dict, Iterator[tuple[int, float, bytes]]]:
+    """The capture's header and an iterator over its (kind, seconds since connect, payload) frames."""
+    data = Path(path).read_bytes()
+    magic, header_len = _HEAD.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("%s is not a traffic capture" % path)
+    header = json.loads(data[_HEAD.size:_HEAD.size + header_len])
+
+    def _frames():
+        offset = _HEAD.size + header_len
+        while offset + _RECORD.size <= len(data):
+            kind, t_rel, length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            if offset + length > len(data):
+                break  # truncated by a crash mid-write
+            yield kind, t_rel, data[offset:offset + length]
+            offset += length
+
+    return header, _frames()
@@ -0,0 +1,230 @@
+"""Input audio decoding: compressed or non-16kHz mic audio → 16kHz int16 PCM.
+
+Codecs accepted in ``session.create`` (``input_codec``):
+  pcm16  raw int16 mono PCM at ``input_sample_rate`` (default 16000)
+  opus   raw Opus packets, one per WebSocket message (e.g. WebCodecs AudioEncoder)
+  webm   WebM/Opus stream as produced by MediaRecorder, sent in any slicing
+
+Each session gets its own decoder object (Opus and resampler state carry
+over between messages). Decoders are not thread-safe; the handler runs one
+session's messages through them in order on a small thread pool.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CODECS = ("pcm16", "opus", "webm")
+TARGET_RATE = 16000
+
+
+def _lowpass_taps(cutoff: float, taps: int = 31) -> np.ndarray:
+    """Windowed-sinc FIR lowpass; ``cutoff`` as a fraction of the input Nyquist."""
+    n = np.arange(taps) - (taps - 1) / 2
+    h = np.sinc(cutoff * n) * np.hamming(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+class StreamResampler:
+    """Vectorized linear-interpolation resampler that is continuous across chunks.
+
+    Downsampling first runs an anti-aliasing FIR lowpass, also with state
+    carried between chunks.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int = TARGET_RATE):
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.step = src_rate / dst_rate
+        self._taps = _lowpass_taps(dst_rate / src_rate) if src_rate > dst_rate else None
+        self._history = np.zeros(0 if self._taps is None else len(self._taps) - 1, dtype=np.float32)
+        self._tail = np.zeros(0, dtype=np.float32)  # last input sample of the previous chunk
+        self._pos = 0.0  # next output position, in input samples from the start of _tail
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """float32 samples at src_rate → float32 samples at dst_rate."""
+        if self.src_rate == self.dst_rate:
+            return samples
+        if self._taps is not None:
+            padded = np.concatenate((self._history, samples))
+            self._history = padded[len(padded) - len(self._history):]
+            samples = np.convolve(padded, self._taps, mode="valid").astype(np.float32)
+
+        x = np.concatenate((self._tail, samples))
+        last = len(x) - 1
+        if last < 1 or self._pos > last:
+            self._tail = x
+            return np.zeros(0, dtype=np.float32)
+        count = int((last - self._pos) // self.step) + 1
+        positions = self._pos + np.arange(count) * self.step
+        out = np.interp(positions, np.arange(len(x)), x).astype(np.float32)
+        # x[last] becomes index 0 of the next chunk
+        self._pos += count * self.step - last
+        self._tail = x[last:]
+        return out
+
+
+def _to_int16(audio: np.ndarray) -> np.ndarray:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class PcmDecoder:
+    """int16 PCM at any sample rate → 16kHz."""
+
+    def __init__(self, sample_rate: int):
+        self.resampler = StreamResampler(sample_rate)
+        self._odd = b""
+
+    def decode(self, data: bytes | memoryview) -> np.ndarray:
+        data = self._odd + bytes(data)
+        cut = len(data) - len(data) % 2
+        self._odd = data[cut:]
+        audio = np.frombuffer(data[:cut], dtype=np.int16).astype(np.float32) / 32768.0
+        return _to_int16(self.resampler.process(audio))
+
+
+# Matroska element IDs the WebM reader cares about
+_CONTAINERS = {0x18538067, 0x1F43B675, 0x1654AE6B, 0xAE, 0xA0}  # Segment, Cluster, Tracks, TrackEntry, BlockGroup
+_SIMPLE_BLOCK = 0xA3
+_BLOCK = 0xA1
+_CODEC_PRIVATE = 0x63A2
+
+
+def _read_vint(buf: bytearray, pos: int, keep_marker: bool) -> tuple[int, int] | None:
+    """EBML variable-length integer at ``pos`` → (value, length), or None if incomplete."""
+    if pos >= len(buf):
+        return None
+    first = buf[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError("invalid EBML vint")
+    if pos + length > len(buf):
+        return None
+    value = first if keep_marker else first & (0xFF >> length)
+    for b in buf[pos + 1:pos + length]:
+        value = (value << 8) | b
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = -1  # unknown size
+    return value, length
+
+
+class WebmOpusReader:
+    """Incremental WebM parser yielding Opus packets from SimpleBlocks.
+
+    Handles the unknown-size Segment/Cluster elements MediaRecorder writes
+    for live streams. Container elements are entered, everything else is
+    skipped once complete.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.codec_private: bytes | None = None
+        self._laced_warned = False
+
+    def feed(self, data: bytes | memoryview) -> list[bytes]:
+        self._buf.extend(data)
+        packets = []
+        pos = 0
+        buf = self._buf
+        while True:
+            elem_id = _read_vint(buf, pos, keep_marker=True)
+            if elem_id is None:
+                break
+            size = _read_vint(buf, pos + elem_id[1], keep_marker=False)
+            if size is None:
+                break
+            header = elem_id[1] + size[1]
+            if elem_id[0] in _CONTAINERS:
+                pos += header
+                continue
+            if size[0] < 0 or pos + header + size[0] > len(buf):
+                break
+            body = bytes(buf[pos + header:pos + header + size[0]])
+            pos += header + size[0]
+            if elem_id[0] in (_SIMPLE_BLOCK, _BLOCK):
+                packet = self._block_payload(body)
+                if packet:
+                    packets.append(packet)
+            elif elem_id[0] == _CODEC_PRIVATE:
+                self.codec_private = body
+        del buf[:pos]
+        return packets
+
+    def _block_payload(self, body: bytes) -> bytes | None:
+        track = _read_vint(bytearray(body[:8]), 0, keep_marker=False)
+        if track is None:
+            return None
+        flags = body[track[1] + 2]
+        if flags & 0x06:
+            if not self._laced_warned:
+                logger.warning("Laced WebM blocks are not supported; dropping them")
+                self._laced_warned = True
+            return None
+        return body[track[1] + 3:]
+
+
+class OpusDecoder:
+    """Opus (raw packets or WebM/Opus) → 16kHz int16, via PyAV's libavcodec decoder."""
+
+    def __init__(self, container: str = "raw"):
+        try:
+            import av
+        except ImportError as e:
+            raise ValueError("Opus input needs PyAV (pip install av)") from e
+        self._av = av
+        self._reader = WebmOpusReader() if container == "webm" else None
+        self._codec = None
+        self.resampler = StreamResampler(48000)
+
+    def _open(self, extradata: bytes | None):
+        codec = self._av.CodecContext.create("opus", "r")
+        codec.sample_rate = 48000
+        if extradata:
+            codec.extradata = extradata
+        self._codec = codec
+
+    def decode(self, data: bytes | memoryview) -> np.ndarray:
+        packets = self._reader.feed(data) if self._reader is not None else [bytes(data)]
+        if not packets:
+            return np.zeros(0, dtype=np.int16)
+        if self._codec is None:
+            self._open(self._reader.codec_private if self._reader is not None else None)
+
+        pieces = []
+        for packet in packets:
+            for frame in self._codec.decode(self._av.Packet(packet)):
+                if frame.sample_rate != self.resampler.src_rate:
+                    self.resampler = StreamResampler(frame.sample_rate)
+                pieces.append(_frame_to_mono(frame))
+        if not pieces:
+            return np.zeros(0, dtype=np.int16)
+        return _to_int16(self.resampler.process(np.concatenate(pieces)))
+
+
+def _frame_to_mono(frame) -> np.ndarray:
+    """Decoded AudioFrame → float32 mono samples in [-1, 1]."""
+    arr = frame.to_ndarray()
+    channels = len(frame.layout.channels)
+    if frame.format.is_planar:
+        mono = arr.mean(axis=0) if channels > 1 else arr[0]
+    else:
+        mono = arr.reshape(-1, channels).mean(axis=1)
+    if mono.dtype.kind == "i":
+        mono = mono / float(np.iinfo(arr.dtype).max + 1)
+    return mono.astype(np.float32, copy=False)
+
+
+def make_decoder(codec: str, sample_rate: int = TARGET_RATE):
+    """Decoder for a session's input; None when the input is already 16kHz PCM.
+
+    Raises ValueError for unknown codecs or when a codec's library is missing.
+    """
+    if codec == "pcm16":
+        return None if sample_rate == TARGET_RATE else PcmDecoder(sample_rate)
+    if codec in ("opus", "webm"):
+        return OpusDecoder("webm" if codec == "webm" else "raw")
+    raise ValueError("Unsupported input_codec %r (expected one of %s)" % (codec, ", ".join(CODECS)))
@@ -2,7 +2,9 @@
 
 import asyncio
 import logging
+import struct
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import WebSocket, WebSocketDisconnect
 
@@ -21,29 +23,80 @@ from .protocol import (
     AudioDone,
     ErrorMessage,
 )
+from .results import OrderedResults, ResultsClosed
+from .broadcast import Broadcast, Room, RoomRegistry, Subscriber
+from .capture import KIND_BINARY, KIND_TEXT, CaptureWriter
 from .session import Session
+from ..config import settings
+from ..metrics import ACTIVE_SESSIONS, INGEST_BACKPRESSURE_SECONDS, REQUEST_LATENCY
+from ..pipeline.scheduler import OverloadedError
+from ..tracing import Trace
+from ..transcripts import TranscriptLog
 
 logger = logging.getLogger(__name__)
 
 
+def _vocabulary(terms) -> list[str]:
+    """session.create vocabulary: distinct non-empty strings, capped by the settings."""
+    if not isinstance(terms, list):
+        return []
+    seen = {}
+    for term in terms:
+        if isinstance(term, str) and 0 < len(term.strip()) <= settings.vocabulary_max_chars:
+            seen.setdefault(term.strip(), None)
+    return list(seen)[:settings.vocabulary_max_terms]
+
+
+class Connection:
+    """State of one WebSocket connection; the handler itself is shared by all of them."""
+
+    def __init__(self, ws: WebSocket, session: Session, max_pending_chunks: int):
+        self.ws = ws
+        self.session = session
+        self.results = OrderedResults(max_pending_chunks)
+        # In-flight realtime chunk tasks (kept referenced so they are not garbage-collected)
+        self.tasks: set[asyncio.Task] = set()
+        # Broadcast: the room this session publishes to, or the listener's sender task
+        self.room: Room | None = None
+        self.listener_task: asyncio.Task | None = None
+        # Incoming frames recorded for replay (settings.capture_dir)
+        self.capture: CaptureWriter | None = None
+        # Background translation/TTS of the session.create vocabulary
+        self.prefetch_task: asyncio.Task | None = None
+
+
 class ConnectionHandler:
-    def __init__(self, pipeline):
-        self.pipeline = pipeline
+    def __init__(self, runner, transcripts: TranscriptLog | None = None):
+        self.runner = runner
+        self.transcripts = transcripts
+        self.rooms = RoomRegistry()
+        # Decoding compressed / resampling non-16kHz mic input, off the event loop
+        self._decode_pool = ThreadPoolExecutor(max(settings.decode_workers, 1), thread_name_prefix="decode")
+        # One thread, so each capture file is appended to in order
+        self._capture_pool = ThreadPoolExecutor(1, thread_name_prefix="capture") if settings.capture_dir else None
+
+    def close(self):
+        self._decode_pool.shutdown(wait=False, cancel_futures=True)
+        if self._capture_pool is not None:
+            # Let pending capture writes finish
+            self._capture_pool.shutdown(wait=True)
+
+    def _capture(self, conn: Connection, kind: int, payload: bytes | str):
+        data = conn.capture.add(kind, payload)
+        if data is not None:
+            self._capture_pool.submit(conn.capture.flush, data)
 
     async def handle(self, ws: WebSocket):
         await ws.accept()
-        session = Session()
+        conn = Connection(ws, Session(), settings.ws_max_pending_chunks)
+        session = conn.session
         logger.info("WebSocket connected: %s", session.session_id)
-
-        # Queue for ordered realtime results: (seq, future)
-        self._send_lock = asyncio.Lock()
-        self._realtime_seq = 0
-        self._next_send_seq = 0
-        self._pending_results: dict[int, dict | None] = {}
-        self._pending_event = asyncio.Event()
+        ACTIVE_SESSIONS.inc()
+        if self._capture_pool is not None:
+            conn.capture = CaptureWriter(settings.capture_dir, session.session_id, settings.capture_max_mb)
 
         # Start the ordered sender task
-        sender_task = asyncio.create_task(self._ordered_sender(ws, session))
+        sender_task = asyncio.create_task(self._ordered_sender(conn))
 
         try:
             while True:
@@ -53,171 +106,343 @@ class ConnectionHandler:
                     break
 
                 if raw.get("bytes"):
-                    await self._handle_audio(ws, session, raw["bytes"])
+                    if conn.capture is not None:
+                        self._capture(conn, KIND_BINARY, raw["bytes"])
+                    await self._handle_audio(conn, raw["bytes"])
                 elif raw.get("text"):
-                    await self._handle_text(ws, session, raw["text"])
+                    if conn.capture is not None:
+                        self._capture(conn, KIND_TEXT, raw["text"])
+                    await self._handle_text(conn, raw["text"])
 
         except (WebSocketDisconnect, RuntimeError):
             pass
+        except ResultsClosed:
+            # The sender failed (usually the client went away mid-send): nothing more can reach it
+            try:
+                await ws.close(code=1011)
+            except (RuntimeError, OSError):
+                pass
         except Exception as e:
             logger.exception("WebSocket error: %s", e)
             try:
-                await ws.send_text(serialize_message(
-                    ErrorMessage(code="internal_error", message=str(e))
-                ))
+                await self._send(conn, [ErrorMessage(code="internal_error", message=str(e))])
             except Exception:
                 pass
         finally:
+            ACTIVE_SESSIONS.dec()
+            self._leave_room(conn)
+            self.runner.close_session(session.session_id)
+            if conn.capture is not None:
+                data = conn.capture.take()
+                if data is not None:
+                    self._capture_pool.submit(conn.capture.flush, data)
+            if self.transcripts is not None:
+                self.transcripts.end_session(session.session_id)
+            for task in list(conn.tasks):
+                task.cancel()
+            if conn.prefetch_task is not None:
+                conn.prefetch_task.cancel()
             sender_task.cancel()
             try:
                 await sender_task
             except asyncio.CancelledError:
                 pass
 
-    async def _handle_text(self, ws: WebSocket, session: Session, text: str):
+    async def _handle_text(self, conn: Connection, text: str):
+        ws, session = conn.ws, conn.session
         try:
             msg = parse_client_message(text)
         except ValueError as e:
-            await ws.send_text(serialize_message(
-                ErrorMessage(code="invalid_message", message=str(e))
-            ))
+            await self._send(conn, [ErrorMessage(code="invalid_message", message=str(e))])
             return
 
         if isinstance(msg, SessionCreate):
-            session.source_lang = msg.source_lang
-            session.target_lang = msg.target_lang
-            session.voice = msg.voice
-            session.denoise = msg.denoise
+            errors = session.configure(msg)
+            # Always JSON: tells the client which protocol the rest of the session uses
             await ws.send_text(serialize_message(
-                SessionCreated(session_id=session.session_id)
+                SessionCreated(session_id=session.session_id, protocol=session.protocol)
             ))
+            for error in errors:
+                await self._send(conn, [error])
+            await self._join_room(conn, msg.role, msg.room_id)
+            terms = _vocabulary(msg.vocabulary)
+            if terms and session.role != "listener":
+                self._start_prefetch(conn, terms)
 
         elif isinstance(msg, InputAudioStart):
             session.is_recording = True
-            session.audio_buffer.clear()
+            session.ingest.clear()
 
         elif isinstance(msg, InputAudioStop):
             session.is_recording = False
             audio_data = session.clear_buffer()
-            if audio_data:
-                await self._process_audio_segment(ws, session, audio_data)
+            if len(audio_data):
+                trace = Trace(session.session_id, "ptt", session.last_captured_at, time.time())
+                await self._process_audio_segment(conn, audio_data, trace)
 
         elif isinstance(msg, SessionClose):
             await ws.close()
 
-    async def _handle_audio(self, ws: WebSocket, session: Session, data: bytes):
+    def _start_prefetch(self, conn: Connection, terms: list[str]):
+        """Prefetch a (new) vocabulary in the background; a previous one still running is dropped."""
+        if conn.prefetch_task is not None:
+            conn.prefetch_task.cancel()
+        conn.prefetch_task = asyncio.create_task(self._prefetch(conn, terms))
+
+    async def _prefetch(self, conn: Connection, terms: list[str]):
+        t0 = time.time()
+        try:
+            done = await self.runner.prefetch(conn.session, terms)
+        except OverloadedError as e:
+            logger.info("Vocabulary prefetch for %s refused: %s", conn.session.session_id, e)
+            return
+        except Exception as e:
+            logger.warning("Vocabulary prefetch for %s failed: %s", conn.session.session_id, e)
+            return
+        logger.info("Vocabulary prefetched for %s: %d/%d terms in %.1fs",
+                    conn.session.session_id, done, len(terms), time.time() - t0)
+
+    async def _join_room(self, conn: Connection, role: str, room_id: str):
+        """Apply the broadcast role from session.create (a refused publisher stays a plain session)."""
+        self._leave_room(conn)
+        session = conn.session
+        session.role = role if role in ("publisher", "listener") and room_id else ""
+        session.room_id = room_id if session.role else ""
+        if session.role == "publisher":
+            conn.room = self.rooms.claim(room_id, session.session_id)
+            if conn.room is None:
+                session.role = session.room_id = ""
+                await self._send(conn, [ErrorMessage(
+                    code="room_taken", message="room %s already has a publisher" % room_id,
+                )])
+        elif session.role == "listener":
+            _, sub = self.rooms.subscribe(room_id, session.session_id, settings.broadcast_listener_queue)
+            conn.listener_task = asyncio.create_task(self._listen(conn, sub))
+
+    def _leave_room(self, conn: Connection):
+        if conn.session.room_id:
+            self.rooms.leave(conn.session.room_id, conn.session.session_id)
+        conn.room = None
+        if conn.listener_task is not None:
+            conn.listener_task.cancel()
+            conn.listener_task = None
+
+    async def _listen(self, conn: Connection, sub: Subscriber):
+        """Listener sender: push the room's batches to this socket, at its own pace."""
+        try:
+            while True:
+                item = await sub.get()
+                await self._send_frames(conn.ws, item.frames(conn.session.protocol))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.info("Listener %s stopped: %s", conn.session.session_id, e)
+
+    async def _handle_audio(self, conn: Connection, data: bytes):
+        session = conn.session
+        if session.role == "listener":
+            return
+        session.last_received_at = time.time()
+        if session.client_timestamps and len(data) >= 8:
+            (captured_ms,) = struct.unpack_from("<d", data)
+            session.last_captured_at = captured_ms / 1000
+            data = memoryview(data)[8:]
+        if session.decoder is not None:
+            # Frames of one session are decoded in order: the receive loop waits here
+            try:
+                data = await asyncio.get_running_loop().run_in_executor(
+                    self._decode_pool, session.decoder.decode, data)
+            except Exception as e:
+                logger.warning("Session %s: undecodable audio frame: %s", session.session_id, e)
+                await self._send(conn, [ErrorMessage(code="decode_error", message=str(e))])
+                return
+            if not len(data):
+                return
         session.append_audio(data)
 
         if not session.is_recording:
-            chunk_size = 16000  # 500ms of 16-bit 16kHz mono
-            if len(session.audio_buffer) >= chunk_size:
-                audio_data = session.clear_buffer()
+            # Coalesce: while this session's VAD job is in flight, keep buffering
+            # so the next job picks up everything at once (also keeps VAD in order)
+            if len(session.ingest) >= session.chunk_samples and not session.vad_inflight:
+                # Backpressure: with too many results unsent, stop reading until the sender catches up
+                if conn.results.full():
+                    t0 = time.time()
+                    seq = await conn.results.reserve()
+                    INGEST_BACKPRESSURE_SECONDS.inc(time.time() - t0)
+                else:
+                    seq = await conn.results.reserve()
+                # Whole VAD windows only; the partial one waits for the next chunk
+                audio_data = session.take_chunk()
+                session.vad_inflight = True
                 # Fire and forget — ordered sender handles sequence
-                seq = self._realtime_seq
-                self._realtime_seq += 1
-                asyncio.create_task(self._process_realtime_parallel(seq, audio_data, session))
+                trace = Trace(session.session_id, "realtime", session.last_captured_at, session.last_received_at)
+                task = asyncio.create_task(self._process_realtime_parallel(conn, seq, audio_data, trace))
+                conn.tasks.add(task)
+                task.add_done_callback(conn.tasks.discard)
 
-    async def _process_realtime_parallel(self, seq: int, audio_data: bytes, session: Session):
+    async def _process_realtime_parallel(self, conn: Connection, seq: int, audio_data: bytes, trace: Trace):
         """Process audio chunk in parallel, store result by sequence number."""
+        session = conn.session
         try:
             t_start = time.time()
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.pipeline.process_realtime,
-                audio_data,
-                session,
-            )
+
+            def _vad_done():
+                session.vad_inflight = False
+
+            try:
+                result = await self.runner.realtime(audio_data, session, on_vad_done=_vad_done)
+            finally:
+                session.vad_inflight = False
 
             if result is not None:
-                result["_elapsed_ms"] = (time.time() - t_start) * 1000
+                result["_ready_at"] = time.time()
+                result["_elapsed_ms"] = (result["_ready_at"] - t_start) * 1000
+                if result.get("transcript"):
+                    REQUEST_LATENCY.observe(result["_elapsed_ms"] / 1000, mode="realtime")
+                    trace.utterance_id = result.get("utterance_id", "")
+                    trace.merge(result.get("timings", {}))
+                    result["_trace"] = trace
+
+            conn.results.put(seq, result)
 
-            self._pending_results[seq] = result
-            self._pending_event.set()
+        except OverloadedError as e:
+            logger.warning("Pipeline overloaded (seq=%d): %s", seq, e)
+            conn.results.put(seq, {"error": ErrorMessage(code="overloaded", message=str(e))})
+
+        except asyncio.CancelledError:
+            conn.results.put(seq, None)
+            raise
 
         except Exception as e:
             logger.exception("Pipeline error (seq=%d): %s", seq, e)
-            self._pending_results[seq] = None
-            self._pending_event.set()
+            conn.results.put(seq, None)
 
-    async def _ordered_sender(self, ws: WebSocket, session: Session):
+    async def _ordered_sender(self, conn: Connection):
         """Send realtime results to client in order."""
         try:
             while True:
-                await self._pending_event.wait()
-                self._pending_event.clear()
-
-                # Send all consecutive ready results
-                while self._next_send_seq in self._pending_results:
-                    result = self._pending_results.pop(self._next_send_seq)
-                    self._next_send_seq += 1
-
+                result = await conn.results.get()
+                try:
                     if result is None:
                         continue
 
+                    if result.get("error"):
+                        await self._send(conn, [result["error"]])
+                        continue
+
                     elapsed_ms = result.get("_elapsed_ms", 0)
+                    trace = result.get("_trace")
+                    if trace is not None:
+                        trace.since("order_wait_ms", result["_ready_at"])
 
+                    events = []
                     if result.get("speech_start"):
-                        await ws.send_text(serialize_message(VadSpeechStart()))
+                        events.append(VadSpeechStart())
 
                     if result.get("speech_end"):
-                        await ws.send_text(serialize_message(VadSpeechEnd()))
-
-                    if result.get("transcript"):
-                        await ws.send_text(serialize_message(
-                            TranscriptDone(text=result["transcript"], processing_time_ms=round(elapsed_ms))
-                        ))
-
-                    if result.get("translation"):
-                        await ws.send_text(serialize_message(
-                            TranslationDone(text=result["translation"], processing_time_ms=round(elapsed_ms))
-                        ))
-
-                    if result.get("audio"):
-                        segment_id = session.next_segment_id()
-                        await ws.send_bytes(result["audio"])
-                        await ws.send_text(serialize_message(
-                            AudioDone(segment_id=segment_id, processing_time_ms=round(elapsed_ms))
-                        ))
+                        events.append(VadSpeechEnd())
+
+                    if trace is not None:
+                        await self._send_result(conn, result, elapsed_ms, trace, events)
                         logger.info("Realtime segment done in %.1fs", elapsed_ms / 1000)
+                    elif events:
+                        await self._send(conn, events)
+                finally:
+                    conn.results.task_done()
 
         except asyncio.CancelledError:
             pass
         except Exception as e:
             logger.exception("Ordered sender error: %s", e)
+        finally:
+            # Unblocks a receive loop waiting for a slot, so the connection is torn down
+            conn.results.close()
+
+    async def _send(self, conn: Connection, events: list, audio: bytes = b""):
+        """Send events (and the TTS audio of the audio.done among them) in the session's protocol.
+
+        JSON: one text message per event, the audio as a binary message right
+        before audio.done. Binary: everything in a single frame. A publisher's
+        batches are also queued for its room's listeners.
+        """
+        item = Broadcast(events, audio)
+        if conn.room is not None and not any(isinstance(m, ErrorMessage) for m in events):
+            # Queued for listeners first (never blocks), sharing the serialized frames
+            conn.room.publish(item)
+        await self._send_frames(conn.ws, item.frames(conn.session.protocol))
+
+    @staticmethod
+    async def _send_frames(ws: WebSocket, frames: list):
+        for frame in frames:
+            if isinstance(frame, bytes):
+                await ws.send_bytes(frame)
+            else:
+                await ws.send_text(frame)
+
+    async def _send_result(
+        self, conn: Connection, result: dict, elapsed_ms: float, trace: Trace, events: list | None = None,
+    ):
+        """Send transcript, translation and audio of one utterance, then record its trace."""
+        session = conn.session
+        t_send = time.time()
+        timings = trace.breakdown()
+        utterance_id = trace.utterance_id
+        events = events or []
+
+        if result.get("transcript"):
+            events.append(TranscriptDone(
+                text=result["transcript"], processing_time_ms=round(elapsed_ms),
+                utterance_id=utterance_id, timings=timings,
+            ))
+
+        if result.get("translation"):
+            events.append(TranslationDone(
+                text=result["translation"], processing_time_ms=round(elapsed_ms),
+                utterance_id=utterance_id, timings=timings,
+            ))
 
-    async def _process_audio_segment(self, ws: WebSocket, session: Session, audio_data: bytes):
+        if result.get("audio"):
+            events.append(AudioDone(
+                segment_id=session.next_segment_id(), processing_time_ms=round(elapsed_ms),
+                utterance_id=utterance_id, timings=timings,
+            ))
+
+        await self._send(conn, events, result.get("audio") or b"")
+        trace.since("send_ms", t_send)
+        trace.finish()
+        if self.transcripts is not None:
+            self.transcripts.append({
+                "ts": round(trace.dispatched_at, 3),
+                "session_id": session.session_id,
+                "utterance_id": utterance_id,
+                "mode": trace.mode,
+                "source_lang": session.source_lang,
+                "target_lang": session.target_lang,
+                "transcript": result.get("transcript", ""),
+                "translation": result.get("translation", ""),
+                "timings": trace.breakdown(),
+            }, result.get("audio") or b"")
+
+    async def _process_audio_segment(self, conn: Connection, audio_data: bytes, trace: Trace):
         """Process a complete audio segment (push-to-talk mode)."""
+        session = conn.session
         try:
             t_start = time.time()
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.pipeline.process_segment,
-                audio_data,
-                session,
-            )
+            result = await self.runner.segment(audio_data, session)
 
             elapsed_ms = (time.time() - t_start) * 1000
+            REQUEST_LATENCY.observe(elapsed_ms / 1000, mode="ptt")
 
             if result.get("transcript"):
-                await ws.send_text(serialize_message(
-                    TranscriptDone(text=result["transcript"], processing_time_ms=round(elapsed_ms))
-                ))
-
-            if result.get("translation"):
-                await ws.send_text(serialize_message(
-                    TranslationDone(text=result["translation"], processing_time_ms=round(elapsed_ms))
-                ))
-
-            if result.get("audio"):
-                segment_id = session.next_segment_id()
-                await ws.send_bytes(result["audio"])
-                await ws.send_text(serialize_message(
-                    AudioDone(segment_id=segment_id, processing_time_ms=round(elapsed_ms))
-                ))
+                trace.utterance_id = result.get("utterance_id", "")
+                trace.merge(result.get("timings", {}))
+                await self._send_result(conn, result, elapsed_ms, trace)
                 logger.info("PTT segment done in %.1fs", elapsed_ms / 1000)
 
+        except OverloadedError as e:
+            logger.warning("Pipeline overloaded (PTT): %s", e)
+            await self._send(conn, [ErrorMessage(code="overloaded", message=str(e))])
+
         except Exception as e:
             logger.exception("Pipeline error: %s", e)
-            await ws.send_text(serialize_message(
-                ErrorMessage(code="pipeline_error", message=str(e))
-            ))
+            await self._send(conn, [ErrorMessage(code="pipeline_error", message=str(e))])
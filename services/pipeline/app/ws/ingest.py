@@ -0,0 +1,81 @@
+"""Per-session audio ingest buffer handing out window-aligned numpy views."""
+
+import math
+
+import numpy as np
+
+# Silero VAD consumes 512-sample windows at 16kHz
+WINDOW_SAMPLES = 512
+
+
+def chunk_samples_for(chunk_ms: float, sample_rate: int = 16000) -> int:
+    """Samples per realtime chunk: ``chunk_ms`` rounded up to whole VAD windows."""
+    windows = max(math.ceil(chunk_ms / 1000 * sample_rate / WINDOW_SAMPLES), 1)
+    return windows * WINDOW_SAMPLES
+
+
+class IngestBuffer:
+    """Incoming PCM int16 audio, read back as views instead of copies.
+
+    Samples are appended to a preallocated block. ``take_windows`` returns a
+    view of all complete VAD windows and leaves the remainder for the next
+    chunk. Regions that were handed out are never written again: when the
+    block is full, the unread tail moves to a fresh block and the old one
+    stays alive for as long as views into it are in use.
+    """
+
+    def __init__(self, capacity_s: float = 30.0, sample_rate: int = 16000):
+        self.capacity = int(capacity_s * sample_rate)
+        self._buf = np.empty(0, dtype=np.int16)  # allocated on first write
+        self._start = 0
+        self._end = 0
+        self._odd = b""  # half a sample left over from a frame with an odd byte count
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def write(self, data: bytes | memoryview | np.ndarray):
+        if isinstance(data, np.ndarray):
+            # Already-decoded int16 samples (see codec.py)
+            samples = data
+        else:
+            samples = self._samples(data)
+        n = len(samples)
+        if self._end + n > len(self._buf):
+            self._roll_over(n)
+        self._buf[self._end:self._end + n] = samples
+        self._end += n
+
+    def _samples(self, data: bytes | memoryview) -> np.ndarray:
+        if self._odd or len(data) % 2:
+            data = self._odd + bytes(data)
+            cut = len(data) - len(data) % 2
+            self._odd = data[cut:]
+            data = data[:cut]
+        return np.frombuffer(data, dtype=np.int16)
+
+    def _roll_over(self, incoming: int):
+        unread = self._buf[self._start:self._end]
+        size = max(self.capacity, 2 * (len(unread) + incoming))
+        buf = np.empty(size, dtype=np.int16)
+        buf[:len(unread)] = unread
+        self._buf = buf
+        self._start = 0
+        self._end = len(unread)
+
+    def take_windows(self) -> np.ndarray:
+        """View of every complete window buffered; the partial window stays."""
+        n = len(self) - len(self) % WINDOW_SAMPLES
+        view = self._buf[self._start:self._start + n]
+        self._start += n
+        return view
+
+    def take_all(self) -> np.ndarray:
+        """View of everything buffered (push-to-talk segments)."""
+        view = self._buf[self._start:self._end]
+        self._start = self._end
+        return view
+
+    def clear(self):
+        self._start = self._end
+        self._odd = b""
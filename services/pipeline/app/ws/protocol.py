@@ -1,8 +1,9 @@
 """OpenAI Realtime API-style WebSocket message protocol."""
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from typing import Any
 import json
+import struct
 
 
 # --- Client → Server messages ---
@@ -14,6 +15,22 @@ class SessionCreate:
     target_lang: str = "en"
     voice: str = "adult_female"
     denoise: bool = True
+    # Binary audio frames start with the client capture time: float64 little-endian, ms since the epoch
+    client_timestamps: bool = False
+    # "binary": server events arrive as framed binary messages (see serialize_frame)
+    protocol: str = "json"
+    # Realtime chunk length in ms (0 = server default); shorter chunks cut VAD latency
+    chunk_ms: int = 0
+    # Mic audio format: "pcm16" (raw int16 mono), "opus" (one raw packet per frame) or "webm" (MediaRecorder
+    # WebM/Opus); input_sample_rate applies to pcm16, the server resamples to 16kHz
+    input_codec: str = "pcm16"
+    input_sample_rate: int = 16000
+    # Broadcast: "publisher" runs the pipeline for room_id, "listener" receives its results
+    role: str = ""
+    room_id: str = ""
+    # Lesson terms and phrases (source language): translated and synthesized in the background so
+    # their first use is served from cache
+    vocabulary: list = field(default_factory=list)
 
 
 @dataclass
@@ -37,6 +54,7 @@ class SessionClose:
 class SessionCreated:
     type: str = "session.created"
     session_id: str = ""
+    protocol: str = "json"
 
 
 @dataclass
@@ -60,6 +78,8 @@ class TranscriptDone:
     type: str = "transcript.done"
     text: str = ""
     processing_time_ms: float = 0
+    utterance_id: str = ""
+    timings: dict = field(default_factory=dict)
 
 
 @dataclass
@@ -67,6 +87,8 @@ class TranslationDone:
     type: str = "translation.done"
     text: str = ""
     processing_time_ms: float = 0
+    utterance_id: str = ""
+    timings: dict = field(default_factory=dict)
 
 
 @dataclass
@@ -74,6 +96,16 @@ class AudioDone:
     type: str = "audio.done"
     segment_id: str = ""
     processing_time_ms: float = 0
+    utterance_id: str = ""
+    timings: dict = field(default_factory=dict)
+
+
+@dataclass
+class RoomUpdate:
+    type: str = "room.update"
+    room_id: str = ""
+    publisher: bool = False  # a publisher is live in the room
+    listeners: int = 0
 
 
 @dataclass
@@ -99,6 +131,7 @@ SERVER_MESSAGES = {
     "transcript.done": TranscriptDone,
     "translation.done": TranslationDone,
     "audio.done": AudioDone,
+    "room.update": RoomUpdate,
     "error": ErrorMessage,
 }
 
@@ -115,4 +148,43 @@ def parse_client_message(data: str) -> Any:
 
 def serialize_message(msg: Any) -> str:
     """Serialize a dataclass message to JSON string."""
-    return json.dumps(asdict(msg))
+    # message_dict, not asdict: asdict deep-copies every field (timings included) first
+    return json.dumps(message_dict(msg))
+
+
+# --- Binary framed protocol (session.create protocol="binary") ---
+#
+# After session.created, every server → client message is one binary frame:
+#
+#   magic "CTF1" | u32 LE header length | header (UTF-8 JSON) | audio
+#
+# The header is {"events": [...]} with the same event objects as the JSON
+# protocol; the audio (PCM int16 at tts_sample_rate) is the rest of the
+# frame and belongs to the audio.done event in it. All events of one
+# utterance share one frame.
+
+PROTOCOLS = ("json", "binary")
+FRAME_MAGIC = b"CTF1"
+_FRAME_HEAD = struct.Struct("<4sI")
+_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def message_dict(msg: Any) -> dict:
+    """Shallow field dict of a message (messages hold no nested dataclasses)."""
+    return {name: getattr(msg, name) for name in msg.__dataclass_fields__}
+
+
+def serialize_frame(events: list, audio: bytes = b"") -> bytes:
+    """Pack several server messages and an optional audio payload into one frame."""
+    header = _compact({"events": [message_dict(m) for m in events]}).encode("utf-8")
+    return b"".join((_FRAME_HEAD.pack(FRAME_MAGIC, len(header)), header, audio))
+
+
+def parse_frame(frame: bytes) -> tuple[list[dict], bytes]:
+    """Split a frame into its event dicts and audio payload."""
+    magic, header_len = _FRAME_HEAD.unpack_from(frame)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Not a protocol frame")
+    start = _FRAME_HEAD.size
+    header = json.loads(frame[start:start + header_len])
+    return header["events"], frame[start + header_len:]
@@ -0,0 +1,66 @@
+"""Bounded, ordered queue of one connection's realtime results."""
+
+import asyncio
+
+
+class ResultsClosed(Exception):
+    """The connection's sender has stopped: nothing more can be queued or sent."""
+
+
+class OrderedResults:
+    """Results of in-flight audio chunks, handed to the sender in dispatch order.
+
+    At most ``limit`` chunks can be dispatched but not yet sent. ``reserve``
+    waits for a free slot, so a connection whose sender falls behind stops
+    reading audio (and TCP pushes back on the client) instead of piling up
+    results in memory. Once the sender stops, ``close`` makes ``reserve`` and
+    ``get`` raise ResultsClosed instead of waiting for a slot that never frees.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(limit, 1)
+        self._slots = asyncio.Semaphore(self.limit)
+        self._next_seq = 0
+        self._next_send = 0
+        self._ready: dict[int, dict | None] = {}
+        self._event = asyncio.Event()
+        self._closed = False
+
+    def full(self) -> bool:
+        return self._slots.locked()
+
+    async def reserve(self) -> int:
+        """Wait for a free slot; returns the sequence number for the next chunk."""
+        await self._slots.acquire()
+        if self._closed:
+            # Pass the wakeup on to the next waiter
+            self._slots.release()
+            raise ResultsClosed()
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+
+    def put(self, seq: int, result: dict | None):
+        self._ready[seq] = result
+        self._event.set()
+
+    async def get(self) -> dict | None:
+        """Next result in sequence order (waits for it if still in flight)."""
+        while self._next_send not in self._ready:
+            if self._closed:
+                raise ResultsClosed()
+            self._event.clear()
+            await self._event.wait()
+        result = self._ready.pop(self._next_send)
+        self._next_send += 1
+        return result
+
+    def task_done(self):
+        """The result returned by ``get`` has been sent; free its slot."""
+        self._slots.release()
+
+    def close(self):
+        """No more results will be sent: wake up and fail whoever waits on the queue."""
+        self._closed = True
+        self._slots.release()
+        self._event.set()
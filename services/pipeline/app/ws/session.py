@@ -3,6 +3,14 @@
 import uuid
 from dataclasses import dataclass, field
 
+import numpy as np
+
+from ..config import settings
+from ..pipeline.vad import VadState
+from .codec import make_decoder
+from .ingest import IngestBuffer, chunk_samples_for
+from .protocol import PROTOCOLS, ErrorMessage, SessionCreate
+
 
 @dataclass
 class Session:
@@ -11,18 +19,76 @@ class Session:
     target_lang: str = "en"
     voice: str = "adult_female"
     denoise: bool = True
+    client_timestamps: bool = False
+    protocol: str = "json"
+    # Input decoder for compressed / non-16kHz audio (codec.py); None = 16kHz PCM as-is
+    decoder: object | None = None
+    role: str = ""  # "", "publisher" or "listener"
+    room_id: str = ""
     is_recording: bool = False
     segment_counter: int = 0
-    audio_buffer: bytearray = field(default_factory=bytearray)
+    utterance_counter: int = 0
+    vad_inflight: bool = False
+    # Realtime chunk size, a whole number of VAD windows
+    chunk_samples: int = field(default_factory=lambda: chunk_samples_for(settings.ingest_chunk_ms, settings.sample_rate))
+    ingest: IngestBuffer = field(default_factory=IngestBuffer)
+    vad: VadState = field(default_factory=VadState)
+    # Pending speculative STT started at a pause (runner._Speculation)
+    speculation: object | None = None
+    # Newest buffered frame: client capture time (if sent) and server receipt, epoch seconds
+    last_captured_at: float | None = None
+    last_received_at: float | None = None
+
+    def configure(self, msg: SessionCreate) -> list[ErrorMessage]:
+        """Apply a session.create; returns errors for the fields left at their defaults.
+
+        ConnectionHandler and scripts/replay_capture.py both go through here,
+        so a replayed capture is set up exactly as the server set it up.
+        """
+        self.source_lang = msg.source_lang
+        self.target_lang = msg.target_lang
+        self.voice = msg.voice
+        self.denoise = msg.denoise
+        self.client_timestamps = msg.client_timestamps
+        self.protocol = msg.protocol if msg.protocol in PROTOCOLS else "json"
+        errors = []
+        try:
+            chunk_ms = int(msg.chunk_ms)
+        except (TypeError, ValueError):
+            # Keep the server default chunk length
+            chunk_ms = 0
+            errors.append(ErrorMessage(code="invalid_message",
+                                       message="chunk_ms must be an integer, got %r" % (msg.chunk_ms,)))
+        if chunk_ms > 0:
+            self.chunk_samples = chunk_samples_for(min(max(chunk_ms, 32), 2000), settings.sample_rate)
+        try:
+            input_rate = int(msg.input_sample_rate)
+            if not 8000 <= input_rate <= 192000:
+                raise ValueError("input_sample_rate must be between 8000 and 192000")
+            self.decoder = make_decoder(msg.input_codec, input_rate)
+        except (TypeError, ValueError) as e:
+            # Keep the session usable as 16kHz PCM
+            self.decoder = None
+            errors.append(ErrorMessage(code="unsupported_codec", message=str(e)))
+        return errors
 
     def next_segment_id(self) -> str:
         self.segment_counter += 1
         return f"seg_{self.segment_counter:04d}"
 
-    def clear_buffer(self) -> bytes:
-        data = bytes(self.audio_buffer)
-        self.audio_buffer.clear()
-        return data
+    def next_utterance_id(self) -> str:
+        self.utterance_counter += 1
+        return f"{self.session_id[:8]}-utt_{self.utterance_counter:04d}"
+
+    def clear_buffer(self) -> np.ndarray:
+        """Everything buffered, as an int16 view."""
+        return self.ingest.take_all()
+
+    def take_chunk(self) -> np.ndarray | None:
+        """Window-aligned int16 view of the buffered audio once a full chunk is in, else None."""
+        if len(self.ingest) < self.chunk_samples:
+            return None
+        return self.ingest.take_windows()
 
-    def append_audio(self, data: bytes) -> None:
-        self.audio_buffer.extend(data)
+    def append_audio(self, data: bytes | memoryview | np.ndarray) -> None:
+        self.ingest.write(data)
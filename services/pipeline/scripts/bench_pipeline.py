@@ -0,0 +1,242 @@
+"""Offline pipeline replay benchmark.
+
+Usage:
+    python scripts/bench_pipeline.py --wav-dir samples/ --sessions 4
+    python scripts/bench_pipeline.py --synthetic 20 --speed 0 --output run.json
+    python scripts/bench_pipeline.py --synthetic 20 --compare baseline.json
+
+Feeds WAV files through PipelineOrchestrator.process_realtime (500ms chunks,
+like the WebSocket handler) and process_segment (whole file, like
+push-to-talk) as simulated concurrent sessions. --speed 1 replays in real
+time, 4 replays four times faster, 0 as fast as possible.
+
+--backend stub (the default) uses the deterministic CPU-only processors from
+app/pipeline/stubs.py, so two runs on the same machine are comparable.
+--backend real loads the configured models.
+
+Reports p50/p95/p99 per stage, real-time factor and end-to-end latency, and
+writes a JSON summary; --compare prints the change against an earlier one.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+SAMPLE_RATE = 16000
+
+
+def load_wav(path: Path) -> bytes:
+    """Read a WAV as 16kHz mono int16 PCM bytes."""
+    with wave.open(str(path), "rb") as wf:
+        sr = wf.getframerate()
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: only 16-bit WAV is supported")
+    audio = np.frombuffer(raw, dtype=np.int16).astype(np.float32)
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    if sr != SAMPLE_RATE:
+        positions = np.arange(0, len(audio) - 1, sr / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio)
+    return audio.astype(np.int16).tobytes()
+
+
+def synthetic_clips(count: int, seed: int = 0, max_bursts: int = 3) -> list[tuple[str, bytes]]:
+    """Deterministic speech-like clips: noise bursts with pauses, then trailing silence."""
+    rng = np.random.default_rng(seed)
+    clips = []
+    for i in range(count):
+        parts = [np.zeros(int(0.3 * SAMPLE_RATE))]
+        for _ in range(rng.integers(1, max_bursts + 1)):
+            n = int(rng.uniform(0.8, 4.0) * SAMPLE_RATE)
+            envelope = np.abs(np.sin(np.linspace(0, np.pi * rng.integers(3, 12), n)))
+            parts.append(rng.normal(0, 0.15, n) * envelope + 0.05 * np.sign(envelope) * rng.normal(0, 1, n))
+            parts.append(np.zeros(int(rng.uniform(0.7, 1.2) * SAMPLE_RATE)))
+        audio = np.clip(np.concatenate(parts), -1, 1)
+        clips.append((f"synthetic_{i:03d}", (audio * 32767).astype(np.int16).tobytes()))
+    return clips
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        "count": len(values),
+        "mean": round(float(arr.mean()), 2),
+        "p50": round(float(np.percentile(arr, 50)), 2),
+        "p95": round(float(np.percentile(arr, 95)), 2),
+        "p99": round(float(np.percentile(arr, 99)), 2),
+        "max": round(float(arr.max()), 2),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages: dict[str, list[float]] = {}
+        self.e2e_ms: dict[str, list[float]] = {"realtime": [], "ptt": []}
+        self.rtf: dict[str, list[float]] = {"realtime": [], "ptt": []}
+        self.utterances = 0
+
+    def add(self, mode: str, result: dict, e2e_ms: float, audio_s: float):
+        timings = result.get("timings", {})
+        with self.lock:
+            for key, ms in timings.items():
+                self.stages.setdefault(key.removesuffix("_ms"), []).append(ms)
+            self.e2e_ms[mode].append(e2e_ms)
+            if audio_s > 0:
+                compute_s = sum(v for k, v in timings.items() if k != "vad_ms") / 1000
+                self.rtf[mode].append(compute_s / audio_s)
+            self.utterances += 1
+
+
+def run_realtime(pipeline, session, pcm: bytes, speed: float, rec: Recorder):
+    """Stream ``pcm`` in handler-sized chunks, paced at ``speed`` x real time."""
+    # The session's chunk length is the handler's (whole VAD windows, INGEST_CHUNK_MS)
+    chunk_bytes = session.chunk_samples * 2
+    t_start = time.perf_counter()
+    fed_s = 0.0
+    speech_start_s = None
+    for offset in range(0, len(pcm), chunk_bytes):
+        chunk = pcm[offset:offset + chunk_bytes]
+        fed_s += len(chunk) / 2 / SAMPLE_RATE
+        if speed > 0:
+            # Wait until this chunk would have been fully captured
+            delay = t_start + fed_s / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        captured_at = time.perf_counter()
+        result = pipeline.process_realtime(chunk, session)
+        if result is None:
+            continue
+        if result.get("speech_start"):
+            speech_start_s = fed_s
+        if result.get("transcript"):
+            e2e_ms = (time.perf_counter() - captured_at) * 1000
+            audio_s = fed_s - (speech_start_s or 0)
+            rec.add("realtime", result, e2e_ms, audio_s)
+
+
+def run_segment(pipeline, session, pcm: bytes, speed: float, rec: Recorder):
+    """Push-to-talk: wait for the whole clip to be 'spoken', then process it at once."""
+    audio_s = len(pcm) / 2 / SAMPLE_RATE
+    if speed > 0:
+        time.sleep(audio_s / speed)
+    t0 = time.perf_counter()
+    result = pipeline.process_segment(pcm, session)
+    if result.get("transcript"):
+        rec.add("ptt", result, (time.perf_counter() - t0) * 1000, audio_s)
+
+
+def compare(current: dict, baseline: dict):
+    print("\nChange vs baseline (positive = slower):")
+    for section in ("stages", "e2e_ms", "rtf"):
+        for name, stats in current.get(section, {}).items():
+            old = baseline.get(section, {}).get(name, {})
+            for key in ("p50", "p95", "p99"):
+                if key in stats and old.get(key):
+                    delta = (stats[key] - old[key]) / old[key] * 100
+                    print(f"  {section}.{name}.{key:4s}: {old[key]:10.2f} → {stats[key]:10.2f}  ({delta:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav-dir", type=Path, help="folder of 16-bit WAV files")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N deterministic clips instead")
+    parser.add_argument("--sessions", type=int, default=1, help="concurrent simulated sessions")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (0 = as fast as possible)")
+    parser.add_argument("--mode", choices=["realtime", "ptt", "both"], default="both")
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub")
+    parser.add_argument("--time-scale", type=float, help="stub compute-time multiplier (default: STUB_TIME_SCALE)")
+    parser.add_argument("--source-lang", default="th")
+    parser.add_argument("--target-lang", default="en")
+    parser.add_argument("--output", type=Path, help="write the JSON summary here")
+    parser.add_argument("--compare", type=Path, help="earlier JSON summary to diff against")
+    args = parser.parse_args()
+
+    os.environ.setdefault("PIPELINE_BACKEND", args.backend)
+    if args.time_scale is not None:
+        # The flag beats the environment
+        os.environ["STUB_TIME_SCALE"] = str(args.time_scale)
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+
+    from app.config import settings
+    from app.pipeline.orchestrator import PipelineOrchestrator
+    from app.ws.session import Session
+
+    if args.wav_dir:
+        clips = [(p.name, load_wav(p)) for p in sorted(args.wav_dir.glob("*.wav"))]
+    else:
+        clips = synthetic_clips(args.synthetic or 10)
+    if not clips:
+        print("ERROR: no audio to replay")
+        return 1
+    audio_total_s = sum(len(pcm) for _, pcm in clips) / 2 / SAMPLE_RATE
+    print(f"Replaying {len(clips)} clips ({audio_total_s:.1f}s audio) × {args.sessions} sessions "
+          f"[backend={args.backend}, speed={args.speed or 'max'}, mode={args.mode}]")
+
+    pipeline = PipelineOrchestrator(backend=args.backend)
+    t0 = time.perf_counter()
+    pipeline.load_models()
+    load_s = time.perf_counter() - t0
+
+    rec = Recorder()
+    modes = ["realtime", "ptt"] if args.mode == "both" else [args.mode]
+
+    def session_worker(index: int):
+        session = Session(source_lang=args.source_lang, target_lang=args.target_lang)
+        for mode in modes:
+            for _, pcm in clips:
+                if mode == "realtime":
+                    run_realtime(pipeline, session, pcm, args.speed, rec)
+                else:
+                    run_segment(pipeline, session, pcm, args.speed, rec)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=session_worker, args=(i,)) for i in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall_s = time.perf_counter() - t0
+
+    processed_s = audio_total_s * args.sessions * len(modes)
+    summary = {
+        "config": {
+            "backend": args.backend, "sessions": args.sessions, "speed": args.speed,
+            "mode": args.mode, "clips": len(clips), "time_scale": settings.stub_time_scale,
+        },
+        "load_s": round(load_s, 2),
+        "wall_s": round(wall_s, 2),
+        "audio_s": round(processed_s, 2),
+        "throughput_x_realtime": round(processed_s / wall_s, 2) if wall_s else None,
+        "utterances": rec.utterances,
+        "stages": {name: percentiles(v) for name, v in sorted(rec.stages.items())},
+        "e2e_ms": {mode: percentiles(v) for mode, v in rec.e2e_ms.items() if v},
+        "rtf": {mode: percentiles(v) for mode, v in rec.rtf.items() if v},
+    }
+
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2))
+        print(f"\nSaved {args.output}")
+    if args.compare:
+        compare(summary, json.loads(args.compare.read_text()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Compare STT post-processor backends: latency, memory, agreement with fp32.
+
+Usage:
+    python scripts/bench_postprocess.py
+    python scripts/bench_postprocess.py --backends torch,ct2 --compute-type int8 --output pp.json
+    python scripts/bench_postprocess.py --backends stub,stub   # smoke test, no models
+
+Each backend runs in its own process, so resident memory is measured
+cleanly: RSS after load and peak RSS (load included). Every transcript of a
+fixed set of Whisper-style Thai transcripts is post-processed --repeat
+times. The set has misheard consonants, wrong vowels, repetition
+hallucinations and clean sentences.
+
+The first backend is the reference (torch fp32 on CPU by default).
+Agreement is the share of transcripts with identical output, plus mean
+character similarity (difflib ratio) to the reference output.
+"""
+
+import argparse
+import difflib
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# (transcript, audio seconds)
+TRANSCRIPTS = [
+    ("วันนี้เราจะไปเที่ยวลำทานกัน", 2.1),
+    ("น้ำในลำถานใสมาก", 1.8),
+    ("กรูให้นักเรียนอ่านหนังสือ", 2.0),
+    ("บลาตัวนี้ว่ายน้ำเร็วมาก", 1.9),
+    ("เมวของฉันชอบนอนบนโต๊ะ", 2.0),
+    ("นักเรียนทุกคนต้องส่งการบ้านวันศุกร์", 2.6),
+    ("ดวงจันทร์โคจรรอบโลกทุกยี่สิบเจ็ดวัน", 2.9),
+    ("พืชต้องการแสงแดดและน้ำเพื่อเจริญเติบโต", 3.0),
+    ("ขอบคุณที่รับชม ขอบคุณที่รับชม ขอบคุณที่รับชม", 1.2),
+    ("ทนนเส้นนี้รถติดมากตอนเช้า", 2.2),
+    ("กานบ้านวันนี้มีสามข้อ", 1.7),
+    ("โปรดติดตามตอนต่อไป", 0.8),
+    ("ระบบสุริยะมีดาวเคราะห์แปดดวง", 2.3),
+    ("น้ำแข็งละลายเมื่ออุณหภูมิสูงขึ้น", 2.4),
+    ("เด็กๆ ชอบเล่นที่สนามหญ้าหลังโรงเรียน", 2.8),
+    ("ครูถามว่า ใครรู้คำตอบบ้าง", 1.9),
+    ("ผีเสื้อเกิดจากหนอนที่กลายเป็นดักแด้", 2.7),
+    ("เราต้องลดการใช้ถุงพลาสติกเพื่อโลก", 2.5),
+    ("คนที่ตอบถูกจะได้ดาวหนึ่งดวง คนที่ตอบถูกจะได้ดาวหนึ่งดวง", 2.0),
+    ("หัวใจสูบฉีดเลือดไปทั่วร่างกาย", 2.2),
+]
+
+
+def _rss_mb() -> float:
+    from app.models.loader import _rss_bytes
+    return _rss_bytes() / 1024**2
+
+
+def make_processor(backend: str, device: str, compute_type: str, prepared_dir: str, ct2_model: str):
+    from app.pipeline.postprocess import QuantizedPostProcessor, SttPostProcessor
+    from app.pipeline.stubs import StubPostProcessor
+
+    if backend == "torch":
+        return SttPostProcessor(device=device, prepared_dir=prepared_dir)
+    if backend == "ct2":
+        return QuantizedPostProcessor(ct2_model, device=device, compute_type=compute_type)
+    if backend == "stub":
+        return StubPostProcessor(time_scale=0.1)
+    raise SystemExit("unknown backend %r" % backend)
+
+
+def run_backend(args) -> dict:
+    """Worker mode: load one backend and post-process the whole set."""
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    processor = make_processor(args.run, args.device, args.compute_type, args.prepared_dir, args.ct2_model)
+    processor.load()
+    load_s = time.perf_counter() - t0
+    if processor.model is None:
+        return {"backend": args.run, "error": "model did not load (see log)"}
+    rss_loaded = _rss_mb()
+
+    processor.process(*TRANSCRIPTS[0])  # warm-up
+    latencies = []
+    outputs = []
+    for text, duration in TRANSCRIPTS:
+        for i in range(args.repeat):
+            t0 = time.perf_counter()
+            out = processor.process(text, audio_duration=duration)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        outputs.append(out)
+
+    latencies.sort()
+    return {
+        "backend": args.run,
+        "load_s": round(load_s, 1),
+        "model_rss_mb": round(rss_loaded - rss_before),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        "p50_ms": round(latencies[len(latencies) // 2], 1),
+        "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 1),
+        "outputs": outputs,
+    }
+
+
+def agreement(reference: list[str], outputs: list[str]) -> tuple[float, float]:
+    """(share of identical outputs, mean character similarity)."""
+    same = sum(a == b for a, b in zip(reference, outputs))
+    similarity = sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(reference, outputs))
+    return same / len(reference), similarity / len(reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,ct2", help="comma-separated; the first is the reference")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8", help="ct2 backend quantization")
+    parser.add_argument("--prepared-dir", default="/root/.cache/prepared")
+    parser.add_argument("--ct2-model", default="/app/postprocess-ct2",
+                        help="ct2 backend weights (scripts/build_postprocess_model.py)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--run", help=argparse.SUPPRESS)  # worker mode: one backend
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        Path(args.out).write_text(json.dumps(run_backend(args), ensure_ascii=False))
+        return 0
+
+    results = []
+    for backend in args.backends.split(","):
+        with tempfile.NamedTemporaryFile(suffix=".json") as out:
+            cmd = [sys.executable, __file__, "--run", backend, "--out", out.name, "--device", args.device,
+                   "--compute-type", args.compute_type, "--prepared-dir", args.prepared_dir,
+                   "--ct2-model", args.ct2_model, "--repeat", str(args.repeat)]
+            print(f"Running {backend} ...", flush=True)
+            if subprocess.run(cmd).returncode != 0:
+                return 1
+            results.append(json.loads(Path(out.name).read_text()))
+
+    failed = [r for r in results if "error" in r]
+    for r in failed:
+        print(f"{r['backend']}: {r['error']}")
+    if failed:
+        return 1
+
+    reference = results[0]
+    print(f"\n{len(TRANSCRIPTS)} transcripts x {args.repeat}, device={args.device}, reference={reference['backend']}\n")
+    print(f"{'backend':<8} {'load s':>7} {'model MB':>9} {'peak MB':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'same':>6} {'similar':>8}")
+    for r in results:
+        r["exact_agreement"], r["char_similarity"] = agreement(reference["outputs"], r["outputs"])
+        print(f"{r['backend']:<8} {r['load_s']:>7.1f} {r['model_rss_mb']:>9.0f} {r['peak_rss_mb']:>8.0f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['exact_agreement']:>6.0%} {r['char_similarity']:>8.3f}")
+
+    disagreements = [
+        (text, ref, out) for (text, _), ref, out in zip(TRANSCRIPTS, reference["outputs"], results[-1]["outputs"])
+        if ref != out
+    ]
+    if disagreements and len(results) > 1:
+        print(f"\n{results[-1]['backend']} vs {reference['backend']}, differing outputs:")
+        for text, ref, out in disagreements:
+            print(f"  {text}\n    {reference['backend']}: {ref}\n    {results[-1]['backend']}: {out}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+        print(f"\nWrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Compare the JSON and binary WebSocket protocols for realtime results.
+
+Usage:
+    python scripts/bench_protocol.py
+    python scripts/bench_protocol.py --utterances 2000 --audio-s 3
+
+Builds the server → client messages of typical realtime utterances (VAD
+start in one chunk; VAD end, transcript, translation, TTS audio and
+audio.done in a later one) and serializes them the way ConnectionHandler
+does for each protocol:
+  json    serialize_message per event + the raw audio as its own frame
+  binary  serialize_frame, one frame per result
+
+Reports WebSocket frames per utterance, bytes on the wire, and CPU time
+spent serializing, per message and per utterance.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ws.protocol import (  # noqa: E402
+    AudioDone, TranscriptDone, TranslationDone, VadSpeechEnd, VadSpeechStart,
+    parse_frame, serialize_frame, serialize_message,
+)
+
+TTS_SAMPLE_RATE = 24000
+TRANSCRIPT = "วันนี้ เรา จะ เรียน เรื่อง ดวงจันทร์ และ ดาวเคราะห์ ใน ระบบ สุริยะ"
+TRANSLATION = "Today we will learn about the moon and the planets in the solar system"
+TIMINGS = {
+    "network_ms": 12.4, "buffer_ms": 0.1, "vad_ms": 2.3, "stt_ms": 310.5, "translate_ms": 95.2,
+    "tts_ms": 180.7, "vad_queue_ms": 0.2, "queue_ms": 4.1, "handoff_ms": 0.3, "order_wait_ms": 0.0,
+    "total_ms": 606.2,
+}
+
+
+def utterance(i: int, audio: bytes) -> list[tuple[list, bytes]]:
+    """The results of one utterance, as (events, audio) per send."""
+    utterance_id = "3f2a9c1e-utt_%04d" % i
+    done = dict(processing_time_ms=590, utterance_id=utterance_id, timings=TIMINGS)
+    return [
+        ([VadSpeechStart()], b""),
+        ([
+            VadSpeechEnd(),
+            TranscriptDone(text=TRANSCRIPT, **done),
+            TranslationDone(text=TRANSLATION, **done),
+            AudioDone(segment_id="seg_%04d" % i, **done),
+        ], audio),
+    ]
+
+
+def send_json(events: list, audio: bytes) -> list:
+    frames = []
+    for msg in events:
+        if audio and isinstance(msg, AudioDone):
+            frames.append(audio)
+        frames.append(serialize_message(msg))
+    return frames
+
+
+def send_binary(events: list, audio: bytes) -> list:
+    return [serialize_frame(events, audio)]
+
+
+def run(name: str, send, sends: list, messages: int) -> dict:
+    frames = 0
+    wire = 0
+    t0 = time.process_time()
+    for events, audio in sends:
+        out = send(events, audio)
+        frames += len(out)
+        wire += sum(len(f.encode("utf-8")) if isinstance(f, str) else len(f) for f in out)
+    cpu_s = time.process_time() - t0
+    utterances = len(sends) // 2
+    return {
+        "name": name,
+        "frames_per_utt": frames / utterances,
+        "bytes_per_utt": wire / utterances,
+        "us_per_msg": cpu_s / messages * 1e6,
+        "us_per_utt": cpu_s / utterances * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=5000)
+    parser.add_argument("--audio-s", type=float, default=2.0, help="TTS audio per utterance")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    audio = (rng.normal(0, 3000, int(args.audio_s * TTS_SAMPLE_RATE))).astype(np.int16).tobytes()
+    sends = [s for i in range(args.utterances) for s in utterance(i, audio)]
+    messages = sum(len(events) for events, _ in sends)
+
+    # Sanity check: a binary frame round-trips to the same events
+    events, payload = parse_frame(send_binary(*sends[1])[0])
+    assert [e["type"] for e in events] == [m.type for m in sends[1][0]] and payload == audio
+
+    print(f"{args.utterances} utterances, {messages / args.utterances:.0f} events each, "
+          f"{len(audio) / 1024:.0f} KB TTS audio\n")
+    print(f"{'protocol':<8} {'frames/utt':>10} {'bytes/utt':>10} {'µs/msg':>8} {'µs/utt':>8}")
+    results = {}
+    for name, send in (("json", send_json), ("binary", send_binary)):
+        best = min((run(name, send, sends, messages) for _ in range(args.repeat)), key=lambda r: r["us_per_utt"])
+        results[name] = best
+        print(f"{name:<8} {best['frames_per_utt']:>10.1f} {best['bytes_per_utt']:>10.0f} "
+              f"{best['us_per_msg']:>8.2f} {best['us_per_utt']:>8.1f}")
+
+    j, b = results["json"], results["binary"]
+    print(f"\nbinary vs json: {b['frames_per_utt'] / j['frames_per_utt']:.2f}x frames, "
+          f"{b['us_per_utt'] / j['us_per_utt']:.2f}x serialization CPU, "
+          f"{b['bytes_per_utt'] - j['bytes_per_utt']:+.0f} bytes per utterance")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
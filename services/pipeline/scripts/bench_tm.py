@@ -0,0 +1,180 @@
+"""Measure translation memory lookup latency and hit rate.
+
+Usage:
+    python scripts/bench_tm.py
+    python scripts/bench_tm.py --entries 100000 --queries 2000
+    python scripts/bench_tm.py --transcripts /data/transcripts
+
+Latency: seeds a TranslationMemory with --entries synthetic Thai sentences,
+then times lookups of three kinds:
+  exact   a seeded sentence, re-spaced and re-punctuated
+  near    a seeded sentence with a polite particle added (a fuzzy match)
+  novel   a new sentence from the same vocabulary (a miss: the full search)
+
+Hit rate: replays lessons through the memory the way the orchestrator does
+(lookup, else "translate" and remember). By default this is a synthetic
+course: lesson material is seeded, and the teacher mixes material sentences,
+small variants of them, and new sentences, often repeating the new ones.
+With --transcripts, the earlier half of the logged sessions seeds the memory
+and the later half is replayed.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.pipeline.translation_memory import TM_LOOKUPS, TranslationMemory  # noqa: E402
+
+WORDS = (
+    "วันนี้ เรา จะ เรียน เรื่อง ดวงจันทร์ ดาวเคราะห์ ระบบ สุริยะ นักเรียน ครู หนังสือ หน้า บท ที่ "
+    "อ่าน เขียน ฟัง พูด ตอบ คำถาม ข้อ แบบฝึกหัด การบ้าน ส่ง พรุ่งนี้ เมื่อวาน ทุกคน เปิด ปิด "
+    "ดู กระดาน จด ความ สำคัญ ตัวอย่าง คำศัพท์ ใหม่ ประโยค ภาษา อังกฤษ ไทย วิทยาศาสตร์ คณิตศาสตร์ "
+    "น้ำ อากาศ ต้นไม้ สัตว์ พืช แสง เสียง ไฟฟ้า แรง พลังงาน โลก ดวงอาทิตย์ ฝน เมฆ ลม ร้อน เย็น "
+    "มาก น้อย เร็ว ช้า ใหญ่ เล็ก ดี ถูก ผิด ลอง อีก ครั้ง ช่วย กัน กลุ่ม คู่ หา คำตอบ อธิบาย"
+).split()
+PARTICLES = ("นะ", "ครับ", "ค่ะ", "นะครับ", "กัน")
+LANGS = ("th", "en")
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12)))
+
+
+def variant(text: str, rng: random.Random) -> str:
+    """The same sentence as a teacher might say it again."""
+    return "%s %s" % (text, rng.choice(PARTICLES))
+
+
+def timed(memory: TranslationMemory, queries: list[str]) -> tuple[np.ndarray, Counter]:
+    times = []
+    found = Counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        hit = memory.lookup(query, *LANGS)
+        times.append(time.perf_counter() - t0)
+        found[hit is not None] += 1
+    return np.array(times) * 1000, found
+
+
+def bench_latency(entries: int, queries: int, rng: random.Random):
+    memory = TranslationMemory()
+    sources = [sentence(rng) for _ in range(entries)]
+    t0 = time.perf_counter()
+    memory.add_many([{"source": s, "target": "t%d" % i, "source_lang": "th", "target_lang": "en"}
+                     for i, s in enumerate(sources)])
+    print(f"Seeded {len(memory)} entries in {time.perf_counter() - t0:.1f}s\n")
+
+    picks = rng.sample(sources, queries)
+    kinds = {
+        "exact": ["  %s ." % s.replace(" ", "  ", 1) for s in picks],
+        "near": [variant(s, rng) for s in picks],
+        "novel": [sentence(rng) for _ in range(queries)],
+    }
+    # First lookups build the posting arrays; not part of steady state
+    timed(memory, kinds["novel"][:50])
+
+    print(f"{'query':<6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'found':>6}")
+    for kind, batch in kinds.items():
+        ms, found = timed(memory, batch)
+        print(f"{kind:<6} {np.percentile(ms, 50):>8.3f} {np.percentile(ms, 95):>8.3f} "
+              f"{ms.max():>8.3f} {found[True] / len(batch):>6.0%}")
+
+
+def synthetic_lessons(sessions: int, utterances: int, rng: random.Random):
+    """(seed entries, sessions of (utterance, kind)) for a synthetic course."""
+    material = [sentence(rng) for _ in range(300)]
+    seed = [{"source": s, "target": "t:" + s, "source_lang": "th", "target_lang": "en"} for s in material]
+    lessons = []
+    for _ in range(sessions):
+        own: list[str] = []
+        lesson = []
+        for _ in range(utterances):
+            roll = rng.random()
+            if roll < 0.35:
+                lesson.append((rng.choice(material), "material"))
+            elif roll < 0.55:
+                lesson.append((variant(rng.choice(material), rng), "variant"))
+            elif roll < 0.70 and own:
+                lesson.append((rng.choice(own), "repeat"))
+            else:
+                own.append(sentence(rng))
+                lesson.append((own[-1], "new"))
+        lessons.append(lesson)
+    return seed, lessons
+
+
+def logged_lessons(directory: Path):
+    sessions: dict[str, list[dict]] = {}
+    for path in sorted(directory.glob("*.jsonl")):
+        session_id = path.name.split(".")[0]
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("transcript") and record.get("translation"):
+                sessions.setdefault(session_id, []).append(record)
+    ordered = sorted(sessions.values(), key=lambda records: records[0].get("ts", 0))
+    half = len(ordered) // 2
+    seed = [{"source": r["transcript"], "target": r["translation"],
+             "source_lang": r.get("source_lang", "th"), "target_lang": r.get("target_lang", "en")}
+            for records in ordered[:half] for r in records]
+    lessons = [[(r["transcript"], "logged") for r in records] for records in ordered[half:]]
+    return seed, lessons
+
+
+def bench_hit_rate(seed: list[dict], lessons: list):
+    memory = TranslationMemory()
+    memory.add_many(seed)
+    hits = Counter()
+    by_kind: dict[str, Counter] = {}
+    for lesson in lessons:
+        for text, kind in lesson:
+            before = {r: TM_LOOKUPS.value(result=r) for r in ("exact", "cache", "fuzzy")}
+            if memory.lookup(text, *LANGS) is None:
+                memory.remember(text, "t:" + text, *LANGS)
+                result = "miss"
+            else:
+                result = next(r for r in before if TM_LOOKUPS.value(result=r) > before[r])
+            hits[result] += 1
+            by_kind.setdefault(kind, Counter())[result] += 1
+
+    total = sum(hits.values())
+    print(f"\nReplayed {len(lessons)} lessons, {total} utterances, {len(seed)} seeded entries")
+    print(f"{'utterance':<9} {'count':>6} {'exact':>6} {'cache':>6} {'fuzzy':>6} {'miss':>6}")
+    for kind, counts in sorted(by_kind.items()) + [("all", hits)]:
+        n = sum(counts.values())
+        print(f"{kind:<9} {n:>6} " + " ".join(f"{counts[r] / n:>6.0%}" for r in ("exact", "cache", "fuzzy", "miss")))
+    print(f"\nHit rate: {1 - hits['miss'] / total:.1%} of utterances skip the translation model")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000, help="lookups per query kind")
+    parser.add_argument("--sessions", type=int, default=20, help="synthetic lessons to replay")
+    parser.add_argument("--utterances", type=int, default=150, help="utterances per synthetic lesson")
+    parser.add_argument("--transcripts", type=Path, help="replay logged lessons from a TRANSCRIPT_DIR")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bench_latency(args.entries, args.queries, rng)
+    if args.transcripts:
+        seed, lessons = logged_lessons(args.transcripts)
+    else:
+        seed, lessons = synthetic_lessons(args.sessions, args.utterances, rng)
+    bench_hit_rate(seed, lessons)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
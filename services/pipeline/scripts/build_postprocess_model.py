@@ -0,0 +1,52 @@
+"""Convert the STT post-processor LLM to CTranslate2 int8 for the ct2 backend.
+
+Usage:
+    python scripts/build_postprocess_model.py
+    python scripts/build_postprocess_model.py --output /app/postprocess-ct2
+    python scripts/build_postprocess_model.py --quantization int8_float16
+
+Converts the hub checkpoint of app/pipeline/postprocess.py's MODEL_NAME
+with ctranslate2's TransformersConverter and saves its tokenizer next to
+the weights. QuantizedPostProcessor (POSTPROCESS_BACKEND=ct2) loads the
+result from POSTPROCESS_MODEL_PATH and never converts at runtime. The
+conversion holds the full-precision model in RAM (~16 GB for Qwen3-4B),
+so run it at image build time (see the Dockerfile) or on a build machine.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings  # noqa: E402
+from app.models.artifacts import dir_size_mb, save_prepared  # noqa: E402
+from app.pipeline.postprocess import MODEL_NAME  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, default=Path(settings.postprocess_model_path))
+    parser.add_argument("--model", default=MODEL_NAME, help="hub id or local checkpoint")
+    parser.add_argument("--quantization", default=settings.postprocess_compute_type,
+                        help="weight type: int8, int8_float16, int8_bfloat16")
+    args = parser.parse_args()
+
+    import ctranslate2.converters
+    from transformers import AutoTokenizer
+
+    def _save(tmp: str):
+        converter = ctranslate2.converters.TransformersConverter(args.model, low_cpu_mem_usage=True)
+        converter.convert(tmp, quantization=args.quantization, force=True)
+        AutoTokenizer.from_pretrained(args.model).save_pretrained(tmp)
+
+    print(f"Converting {args.model} to CTranslate2 {args.quantization} ...", flush=True)
+    # Published atomically with the marker QuantizedPostProcessor checks for
+    if not save_prepared(args.output, _save, {"model": args.model, "quantization": args.quantization}):
+        return 1
+    print(f"Wrote {args.output}: {dir_size_mb(args.output):.0f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Build a translation memory seed file from lesson material and past lessons.
+
+Usage:
+    python scripts/build_tm.py --pairs lesson_vocab.tsv --output tm.jsonl
+    python scripts/build_tm.py --pairs unit3.tsv --source-lang th --target-lang en --output tm.jsonl
+    python scripts/build_tm.py --transcripts /data/transcripts --output tm.jsonl --append
+
+--pairs reads tab-separated "source<TAB>target" lines (lesson sentences and
+vocabulary with their checked translations). --transcripts reads a
+TRANSCRIPT_DIR written by the pipeline (app/transcripts.py). Records with
+"verified": true are always taken. Other records are taken only with
+--unverified, because they hold the model's own translations.
+
+The output is the JSON-lines file TM_PATH points at
+(app/pipeline/translation_memory.py). A later entry for the same source
+sentence replaces an earlier one.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.pipeline.translation_memory import normalize  # noqa: E402
+
+
+def read_pairs(path: Path, source_lang: str, target_lang: str):
+    for line in path.read_text(encoding="utf-8").splitlines():
+        source, _, target = line.partition("\t")
+        if source.strip() and target.strip():
+            yield {"source": source.strip(), "target": target.strip(),
+                   "source_lang": source_lang, "target_lang": target_lang}
+
+
+def read_transcripts(directory: Path, unverified: bool):
+    for path in sorted(directory.glob("*.jsonl")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not (record.get("verified") or unverified):
+                continue
+            if record.get("transcript") and record.get("translation"):
+                yield {"source": record["transcript"], "target": record["translation"],
+                       "source_lang": record.get("source_lang", "th"), "target_lang": record.get("target_lang", "en")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=Path, action="append", default=[], help="TSV of source<TAB>target")
+    parser.add_argument("--source-lang", default="th")
+    parser.add_argument("--target-lang", default="en")
+    parser.add_argument("--transcripts", type=Path, help="TRANSCRIPT_DIR of past lessons")
+    parser.add_argument("--unverified", action="store_true", help="also take machine translations from logs")
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--append", action="store_true", help="keep the entries already in --output")
+    args = parser.parse_args()
+
+    entries: dict[tuple, dict] = {}
+
+    def _take(entry: dict):
+        entries[(entry["source_lang"], entry["target_lang"], normalize(entry["source"]))] = entry
+
+    if args.append and args.output.exists():
+        for line in args.output.read_text(encoding="utf-8").splitlines():
+            try:
+                _take(json.loads(line))
+            except (ValueError, KeyError):
+                continue
+    before = len(entries)
+    for path in args.pairs:
+        for entry in read_pairs(path, args.source_lang, args.target_lang):
+            _take(entry)
+    if args.transcripts:
+        for entry in read_transcripts(args.transcripts, args.unverified):
+            _take(entry)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for entry in entries.values():
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"Wrote {args.output}: {len(entries)} entries ({len(entries) - before} new or replaced)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
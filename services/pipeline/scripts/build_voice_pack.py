@@ -0,0 +1,64 @@
+"""Build the Kokoro voice pack: every configured voice's style tensor in one file.
+
+Usage:
+    python scripts/build_voice_pack.py
+    python scripts/build_voice_pack.py --output /app/voice_pack.bin
+    python scripts/build_voice_pack.py --voices-dir ./kokoro-voices   # local .pt files, no network
+
+Fetches voices/<name>.pt from the Kokoro repo on the Hugging Face Hub for
+each voice in app/pipeline/tts.py's _KOKORO_VOICES (or reads them from
+--voices-dir). It writes them all into one file in the format of
+app/pipeline/voicepack.py. TtsProcessor memory-maps that file at load,
+so serving needs no network for voices and worker processes share the
+pages. Run at image build time (see the Dockerfile).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings  # noqa: E402
+from app.pipeline.tts import _KOKORO_VOICES  # noqa: E402
+from app.pipeline.voicepack import VoicePack, write_voice_pack  # noqa: E402
+
+REPO_ID = "hexgrad/Kokoro-82M"
+
+
+def load_voice(name: str, voices_dir: Path | None) -> np.ndarray:
+    import torch
+
+    if voices_dir is not None:
+        path = voices_dir / f"{name}.pt"
+    else:
+        from huggingface_hub import hf_hub_download
+        path = hf_hub_download(repo_id=REPO_ID, filename=f"voices/{name}.pt")
+    return torch.load(path, map_location="cpu", weights_only=True).float().numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.voice_pack_path)
+    parser.add_argument("--voices-dir", type=Path, help="read <name>.pt from here instead of the Hub")
+    args = parser.parse_args()
+
+    names = sorted({v for voices in _KOKORO_VOICES.values() for v in voices.values()})
+    voices = {}
+    for name in names:
+        voices[name] = load_voice(name, args.voices_dir)
+        print(f"  {name:<16} {tuple(voices[name].shape)}")
+
+    write_voice_pack(args.output, voices, {"source": str(args.voices_dir or REPO_ID)})
+
+    # Read it back: same tensors, bit for bit
+    pack = VoicePack(args.output)
+    assert pack.names == names and all(np.array_equal(pack.get(n), voices[n]) for n in names)
+    print(f"Wrote {args.output}: {len(pack)} voices, {pack.nbytes / 1024**2:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Import-time check for the server entry points.
+
+Usage:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 800 --top 15
+    python scripts/check_import_time.py --module app.workers.pool --module app.ws.protocol
+
+Imports each module in a fresh interpreter with ``python -X importtime``
+(best of --repeat runs) and prints the slowest imports by cumulative time.
+Fails (exit 1) if a module takes longer than --budget-ms, or if it pulls in
+one of the heavy model libraries, which must only be imported when a model
+is loaded (torch, transformers, faster_whisper, kokoro, elevenlabs, df, av).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+DEFAULT_MODULES = ["app.main", "app.ws.protocol"]
+HEAVY = ("torch", "torchaudio", "transformers", "faster_whisper", "ctranslate2",
+         "kokoro", "elevenlabs", "df", "av", "soundfile")
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) for every import done by ``import module``."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError("import %s failed:\n%s" % (module, proc.stderr.strip().splitlines()[-1]))
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        if name.strip() == "site":
+            rows.clear()  # interpreter startup, not the module's imports
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="module to import (repeatable)")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="max cumulative import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N fresh interpreters")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module or DEFAULT_MODULES:
+        runs = [import_times(module) for _ in range(max(args.repeat, 1))]
+        rows = min(runs, key=lambda r: next(c for n, _, c in r if n == module))
+        total_ms = next(c for n, _, c in rows if n == module) / 1000
+
+        heavy = sorted({n for n, _, _ in rows if n.split(".")[0] in HEAVY})
+        over = total_ms > args.budget_ms
+        status = "FAIL" if over or heavy else "ok"
+        print(f"{module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms) {status}")
+        for name, _, cumulative in sorted((r for r in rows if r[0] != module), key=lambda r: -r[2])[:args.top]:
+            print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+        if heavy:
+            print("  heavy imports at import time: " + ", ".join(heavy))
+        failed |= over or bool(heavy)
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""WebSocket load generator: how many classrooms can one pipeline node take?
+
+Usage:
+    python scripts/loadgen.py --url ws://localhost:9000/ws
+    python scripts/loadgen.py --start 2 --step 2 --max 40 --slo-ms 1500 --output capacity.json
+    python scripts/loadgen.py --pattern ptt --wav-dir samples/
+    python scripts/loadgen.py --protocol binary
+
+Opens simulated classrooms against /ws and follows app/ws/protocol.py:
+session.create, then 16 kHz int16 PCM streamed at real-time pace in 100ms
+frames. Two patterns are supported:
+  realtime  continuous mic; the server's VAD cuts utterances
+  ptt       input_audio.start, the utterance, input_audio.stop
+
+For every utterance it records the time from the last speech byte (realtime)
+or input_audio.stop (ptt) to transcript.done, translation.done and
+audio.done. Sessions are added in steps until the p95 of audio.done goes
+over the SLO (or errors appear), and the last level that met the SLO is
+reported as the node's capacity.
+
+For reproducible numbers run the server with PIPELINE_BACKEND=stub.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import websockets
+
+from bench_pipeline import SAMPLE_RATE, load_wav, percentiles, synthetic_clips
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.ws.protocol import parse_frame  # noqa: E402
+
+FRAME_BYTES = 3200  # 100ms of 16-bit 16kHz mono
+EVENTS = ("transcript.done", "translation.done", "audio.done")
+
+
+def speech_end_offset(pcm: bytes) -> int:
+    """Byte offset just after the last window with speech-level energy."""
+    audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    windows = len(audio) // 512
+    if windows == 0:
+        return len(pcm)
+    rms = np.sqrt(np.mean(audio[:windows * 512].reshape(windows, 512) ** 2, axis=1))
+    loud = np.nonzero(rms > 0.02)[0]
+    if len(loud) == 0:
+        return len(pcm)
+    return int((loud[-1] + 1) * 512 * 2)
+
+
+class Level:
+    """Latencies collected while a given number of sessions was running."""
+
+    def __init__(self, sessions: int):
+        self.sessions = sessions
+        self.latency_ms = {event: [] for event in EVENTS}
+        self.errors = 0
+        self.utterances = 0
+
+
+async def run_session(url: str, clips: list, pattern: str, state: dict, stop: asyncio.Event, args):
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({
+            "type": "session.create", "source_lang": args.source_lang,
+            "target_lang": args.target_lang, "voice": "adult_female",
+            "protocol": args.protocol,
+        }))
+        while json.loads(await ws.recv()).get("type") != "session.created":
+            pass
+
+        # Reference time of each utterance still waiting for results, oldest first
+        inflight: deque = deque()
+
+        async def receiver():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    if args.protocol != "binary":
+                        continue
+                    events, _ = parse_frame(message)
+                else:
+                    events = [json.loads(message)]
+                for msg in events:
+                    on_event(msg)
+
+        def on_event(msg: dict):
+            kind = msg.get("type")
+            level = state["level"]
+            # An utterance the server dropped (e.g. empty transcript) never gets results
+            while inflight and time.perf_counter() - inflight[0] > args.timeout:
+                inflight.popleft()
+                level.errors += 1
+            if kind in EVENTS and inflight:
+                level.latency_ms[kind].append((time.perf_counter() - inflight[0]) * 1000)
+                if kind == "audio.done":
+                    inflight.popleft()
+                    level.utterances += 1
+            elif kind == "error":
+                level.errors += 1
+                if inflight:
+                    inflight.popleft()
+
+        recv_task = asyncio.create_task(receiver())
+        t_next = time.perf_counter()
+        try:
+            i = state["offset"]
+            while not stop.is_set():
+                pcm, speech_end = clips[i % len(clips)]
+                i += 1
+                if pattern == "ptt":
+                    await ws.send(json.dumps({"type": "input_audio.start"}))
+                for offset in range(0, len(pcm), FRAME_BYTES):
+                    t_next += FRAME_BYTES / 2 / SAMPLE_RATE
+                    await asyncio.sleep(max(t_next - time.perf_counter(), 0))
+                    await ws.send(pcm[offset:offset + FRAME_BYTES])
+                    if pattern == "realtime" and offset < speech_end <= offset + FRAME_BYTES:
+                        inflight.append(time.perf_counter())
+                if pattern == "ptt":
+                    await ws.send(json.dumps({"type": "input_audio.stop"}))
+                    inflight.append(time.perf_counter())
+                    # A speaker pauses between turns
+                    t_next += 0.5
+        finally:
+            recv_task.cancel()
+
+
+def level_report(level: Level, slo_ms: float) -> dict:
+    stats = {event: percentiles(values) for event, values in level.latency_ms.items()}
+    p95 = stats["audio.done"].get("p95")
+    return {
+        "sessions": level.sessions,
+        "utterances": level.utterances,
+        "errors": level.errors,
+        "latency_ms": stats,
+        "slo_met": p95 is not None and p95 <= slo_ms and level.errors == 0,
+    }
+
+
+async def ramp(args) -> dict:
+    if args.wav_dir:
+        raw = [load_wav(p) for p in sorted(args.wav_dir.glob("*.wav"))]
+    else:
+        # One utterance per clip, so every clip yields exactly one result set
+        raw = [pcm for _, pcm in synthetic_clips(args.synthetic, max_bursts=1)]
+    clips = [(pcm, speech_end_offset(pcm)) for pcm in raw]
+
+    stop = asyncio.Event()
+    tasks = []
+    reports = []
+    capacity = 0
+    sessions = 0
+
+    print(f"{'sessions':>8} {'utts':>5} {'err':>4} {'transcript p95':>15} {'translation p95':>16} {'audio p95':>10}  SLO")
+    while sessions < args.max:
+        target = min(sessions + (args.start if sessions == 0 else args.step), args.max)
+        level = Level(target)
+        for n in range(sessions, target):
+            state = {"level": level, "offset": n}
+            tasks.append((state, asyncio.create_task(run_session(args.url, clips, args.pattern, state, stop, args))))
+        for state, _ in tasks:
+            state["level"] = level
+        sessions = target
+
+        # Let the new sessions settle in, then measure
+        await asyncio.sleep(args.warmup)
+        level.latency_ms = {event: [] for event in EVENTS}
+        level.errors = level.utterances = 0
+        await asyncio.sleep(args.duration)
+
+        report = level_report(level, args.slo_ms)
+        reports.append(report)
+        lat = report["latency_ms"]
+        print(f"{sessions:>8} {report['utterances']:>5} {report['errors']:>4} "
+              f"{lat['transcript.done'].get('p95', float('nan')):>15.0f} "
+              f"{lat['translation.done'].get('p95', float('nan')):>16.0f} "
+              f"{lat['audio.done'].get('p95', float('nan')):>10.0f}  {'ok' if report['slo_met'] else 'BREACH'}")
+
+        failed = [t for _, t in tasks if t.done() and t.exception() is not None]
+        if failed:
+            print(f"  {len(failed)} session(s) failed: {failed[0].exception()!r}")
+        if not report["slo_met"]:
+            break
+        capacity = sessions
+
+    stop.set()
+    await asyncio.gather(*(t for _, t in tasks), return_exceptions=True)
+    return {
+        "url": args.url,
+        "pattern": args.pattern,
+        "slo_ms": args.slo_ms,
+        "capacity_sessions": capacity,
+        "levels": reports,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:9000/ws")
+    parser.add_argument("--pattern", choices=["realtime", "ptt"], default="realtime")
+    parser.add_argument("--wav-dir", type=Path, help="folder of 16-bit WAV files, one utterance each")
+    parser.add_argument("--synthetic", type=int, default=12, help="number of generated clips otherwise")
+    parser.add_argument("--start", type=int, default=1, help="sessions at the first level")
+    parser.add_argument("--step", type=int, default=2, help="sessions added per level")
+    parser.add_argument("--max", type=int, default=64, help="stop ramping here")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds before measuring a level")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds measured per level")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p95 budget for audio.done")
+    parser.add_argument("--timeout", type=float, default=30.0, help="count an utterance as lost after this")
+    parser.add_argument("--protocol", choices=["json", "binary"], default="json")
+    parser.add_argument("--source-lang", default="th")
+    parser.add_argument("--target-lang", default="en")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args()
+
+    result = asyncio.run(ramp(args))
+    print(f"\nCapacity: {result['capacity_sessions']} concurrent sessions "
+          f"(audio.done p95 <= {args.slo_ms:.0f}ms, no errors)")
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+        print(f"Saved {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Run several pipeline nodes and the session router on this machine.
+
+Usage:
+    python scripts/local_cluster.py                       # 3 stub nodes, router on :9000
+    python scripts/local_cluster.py --nodes 4 --port 8000 --max-sessions 6
+    python scripts/local_cluster.py --backend real --nodes 2
+
+Starts each node as its own uvicorn process (app.main) on port+1, port+2,
+... and app.router on --port with ROUTER_NODES pointing at them. With the
+stub backend (the default) the nodes need no models or GPU, so routing,
+readiness and failover can be tried out on a laptop: point
+scripts/loadgen.py or scripts/replay_capture.py at ws://localhost:<port>/ws,
+watch /nodes on the router, and stop a node to see its sessions refused
+and new ones go elsewhere. Ctrl-C stops everything.
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--port", type=int, default=9000, help="router port; nodes use the ports after it")
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="stub compute-time multiplier")
+    parser.add_argument("--max-sessions", type=int, default=0, help="NODE_MAX_SESSIONS for every node")
+    args = parser.parse_args()
+
+    procs = []
+    urls = []
+    for i in range(1, args.nodes + 1):
+        port = args.port + i
+        env = dict(os.environ, PIPELINE_BACKEND=args.backend, STUB_TIME_SCALE=str(args.time_scale),
+                   NODE_MAX_SESSIONS=str(args.max_sessions))
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        ))
+        urls.append("http://127.0.0.1:%d" % port)
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.router:app", "--port", str(args.port)],
+        cwd=ROOT, env=dict(os.environ, ROUTER_NODES=",".join(urls)),
+    ))
+    print(f"Router ws://127.0.0.1:{args.port}/ws → {', '.join(urls)}  (Ctrl-C to stop)", flush=True)
+
+    router = procs[-1]
+    exited = set()
+    try:
+        # Nodes may be stopped to try failover; only the router exiting ends the cluster
+        while router.poll() is None:
+            for url, p in zip(urls, procs):
+                if p.poll() is not None and url not in exited:
+                    exited.add(url)
+                    print(f"Node {url} exited (code {p.returncode})", flush=True)
+            time.sleep(0.5)
+        print("The router exited; stopping the cluster")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            if p.poll() is None:
+                p.send_signal(signal.SIGINT)
+        for p in procs:
+            try:
+                p.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                p.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Replay captured WebSocket sessions: the same real traffic against any build.
+
+Usage:
+    python scripts/replay_capture.py captures/*.wsc --url ws://localhost:9000/ws
+    python scripts/replay_capture.py captures/*.wsc --speed 4 --output run.json
+    python scripts/replay_capture.py captures/*.wsc --orchestrator --backend stub --speed 0
+    python scripts/replay_capture.py captures/*.wsc --orchestrator --compare run.json
+
+Captures come from a server running with CAPTURE_DIR set (app/ws/capture.py).
+Every capture file is played back as its own concurrent session, and each
+frame is sent at its recorded arrival time divided by --speed: 1 is the
+original timing, 4 is four times compressed, and 0 sends as fast as the
+target accepts.
+
+--url sends the frames unchanged to a running server's /ws. The server's
+own latency breakdown (timings.total_ms of audio.done) is collected per
+utterance.
+
+--orchestrator feeds them straight into an in-process PipelineOrchestrator
+instead, the way ConnectionHandler would: session.create settings, input
+decoding, chunking and push-to-talk. No server or network is involved, so
+only pipeline changes show up. Stage timings come from the results. A replay
+that fails counts as an error.
+
+Both modes write the transcripts and translations too, so two runs on the
+same traffic can be checked for output changes as well as latency
+(--compare diffs latency against an earlier --output).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from bench_pipeline import Recorder, compare, percentiles
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.ws.capture import KIND_BINARY, KIND_TEXT, read_capture  # noqa: E402
+from app.ws.protocol import parse_frame  # noqa: E402
+
+
+class ReplayRecorder(Recorder):
+    def __init__(self):
+        super().__init__()
+        self.errors = 0
+
+
+def _pace(t_start: float, t_rel: float, speed: float):
+    if speed > 0:
+        delay = t_start + t_rel / speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def replay_orchestrator(pipeline, path: Path, speed: float, rec: ReplayRecorder, outputs: list):
+    """One capture through the orchestrator, following ConnectionHandler's handling of each frame."""
+    from app.config import settings
+    from app.ws.protocol import InputAudioStart, InputAudioStop, SessionClose, SessionCreate, parse_client_message
+    from app.ws.session import Session
+
+    header, frames = read_capture(path)
+    session = Session(session_id=header["session_id"])
+    t_start = time.perf_counter()
+    fed_s = 0.0
+    speech_start_s = None
+
+    def _done(mode: str, result: dict, t0: float, audio_s: float):
+        if result.get("transcript"):
+            rec.add(mode, result, (time.perf_counter() - t0) * 1000, audio_s)
+            outputs.append({"capture": path.name, "transcript": result["transcript"],
+                            "translation": result.get("translation", "")})
+
+    for kind, t_rel, payload in frames:
+        _pace(t_start, t_rel, speed)
+        if kind == KIND_TEXT:
+            try:
+                msg = parse_client_message(payload.decode("utf-8"))
+            except ValueError:
+                continue
+            if isinstance(msg, SessionCreate):
+                # The server would send these as error messages, which --url counts
+                errors = session.configure(msg)
+                with rec.lock:
+                    rec.errors += len(errors)
+            elif isinstance(msg, InputAudioStart):
+                session.is_recording = True
+                session.ingest.clear()
+            elif isinstance(msg, InputAudioStop):
+                session.is_recording = False
+                audio = session.clear_buffer()
+                if len(audio):
+                    t0 = time.perf_counter()
+                    _done("ptt", pipeline.process_segment(audio, session), t0, len(audio) / settings.sample_rate)
+            elif isinstance(msg, SessionClose):
+                break
+            continue
+
+        if kind != KIND_BINARY:
+            continue
+        data = payload
+        if session.client_timestamps and len(data) >= 8:
+            data = memoryview(data)[8:]
+        if session.decoder is not None:
+            try:
+                data = session.decoder.decode(data)
+            except Exception:
+                continue
+            if not len(data):
+                continue
+        session.append_audio(data)
+        if session.is_recording:
+            continue
+        chunk = session.take_chunk()
+        if chunk is None:
+            continue
+        fed_s += len(chunk) / settings.sample_rate
+        t0 = time.perf_counter()
+        result = pipeline.process_realtime(chunk, session)
+        if result is None:
+            continue
+        if result.get("speech_start"):
+            speech_start_s = fed_s
+        _done("realtime", result, t0, fed_s - (speech_start_s or 0))
+
+
+def _replay_thread(pipeline, path: Path, speed: float, rec: ReplayRecorder, outputs: list):
+    """replay_orchestrator in a thread; a replay that dies counts as an error, not as a quiet session."""
+    try:
+        replay_orchestrator(pipeline, path, speed, rec, outputs)
+    except Exception:
+        traceback.print_exc()
+        print(f"{path.name}: replay failed", file=sys.stderr)
+        with rec.lock:
+            rec.errors += 1
+
+
+async def replay_ws(url: str, path: Path, speed: float, drain_s: float, rec: ReplayRecorder, outputs: list):
+    """One capture into /ws; audio.done's server-side timings are the measurement."""
+    import websockets
+
+    header, frames = read_capture(path)
+    texts: dict[str, dict] = {}
+    async with websockets.connect(url, max_size=None) as ws:
+        last_event = [time.perf_counter()]
+
+        async def receiver():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    try:
+                        events, _ = parse_frame(message)
+                    except (ValueError, struct.error):
+                        continue  # a JSON-protocol session's TTS audio
+                else:
+                    events = [json.loads(message)]
+                for msg in events:
+                    last_event[0] = time.perf_counter()
+                    kind, utt = msg.get("type"), msg.get("utterance_id", "")
+                    if kind == "transcript.done":
+                        texts.setdefault(utt, {})["transcript"] = msg["text"]
+                    elif kind == "translation.done":
+                        texts.setdefault(utt, {})["translation"] = msg["text"]
+                    elif kind == "audio.done":
+                        timings = dict(msg.get("timings") or {})
+                        total_ms = timings.pop("total_ms", msg.get("processing_time_ms", 0))
+                        rec.add("ptt" if "vad_ms" not in timings else "realtime", {"timings": timings}, total_ms, 0)
+                    elif kind == "error":
+                        rec.errors += 1
+
+        receive_task = asyncio.create_task(receiver())
+        t_start = time.perf_counter()
+        for kind, t_rel, payload in frames:
+            if speed > 0:
+                delay = t_start + t_rel / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await ws.send(payload if kind == KIND_BINARY else payload.decode("utf-8"))
+        # Results still in flight: wait until the server has been quiet for drain_s
+        while time.perf_counter() - last_event[0] < drain_s:
+            await asyncio.sleep(0.1)
+        receive_task.cancel()
+
+    for utt, text in sorted(texts.items()):
+        outputs.append({"capture": path.name, "utterance_id": utt, **text})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", type=Path, help="capture files (.wsc)")
+    parser.add_argument("--url", default="ws://localhost:9000/ws")
+    parser.add_argument("--orchestrator", action="store_true", help="in-process PipelineOrchestrator, no server")
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub", help="--orchestrator backend")
+    parser.add_argument("--time-scale", type=float, help="stub compute-time multiplier (default: STUB_TIME_SCALE)")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = original timing, 0 = as fast as possible")
+    parser.add_argument("--drain", type=float, default=3.0, help="--url: seconds of quiet before hanging up")
+    parser.add_argument("--output", type=Path, help="write the JSON summary here")
+    parser.add_argument("--compare", type=Path, help="earlier JSON summary to diff against")
+    args = parser.parse_args()
+
+    rec = ReplayRecorder()
+    outputs: list[dict] = []
+    t0 = time.perf_counter()
+    if args.orchestrator:
+        os.environ.setdefault("PIPELINE_BACKEND", args.backend)
+        if args.time_scale is not None:
+            # The flag beats the environment
+            os.environ["STUB_TIME_SCALE"] = str(args.time_scale)
+        import logging
+        logging.basicConfig(level=logging.WARNING)
+        from app.pipeline.orchestrator import PipelineOrchestrator
+
+        pipeline = PipelineOrchestrator(backend=args.backend)
+        pipeline.load_models()
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=_replay_thread, args=(pipeline, p, args.speed, rec, outputs))
+                   for p in args.captures]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        async def _all():
+            await asyncio.gather(*(replay_ws(args.url, p, args.speed, args.drain, rec, outputs)
+                                   for p in args.captures))
+        asyncio.run(_all())
+    wall_s = time.perf_counter() - t0
+    # Sessions finish in any order; within one capture the order is the utterance order
+    outputs.sort(key=lambda o: o["capture"])
+
+    summary = {
+        "config": {"target": "orchestrator" if args.orchestrator else args.url, "speed": args.speed,
+                   "captures": [p.name for p in args.captures]},
+        "wall_s": round(wall_s, 2),
+        "utterances": rec.utterances,
+        "errors": rec.errors,
+        "stages": {name: percentiles(v) for name, v in sorted(rec.stages.items())},
+        "e2e_ms": {mode: percentiles(v) for mode, v in rec.e2e_ms.items() if v},
+        "outputs": outputs,
+    }
+    print(json.dumps({k: v for k, v in summary.items() if k != "outputs"}, indent=2, ensure_ascii=False))
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2, ensure_ascii=False))
+        print(f"\nSaved {args.output}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        compare(summary, baseline)
+        before = [(o.get("transcript"), o.get("translation")) for o in baseline.get("outputs", [])]
+        after = [(o.get("transcript"), o.get("translation")) for o in outputs]
+        changed = sum(a != b for a, b in zip(before, after)) + abs(len(before) - len(after))
+        print(f"\nOutputs: {len(after)} utterances, {changed} differ from the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
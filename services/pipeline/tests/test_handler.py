@@ -0,0 +1,63 @@
+"""ConnectionHandler: a session whose client is gone is torn down even with its result queue full."""
+
+import asyncio
+import json
+
+from app.config import settings
+from app.ws.handler import ConnectionHandler
+
+CHUNK_BYTES = 32000  # 1 s of int16: every frame is at least one realtime chunk
+
+
+class _Runner:
+    """Every chunk starts an utterance at once, so each one has something to send."""
+
+    def __init__(self):
+        self.closed = []
+
+    async def realtime(self, audio, session, on_vad_done=None):
+        return {"speech_start": True}
+
+    def close_session(self, session_id):
+        self.closed.append(session_id)
+
+
+class _GoneClient:
+    """Sends session.create and a stream of audio, but is gone before the first result reaches it."""
+
+    def __init__(self, frames: int):
+        self.incoming = [{"type": "websocket.receive", "text": json.dumps({"type": "session.create"})}]
+        self.incoming += [{"type": "websocket.receive", "bytes": bytes(CHUNK_BYTES)}] * frames
+        self.incoming.append({"type": "websocket.disconnect", "code": 1006})
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        await asyncio.sleep(0.01)
+        return self.incoming.pop(0)
+
+    async def send_text(self, text):
+        self.sent += 1
+        if self.sent > 1:  # session.created got through
+            raise OSError("client disconnected")
+
+    async def send_bytes(self, data):
+        raise OSError("client disconnected")
+
+    async def close(self, code=1000, reason=None):
+        raise RuntimeError("already closed")
+
+
+def test_client_gone_while_the_queue_is_full_ends_the_session(monkeypatch):
+    monkeypatch.setattr(settings, "ws_max_pending_chunks", 2)
+    monkeypatch.setattr(settings, "capture_dir", "")
+    runner = _Runner()
+    handler = ConnectionHandler(runner)
+    try:
+        # Far more chunks than the queue holds: the receive loop has to wait for a slot
+        asyncio.run(asyncio.wait_for(handler.handle(_GoneClient(frames=20)), 5))
+    finally:
+        handler.close()
+    assert len(runner.closed) == 1
@@ -0,0 +1,87 @@
+"""OrderedResults: dispatch-order delivery and the in-flight limit (backpressure)."""
+
+import asyncio
+
+import pytest
+
+from app.ws.results import OrderedResults, ResultsClosed
+
+
+def test_results_come_out_in_dispatch_order():
+    async def scenario():
+        results = OrderedResults(limit=4)
+        seqs = [await results.reserve() for _ in range(3)]
+        # Finished out of order: 2, 0, 1
+        for seq in (seqs[2], seqs[0], seqs[1]):
+            results.put(seq, {"seq": seq})
+        got = []
+        for _ in seqs:
+            got.append((await results.get())["seq"])
+            results.task_done()
+        return got
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+def test_get_waits_for_the_oldest_chunk():
+    async def scenario():
+        results = OrderedResults(limit=4)
+        first, second = await results.reserve(), await results.reserve()
+        results.put(second, {"seq": second})
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(results.get(), 0.05)
+        results.put(first, None)
+        return await results.get(), await results.get()
+
+    assert asyncio.run(scenario()) == (None, {"seq": 1})
+
+
+def test_reserve_blocks_at_the_limit_until_a_result_is_sent():
+    async def scenario():
+        results = OrderedResults(limit=2)
+        first = await results.reserve()
+        await results.reserve()
+        assert results.full()
+
+        # A third chunk cannot be dispatched while two are unsent
+        blocked = asyncio.create_task(results.reserve())
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+
+        # Finishing a chunk is not enough: the slot frees once its result is sent
+        results.put(first, {"seq": first})
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+
+        await results.get()
+        results.task_done()
+        return await asyncio.wait_for(blocked, 1.0)
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_close_fails_a_reserve_waiting_at_the_limit():
+    async def scenario():
+        results = OrderedResults(limit=1)
+        await results.reserve()
+        blocked = asyncio.create_task(results.reserve())
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+
+        # The sender is gone: the slot would never free
+        results.close()
+        with pytest.raises(ResultsClosed):
+            await asyncio.wait_for(blocked, 1.0)
+        with pytest.raises(ResultsClosed):
+            await results.get()
+
+    asyncio.run(scenario())
+
+
+def test_limit_is_at_least_one():
+    async def scenario():
+        results = OrderedResults(limit=0)
+        await results.reserve()
+        return results.full()
+
+    assert asyncio.run(scenario())
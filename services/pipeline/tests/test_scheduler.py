@@ -0,0 +1,37 @@
+"""PipelineScheduler: a cancelled job never runs and frees its slot at once."""
+
+import asyncio
+import threading
+
+from app.pipeline.scheduler import PipelineScheduler, Priority
+
+
+def test_cancelled_job_is_dropped_from_the_queue():
+    ran = []
+    release = threading.Event()
+
+    async def scenario():
+        scheduler = PipelineScheduler(workers=1, realtime_workers=0, max_queue=4, max_session_queue=4)
+        scheduler.start()
+        try:
+            # Keep the only worker busy so the next job stays queued
+            busy = asyncio.create_task(scheduler.run(Priority.BULK, "a", release.wait))
+            await asyncio.sleep(0.05)
+            queued = asyncio.create_task(scheduler.run(Priority.BULK, "b", ran.append, "b"))
+            await asyncio.sleep(0.05)
+            assert scheduler.queue_depth() == 1
+
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            depth = scheduler.queue_depth()
+            release.set()
+            await busy
+            # Anything still queued would have run by now
+            await scheduler.run(Priority.BULK, "c", ran.append, "c")
+            return depth
+        finally:
+            release.set()
+            scheduler.shutdown()
+
+    assert asyncio.run(scenario()) == 0
+    assert ran == ["c"]
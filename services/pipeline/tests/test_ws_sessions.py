@@ -0,0 +1,139 @@
+"""Concurrent /ws sessions on a stub-backend server: each gets only its own utterances, in order."""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pytest
+import websockets
+
+ROOT = Path(__file__).parent.parent
+SAMPLE_RATE = 16000
+CHUNK_BYTES = 3200  # 100 ms of int16
+SESSIONS = 4
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def server():
+    port = _free_port()
+    env = dict(os.environ, PIPELINE_BACKEND="stub", STUB_TIME_SCALE="0.2", PIPELINE_WORKERS="0",
+               PREPARED_CACHE_DIR="", TRANSCRIPT_DIR="", CAPTURE_DIR="", TM_PATH="")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                with urllib.request.urlopen("http://127.0.0.1:%d/ready" % port, timeout=1):
+                    break
+            except (urllib.error.URLError, OSError):
+                if proc.poll() is not None or time.time() > deadline:
+                    pytest.fail("stub server did not become ready")
+                time.sleep(0.2)
+        yield "ws://127.0.0.1:%d/ws" % port
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _utterance(seed: int) -> bytes:
+    """One burst of speech-like noise followed by enough silence to end it."""
+    rng = np.random.default_rng(seed)
+    n = int(rng.uniform(0.8, 1.5) * SAMPLE_RATE)
+    envelope = np.abs(np.sin(np.linspace(0, np.pi * 5, n)))
+    audio = np.concatenate([
+        np.zeros(int(0.3 * SAMPLE_RATE)),
+        np.clip(rng.normal(0, 0.15, n) * envelope + 0.05 * np.sign(envelope) * rng.normal(0, 1, n), -1, 1),
+        np.zeros(int(1.2 * SAMPLE_RATE)),
+    ])
+    return (audio * 32767).astype(np.int16).tobytes()
+
+
+async def _session(url: str, index: int, utterances: int) -> tuple[str, list[tuple[str, str]]]:
+    """Stream ``utterances`` clips; returns the session id and its (event type, utterance id) in arrival order."""
+    events = []
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"type": "session.create"}))
+        session_id = json.loads(await ws.recv())["session_id"]
+
+        async def receive():
+            async for message in ws:
+                if isinstance(message, str):
+                    msg = json.loads(message)
+                    if msg.get("utterance_id"):
+                        events.append((msg["type"], msg["utterance_id"]))
+
+        receiver = asyncio.create_task(receive())
+        for u in range(utterances):
+            pcm = _utterance(1000 * index + u)
+            for offset in range(0, len(pcm), CHUNK_BYTES):
+                await ws.send(pcm[offset:offset + CHUNK_BYTES])
+                await asyncio.sleep(0.01)
+        # Wait for the last utterance's audio
+        deadline = time.time() + 20
+        while sum(t == "audio.done" for t, _ in events) < utterances and time.time() < deadline:
+            await asyncio.sleep(0.05)
+        receiver.cancel()
+    return session_id, events
+
+
+def test_concurrent_sessions_get_their_own_utterances_in_order(server):
+    async def scenario():
+        # Different lengths, so sessions are mid-utterance at different times
+        return await asyncio.gather(*(_session(server, i, 2 + i % 2) for i in range(SESSIONS)))
+
+    for index, (session_id, events) in enumerate(asyncio.run(scenario())):
+        expected = 2 + index % 2
+        utterance_ids = [f"{session_id[:8]}-utt_{n:04d}" for n in range(1, expected + 1)]
+        assert {u for _, u in events} == set(utterance_ids), "foreign or missing utterances"
+        # Utterance by utterance, each with its transcript, translation and audio in that order
+        assert events == [(kind, u) for u in utterance_ids
+                          for kind in ("transcript.done", "translation.done", "audio.done")]
+
+
+async def _create(url: str, **fields) -> list[dict]:
+    """session.create with ``fields``, then a plain one; returns the messages up to its session.created."""
+    messages = []
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({"type": "session.create", **fields}))
+        # The connection must survive a bad field: a plain session.create still works after it.
+        # Messages are handled in turn, so any error about the first arrives before the second reply
+        await ws.send(json.dumps({"type": "session.create"}))
+        while sum(m["type"] == "session.created" for m in messages) < 2:
+            messages.append(json.loads(await asyncio.wait_for(ws.recv(), 5)))
+    return messages
+
+
+def _errors(messages: list[dict]) -> list[str]:
+    return [m["code"] for m in messages if m["type"] == "error"]
+
+
+def test_chunk_ms_as_a_numeric_string_is_accepted(server):
+    assert _errors(asyncio.run(_create(server, chunk_ms="200"))) == []
+
+
+def test_non_integer_chunk_ms_is_an_invalid_message(server):
+    assert _errors(asyncio.run(_create(server, chunk_ms="fast"))) == ["invalid_message"]
+    assert _errors(asyncio.run(_create(server, chunk_ms=[200]))) == ["invalid_message"]
+
+
+def test_bad_input_sample_rate_is_an_unsupported_codec(server):
+    assert _errors(asyncio.run(_create(server, input_sample_rate="loud"))) == ["unsupported_codec"]
+    assert _errors(asyncio.run(_create(server, input_sample_rate=None))) == ["unsupported_codec"]
+    assert _errors(asyncio.run(_create(server, input_sample_rate=4000))) == ["unsupported_codec"]